@@ -0,0 +1,71 @@
+"""
+Celery entry point for generation jobs
+
+Only used when JOB_BROKER=celery. Start workers, and one beat scheduler, with:
+
+    celery -A app.celery_app worker --loglevel=info
+    celery -A app.celery_app beat --loglevel=info
+
+Job state stays in the database either way; Celery just delivers item ids
+to workers instead of them polling for due items. Beat periodically returns
+items whose worker died mid-generation to the queue and delivers them again;
+every worker also does so when it starts.
+"""
+
+import asyncio
+import os
+import socket
+from celery import Celery
+from celery.signals import worker_ready
+from .config import settings
+from .database import SessionLocal
+from .models.job import GenerationJobItem, JobStatus
+from .services.generation_jobs import generation_job_queue
+
+celery_app = Celery("edutok", broker=settings.redis_url)
+celery_app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        "requeue-stale-generation-items": {
+            "task": "edutok.requeue_stale_generation_items",
+            "schedule": settings.job_requeue_interval_seconds,
+        },
+    },
+)
+
+
+@celery_app.task(name="edutok.process_generation_item")
+def process_generation_item(item_id: int):
+    """Claim and process a single generation item"""
+    db = SessionLocal()
+    try:
+        claimed = generation_job_queue.claim(db, f"celery@{socket.gethostname()}:{os.getpid()}", item_id=item_id)
+        status = None if claimed else db.query(GenerationJobItem.status).filter(GenerationJobItem.id == item_id).scalar()
+    finally:
+        db.close()
+
+    if claimed is None:
+        # Still pending: its job is at the concurrency limit (or it isn't due yet), so try again later.
+        # Otherwise another delivery already took it.
+        if status == JobStatus.PENDING:
+            generation_job_queue.dispatch([item_id], countdown=settings.job_poll_interval_seconds)
+        return
+
+    asyncio.run(generation_job_queue.process_item(claimed))
+
+
+@celery_app.task(name="edutok.requeue_stale_generation_items")
+def requeue_stale_generation_items() -> int:
+    """Requeue and redeliver items whose worker lease expired"""
+    db = SessionLocal()
+    try:
+        return generation_job_queue.requeue_stale(db)
+    finally:
+        db.close()
+
+
+@worker_ready.connect
+def requeue_stale_on_start(**kwargs):
+    """Recover items orphaned while no worker (or beat) was running"""
+    requeue_stale_generation_items.delay()
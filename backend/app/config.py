@@ -16,11 +16,96 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://localhost:6379"
     
+    # Generation jobs
+    job_broker: str = "database"  # 'database' (polling workers) or 'celery'
+    job_inline_worker: bool = True  # Run a polling worker inside the API process
+    job_worker_concurrency: int = 2
+    job_poll_interval_seconds: float = 2.0
+    job_max_attempts: int = 3
+    job_retry_base_seconds: float = 10.0
+    job_lease_seconds: int = 900  # Running items older than this are assumed orphaned
+    job_requeue_interval_seconds: float = 60.0  # How often Celery beat requeues expired leases
+    job_flush_interval_seconds: float = 0.25  # Items finishing this close together are written in one transaction
+    progress_bus_backend: str = "memory"  # 'memory' (single process) or 'redis'
+    
     # External APIs
     youtube_api_key: Optional[str] = None
     tiktok_api_key: Optional[str] = None
     openai_api_key: Optional[str] = None
     elevenlabs_api_key: Optional[str] = None
+    openai_base_url: str = "https://api.openai.com/v1"
+    elevenlabs_base_url: str = "https://api.elevenlabs.io/v1"
+    
+    # AI provider HTTP connection pools (one per provider, shared process-wide)
+    ai_http_max_connections: int = 20
+    ai_http_max_keepalive_connections: int = 10
+    ai_http_keepalive_seconds: float = 30.0
+    ai_http_timeout_seconds: float = 60.0
+    ai_http_connect_timeout_seconds: float = 5.0
+    ai_http2: bool = False  # Requires the h2 package
+    ai_health_probe_interval_seconds: float = 60.0  # 0 disables the background probe
+    ai_health_probe_timeout_seconds: float = 5.0
+    
+    # AI provider pacing
+    ai_batch_concurrency: int = 4  # Items of one job running at once, across all workers
+    ai_rate_limit_retries: int = 2  # Retries after a 429 before falling back
+    openai_requests_per_minute: int = 60
+    openai_tokens_per_minute: int = 40000
+    elevenlabs_requests_per_minute: int = 60
+    elevenlabs_characters_per_minute: int = 20000
+    
+    # AI provider resilience
+    ai_call_timeout_seconds: float = 30.0  # Per attempt
+    ai_request_deadline_seconds: float = 120.0  # Default budget per HTTP request (X-Request-Timeout overrides); 0 = none
+    ai_breaker_failure_threshold: int = 5  # Consecutive failures before the circuit opens
+    ai_breaker_reset_seconds: float = 30.0  # How long the circuit stays open before probing
+    ai_breaker_half_open_probes: int = 1
+    ai_hedging_enabled: bool = False  # Re-issue idempotent calls that run past the provider's p95
+    ai_hedge_min_samples: int = 20  # Latency samples needed before hedging kicks in
+    
+    # AI provider scheduling
+    ai_scheduler_enabled: bool = True  # Interactive calls reserve provider quota before batch jobs
+    ai_scheduler_batch_max_wait_seconds: float = 30.0  # Batch calls queued this long are served next
+    
+    # Script model routing
+    script_model_tiers: str = "gpt-4,gpt-4o-mini,gpt-3.5-turbo"  # Preferred first; later tiers are faster fallbacks
+    script_latency_slo_seconds: float = 25.0  # Latency budget per script; 0 = no budget
+    script_tokens_per_minute: int = 300  # Completion tokens per minute of narration (~150 spoken words plus structure)
+    script_max_tokens_cap: int = 4000
+    script_route_min_samples: int = 10  # Latency samples needed before a tier can be skipped
+    
+    # Near-duplicate scripts
+    dedup_enabled: bool = True  # Reuse or skip videos whose script is a near-duplicate of an existing one
+    dedup_similarity_threshold: float = 0.85  # Estimated Jaccard similarity of word shingles
+    dedup_num_perm: int = 128  # MinHash signature length (changing it requires backfill_signatures.py --rebuild)
+    dedup_bands: int = 16  # LSH bands; more bands find candidates at lower similarity
+    dedup_shingle_words: int = 5
+    
+    # Curriculum generation
+    curriculum_max_topics: int = 12  # Subtopics per learning path
+    
+    # Narration synthesis
+    tts_segment_max_chars: int = 400  # Longer paragraphs are split on sentence boundaries
+    tts_segment_concurrency: int = 4  # Segments synthesized at once per script
+    tts_cache_dir: str = "temp/tts_cache"
+    tts_cache_max_mb: int = 500  # 0 = unlimited
+    
+    # Script cache
+    script_cache_enabled: bool = True
+    script_cache_ttl_hours: float = 168.0  # 1 week
+    script_cache_fallback_ttl_hours: float = 1.0  # Scripts from a fallback model tier; 0 = don't cache
+    script_cache_max_entries: int = 10000
+    
+    # Idempotency keys
+    idempotency_ttl_hours: float = 24.0  # How long a completed response is replayed
+    idempotency_wait_seconds: float = 300.0  # How long a duplicate waits for the original before a 409
+    idempotency_lock_seconds: float = 900.0  # An unfinished original older than this is treated as abandoned
+    
+    # Observability
+    metrics_enabled: bool = True  # Serve /metrics and time every request and query
+    ready_max_db_latency_ms: float = 500.0  # /ready fails when a database round trip is slower
+    sql_profiler_enabled: bool = True  # Profile each request's SQL; Server-Timing headers in debug mode
+    sql_n_plus_one_threshold: int = 5  # Identical SELECTs per request logged as a likely N+1
     
     # Environment
     environment: str = "development"
@@ -29,6 +114,8 @@ class Settings(BaseSettings):
     # File Storage
     upload_dir: str = "./uploads"
     max_file_size: int = 10485760  # 10MB
+    creator_storage_quota_mb: int = 0  # 0 = unlimited
+    storage_gc_grace_hours: float = 24.0
     
     class Config:
         env_file = ".env"
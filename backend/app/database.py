@@ -1,22 +1,47 @@
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker, Session
 from .config import settings
 
 # Synchronous database
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Asynchronous database
-async_engine = create_async_engine(settings.database_url_async)
-AsyncSessionLocal = sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
-)
+# Asynchronous database, created on first use since importing the async driver is slow
+_async_session_factory = None
 
 Base = declarative_base()
 
 
+def init_db():
+    """Create any missing tables (run by migrate.py, not at import)"""
+    from . import models  # noqa: F401 - registers every table on Base.metadata
+    Base.metadata.create_all(bind=engine)
+
+
+def ping() -> float:
+    """Run a trivial query and return the round-trip time in seconds"""
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return time.perf_counter() - started
+
+
+def get_async_session_factory():
+    """Get the async session factory, creating the async engine on first call"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+        async_engine = create_async_engine(settings.database_url_async)
+        _async_session_factory = sessionmaker(
+            async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -26,9 +51,31 @@ def get_db():
         db.close()
 
 
+@contextmanager
+def session_scope(db: Optional[Session] = None) -> Iterator[Session]:
+    """
+    Unit of work for services: commit on success, roll back on error
+    
+    Pass the caller's session to join it; the caller still owns closing it.
+    Without one, a short-lived session is opened and always closed. Objects
+    stay readable after the block (expire_on_commit is off) but can no
+    longer lazy-load relationships.
+    """
+    session = db or SessionLocal(expire_on_commit=False)
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        if db is None:
+            session.close()
+
+
 async def get_async_db():
     """Dependency to get async database session"""
-    async with AsyncSessionLocal() as session:
+    async with get_async_session_factory()() as session:
         try:
             yield session
         finally:
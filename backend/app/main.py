@@ -1,16 +1,33 @@
 from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from .routers import auth, users, ai_content
-from .database import engine, Base
 from .models import *
+from .config import settings
+from .database import engine, ping
+from .services.generation_jobs import generation_job_queue
+from .services.provider_registry import provider_registry
+from .services.script_cache import script_cache
+from .services.resilience import deadline_scope
+from .services.query_profiler import query_profiler
+from .services.metrics import (
+    metrics,
+    instrument_engine,
+    http_requests,
+    http_request_seconds,
+    http_in_progress,
+    stream_bytes,
+    stream_requests
+)
+import asyncio
 import os
 import re
+import time
 from pathlib import Path
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Database tables are created by `python migrate.py`, not at import
 
 app = FastAPI(
     title="EduTok AI Content API",
@@ -27,8 +44,114 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for uploads (non-video files)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+
+@app.middleware("http")
+async def ai_request_deadline(request: Request, call_next):
+    """Bound the AI provider calls a request makes by its time budget"""
+    try:
+        seconds = float(request.headers.get("x-request-timeout", settings.ai_request_deadline_seconds))
+    except ValueError:
+        seconds = settings.ai_request_deadline_seconds
+    with deadline_scope(seconds):
+        return await call_next(request)
+
+
+if settings.metrics_enabled:
+    instrument_engine(engine)
+if settings.sql_profiler_enabled:
+    query_profiler.install(engine)
+
+
+def _route_template(request: Request) -> str:
+    """Route the request matched, e.g. /videos/{video_id}, so each video isn't its own series"""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    if request.scope.get("root_path"):
+        # Mounted app such as /uploads
+        return f"{request.scope['root_path']}/{{path}}"
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them to response headers, per route template"""
+    if not settings.metrics_enabled:
+        return await call_next(request)
+    started = time.perf_counter()
+    status = 500
+    http_in_progress.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_in_progress.dec()
+        route = _route_template(request)
+        http_request_seconds.observe(time.perf_counter() - started, method=request.method, route=route)
+        http_requests.inc(method=request.method, route=route, status=status)
+
+
+@app.middleware("http")
+async def profile_sql(request: Request, call_next):
+    """Profile the SQL a request runs; flags N+1 patterns and adds Server-Timing in debug mode"""
+    if not settings.sql_profiler_enabled:
+        return await call_next(request)
+    with query_profiler.profile(f"{request.method} {request.url.path}") as profile:
+        response = await call_next(request)
+        profile.label = f"{request.method} {_route_template(request)}"
+    if settings.debug:
+        response.headers.append("Server-Timing", profile.server_timing())
+    return response
+
+
+# Optionally process queued generation jobs inside the API process.
+# Production deployments run dedicated `python worker.py` processes instead.
+_worker_stop = asyncio.Event()
+_worker_task = None
+
+# Provider health is probed in the background so status reads never wait on the network
+_health_probe_stop = asyncio.Event()
+_health_probe_task = None
+
+
+@app.on_event("startup")
+async def start_inline_worker():
+    global _worker_task
+    if settings.job_inline_worker and settings.job_broker == "database":
+        _worker_stop.clear()
+        _worker_task = asyncio.create_task(generation_job_queue.run_worker(stop_event=_worker_stop))
+
+
+@app.on_event("shutdown")
+async def stop_inline_worker():
+    if _worker_task:
+        _worker_stop.set()
+        await _worker_task
+
+
+@app.on_event("startup")
+async def start_health_probes():
+    global _health_probe_task
+    if settings.ai_health_probe_interval_seconds > 0:
+        _health_probe_stop.clear()
+        _health_probe_task = asyncio.create_task(provider_registry.run_health_probes(_health_probe_stop))
+
+
+@app.on_event("shutdown")
+async def close_ai_clients():
+    if _health_probe_task:
+        _health_probe_stop.set()
+        await _health_probe_task
+    await provider_registry.aclose()
+
+
+@app.on_event("shutdown")
+async def flush_script_cache_hits():
+    await run_in_threadpool(script_cache.flush_hits)
+
+# Mount static files for uploads (non-video files); the directory is created on first upload
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
 
 # Custom video streaming endpoint with range request support
 @app.get("/data/{filename}")
@@ -71,6 +194,7 @@ async def stream_video(filename: str, request: Request):
                         if not chunk:
                             break
                         remaining -= len(chunk)
+                        stream_bytes.inc(len(chunk))
                         yield chunk
             
             headers = {
@@ -80,6 +204,7 @@ async def stream_video(filename: str, request: Request):
                 'Content-Type': 'video/mp4',
             }
             
+            stream_requests.inc(kind="range")
             return StreamingResponse(
                 iter_file(),
                 status_code=206,
@@ -90,6 +215,7 @@ async def stream_video(filename: str, request: Request):
     def iter_entire_file():
         with open(file_path, 'rb') as file:
             while chunk := file.read(8192):
+                stream_bytes.inc(len(chunk))
                 yield chunk
     
     headers = {
@@ -98,6 +224,7 @@ async def stream_video(filename: str, request: Request):
         'Content-Type': 'video/mp4',
     }
     
+    stream_requests.inc(kind="full")
     return StreamingResponse(
         iter_entire_file(),
         headers=headers
@@ -116,4 +243,28 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: the database must answer within READY_MAX_DB_LATENCY_MS
+    """
+    try:
+        seconds = await run_in_threadpool(ping)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "error": str(e)[:200]})
+    
+    db_ms = round(seconds * 1000, 1)
+    if db_ms > settings.ready_max_db_latency_ms:
+        return JSONResponse(status_code=503, content={"status": "degraded", "db_ms": db_ms})
+    return {"status": "ready", "db_ms": db_ms}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of this process's metrics"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,6 +1,12 @@
 from .user import User
 from .video import Video, VideoCategory, VideoDifficulty, ContentSource, GenerationStatus
 from .creator import Creator
+from .storage import StorageUsage
+from .job import GenerationJob, GenerationJobItem, GenerationJobItemDependency, JobStatus
+from .cache import ScriptCacheEntry
+from .idempotency import IdempotencyRecord, IdempotencyStatus
+from .dedup import ScriptSignature, ScriptLSHBucket
+from .curriculum import LearningPath, LearningPathItem
 
 __all__ = [
     "User",
@@ -9,5 +15,17 @@ __all__ = [
     "VideoDifficulty",
     "ContentSource",
     "GenerationStatus",
-    "Creator"
+    "Creator",
+    "StorageUsage",
+    "GenerationJob",
+    "GenerationJobItem",
+    "GenerationJobItemDependency",
+    "JobStatus",
+    "ScriptCacheEntry",
+    "IdempotencyRecord",
+    "IdempotencyStatus",
+    "ScriptSignature",
+    "ScriptLSHBucket",
+    "LearningPath",
+    "LearningPathItem"
 ] 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class ScriptCacheEntry(Base):
+    """Generated script cached by a hash of its normalized request parameters"""
+    __tablename__ = "script_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)
+    topic = Column(String(255))  # Normalized topic, for inspection only
+    payload = Column(JSON, nullable=False)  # Result of generate_video_script
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), index=True)
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Enum
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+from .video import VideoCategory, VideoDifficulty
+from .job import JobStatus
+
+
+class LearningPath(Base):
+    """A generated course: subtopics of a subject in prerequisite order"""
+    __tablename__ = "learning_paths"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    creator_id = Column(Integer, ForeignKey("creators.id"), nullable=False)
+    subject = Column(String(255), nullable=False)
+    category = Column(Enum(VideoCategory), nullable=False)
+    min_difficulty = Column(Enum(VideoDifficulty), nullable=False)
+    max_difficulty = Column(Enum(VideoDifficulty), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    generation_metadata = Column(JSON)  # Planner model, stage timings and critical path
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    items = relationship("LearningPathItem", back_populates="path", order_by="LearningPathItem.position")
+
+
+class LearningPathItem(Base):
+    """One subtopic of a learning path and the video generated for it"""
+    __tablename__ = "learning_path_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path_id = Column(Integer, ForeignKey("learning_paths.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # Every prerequisite comes at an earlier position
+    topic = Column(String(255), nullable=False)
+    difficulty = Column(Enum(VideoDifficulty), nullable=False)
+    prerequisites = Column(JSON, default=list)  # Positions of the items this one builds on
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    last_error = Column(Text)
+    video_id = Column(Integer, ForeignKey("videos.id"))
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    path = relationship("LearningPath", back_populates="items")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class ScriptSignature(Base):
+    """MinHash signature of a video's script, for near-duplicate detection"""
+    __tablename__ = "script_signatures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), unique=True, nullable=False)
+    signature = Column(JSON, nullable=False)  # DEDUP_NUM_PERM minimum hash values
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ScriptLSHBucket(Base):
+    """One LSH band of a script signature; scripts sharing any bucket are candidates"""
+    __tablename__ = "script_lsh_buckets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket = Column(String(40), nullable=False, index=True)  # "<band>:<hash of the band's rows>"
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
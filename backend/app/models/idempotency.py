@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from enum import Enum as PyEnum
+from ..database import Base
+
+
+class IdempotencyStatus(str, PyEnum):
+    IN_PROGRESS = "in-progress"
+    COMPLETED = "completed"
+
+
+class IdempotencyRecord(Base):
+    """Outcome of a write request sent with an Idempotency-Key header"""
+    __tablename__ = "idempotency_records"
+    __table_args__ = (UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_user_endpoint_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    endpoint = Column(String(100), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # Hash of the request parameters
+    status = Column(Enum(IdempotencyStatus), default=IdempotencyStatus.IN_PROGRESS, nullable=False)
+    response = Column(JSON)  # Response body, once completed
+    locked_until = Column(DateTime(timezone=True))  # Abandoned if still in progress after this
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), index=True)
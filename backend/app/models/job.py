@@ -0,0 +1,68 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from enum import Enum as PyEnum
+from ..database import Base
+from .video import VideoCategory, VideoDifficulty
+
+
+class JobStatus(str, PyEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"  # Job finished, but some items ended in the dead-letter state
+    DEAD_LETTER = "dead-letter"  # Item exhausted its retries
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    creator_id = Column(Integer, ForeignKey("creators.id"), nullable=False)
+    category = Column(Enum(VideoCategory), nullable=False)
+    difficulty = Column(Enum(VideoDifficulty), nullable=False)
+    path_id = Column(Integer, ForeignKey("learning_paths.id"), index=True)  # Set when the job generates a course
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    total_items = Column(Integer, default=0)
+    completed_items = Column(Integer, default=0)
+    failed_items = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    items = relationship("GenerationJobItem", back_populates="job", order_by="GenerationJobItem.id")
+
+
+class GenerationJobItem(Base):
+    """One topic of a generation job; the unit that workers claim and retry"""
+    __tablename__ = "generation_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id"), nullable=False, index=True)
+    topic = Column(String(255), nullable=False)
+    difficulty = Column(Enum(VideoDifficulty))  # Overrides the job's difficulty
+    path_item_id = Column(Integer, ForeignKey("learning_path_items.id"))  # Course subtopic this item generates
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    locked_by = Column(String(100))  # Worker id holding the lease
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    video_id = Column(Integer, ForeignKey("videos.id"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    job = relationship("GenerationJob", back_populates="items")
+
+
+class GenerationJobItemDependency(Base):
+    """An item can only be claimed once the item it depends on has finished"""
+    __tablename__ = "generation_job_item_dependencies"
+
+    item_id = Column(Integer, ForeignKey("generation_job_items.id"), primary_key=True)
+    depends_on_id = Column(Integer, ForeignKey("generation_job_items.id"), primary_key=True, index=True)
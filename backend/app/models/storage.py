@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class StorageUsage(Base):
+    """Running storage ledger for uploaded files, one row per creator and extension"""
+    __tablename__ = "storage_usage"
+    __table_args__ = (
+        UniqueConstraint("creator_id", "extension", name="uq_storage_usage_creator_extension"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    creator_id = Column(Integer, ForeignKey("creators.id"), nullable=False, index=True)
+    extension = Column(String(10), nullable=False)  # e.g. '.mp4'
+    file_count = Column(Integer, default=0, nullable=False)
+    total_bytes = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
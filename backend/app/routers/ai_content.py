@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import json
+import asyncio
+from ..database import get_db, SessionLocal
 from ..services.ai_content_generator import ai_content_generator
+from ..services.ai_services import ai_service_manager
 from ..services.video_upload import video_upload_service
+from ..services.generation_jobs import generation_job_queue
+from ..services.script_cache import script_cache, CacheMode
+from ..services.progress_bus import progress_bus, ProgressReporter
+from ..services.priority_scheduler import Lane, priority_scope
+from ..services.idempotency import idempotency_store, hash_upload
+from ..services.near_duplicates import near_duplicate_index, NearDuplicateError
+from ..services.curriculum import curriculum_generator
 from ..models.video import Video, VideoCategory, VideoDifficulty, ContentSource, GenerationStatus
+from ..models.job import GenerationJobItem, JobStatus
 from ..schemas.video import VideoResponse, VideoList
+from ..schemas.job import GenerationJobResponse
+from ..schemas.curriculum import LearningPathResponse
 from ..auth import get_current_user
 from ..models.user import User
 
 router = APIRouter(tags=["Videos"])
 
 
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
 @router.get("/", response_model=VideoList)
 async def get_videos(
     skip: int = 0,
@@ -43,7 +63,8 @@ async def get_videos(
     query = query.order_by(Video.created_at.desc())
     
     total = query.count()
-    videos = query.offset(skip).limit(limit).all()
+    # Load creators in the same query; reading video.creator per row would be an N+1
+    videos = query.options(joinedload(Video.creator)).offset(skip).limit(limit).all()
     
     # Convert to response format manually to handle missing user data
     video_responses = []
@@ -182,7 +203,8 @@ async def get_videos_by_category(
         )
     )
     total = query.count()
-    videos = query.offset(skip).limit(limit).all()
+    # Load creators in the same query; reading video.creator per row would be an N+1
+    videos = query.options(joinedload(Video.creator)).offset(skip).limit(limit).all()
     
     # Convert to response format manually to handle missing user data
     video_responses = []
@@ -265,7 +287,8 @@ async def search_videos(
     )
     
     total = query.count()
-    videos = query.offset(skip).limit(limit).all()
+    # Load creators in the same query; reading video.creator per row would be an N+1
+    videos = query.options(joinedload(Video.creator)).offset(skip).limit(limit).all()
     
     # Convert to response format manually to handle missing user data
     video_responses = []
@@ -330,26 +353,33 @@ async def generate_video_script(
     target_audience: str = "beginners",
     duration_minutes: int = 3,
     style: str = "engaging and educational",
+    cache: CacheMode = CacheMode.USE,
     current_user: User = Depends(get_current_user)
 ):
     """
     Generate an educational video script using AI
+    
+    Identical requests are served from the script cache; pass cache=bypass
+    to skip it or cache=refresh to regenerate and overwrite the entry.
     """
     try:
-        result = await ai_content_generator.generate_video_script(
-            topic=topic,
-            category=category,
-            difficulty=difficulty,
-            target_audience=target_audience,
-            duration_minutes=duration_minutes,
-            style=style
-        )
+        with priority_scope(Lane.INTERACTIVE, user_id=current_user.id):
+            result = await ai_content_generator.generate_video_script(
+                topic=topic,
+                category=category,
+                difficulty=difficulty,
+                target_audience=target_audience,
+                duration_minutes=duration_minutes,
+                style=style,
+                cache=cache
+            )
         
         return {
             "success": True,
             "script": result["script"],
             "metadata": result["metadata"],
-            "ai_tools_used": result.get("ai_tools_used", [])
+            "ai_tools_used": result.get("ai_tools_used", []),
+            "cache_status": result.get("cache_status")
         }
         
     except Exception as e:
@@ -381,93 +411,179 @@ async def generate_video_script(
         raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
 
 
+@router.post("/ai/generate-script/stream")
+async def stream_video_script(
+    topic: str,
+    category: VideoCategory,
+    difficulty: VideoDifficulty,
+    target_audience: str = "beginners",
+    duration_minutes: int = 3,
+    style: str = "engaging and educational",
+    cache: CacheMode = CacheMode.USE,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream an educational video script as Server-Sent Events
+    
+    Emits `token` events with model output as it arrives, an optional
+    `fallback` event if the provider fails mid-stream, and a final `done`
+    event with the same payload as /ai/generate-script.
+    """
+    async def event_stream():
+        # Set here: the stream runs after the endpoint has returned
+        with priority_scope(Lane.INTERACTIVE, user_id=current_user.id):
+            async for event, data in ai_content_generator.stream_video_script(
+                topic=topic,
+                category=category,
+                difficulty=difficulty,
+                target_audience=target_audience,
+                duration_minutes=duration_minutes,
+                style=style,
+                cache=cache
+            ):
+                if event == "token":
+                    payload = {"text": data}
+                elif event == "fallback":
+                    payload = {"reason": data}
+                else:
+                    payload = {
+                        "success": True,
+                        "script": data["script"],
+                        "metadata": data["metadata"],
+                        "ai_tools_used": data.get("ai_tools_used", []),
+                        "cache_status": data.get("cache_status")
+                    }
+                
+                yield _sse(event, payload)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/ai/create-video")
 async def create_video_from_script(
     script: str,
     title: str,
     category: VideoCategory,
     difficulty: VideoDifficulty,
+    response: Response,
     voice_settings: Dict[str, Any] = None,
     visual_style: str = "modern and clean",
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    generation_id: Optional[str] = Header(None, alias="X-Generation-Id", max_length=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Create a video from generated script
+    
+    Send an Idempotency-Key header to make retries safe: a repeated key
+    returns the stored response instead of generating the video again.
+    
+    The video only exists once it is generated, so to follow progress pick
+    an ID of your own (a UUID), send it as the X-Generation-Id header and
+    subscribe to GET /ai/generations/{generation_id}/events.
     """
-    try:
-        # Get or create creator for the current user
-        from ..models.creator import Creator
-        creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
-        
-        if not creator:
-            # Create a creator for the user
-            creator = Creator(
-                name=current_user.username or "AI Content Creator",
-                username=current_user.username or f"ai_creator_{current_user.id}",
-                bio="AI-powered educational content creator",
-                avatar_url="https://example.com/ai-creator-avatar.jpg",
-                user_id=current_user.id,
-                verified=True
-            )
-            db.add(creator)
-            db.commit()
-            db.refresh(creator)
-        
-        video = await ai_content_generator.create_video_from_script(
-            script=script,
-            title=title,
-            category=category,
-            difficulty=difficulty,
-            creator_id=creator.id,
-            voice_settings=voice_settings,
-            visual_style=visual_style
-        )
-        
-        # Create a safe creator info
-        creator_info = {
-            "id": video.creator.id,
-            "name": video.creator.name,
-            "username": video.creator.username or video.creator.name,
-            "avatar_url": video.creator.avatar_url,
-            "verified": video.creator.verified
-        }
-        
-        # Create video response manually
-        video_response = {
-            "id": video.id,
-            "title": video.title,
-            "description": video.description,
-            "video_url": video.video_url,
-            "thumbnail_url": video.thumbnail_url,
-            "duration": video.duration,
-            "views": video.views,
-            "likes": video.likes,
-            "category": video.category,
-            "difficulty": video.difficulty,
-            "tags": video.tags,
-            "source": video.source,
-            "source_id": video.source_id,
-            "is_educational": video.is_educational,
-            "is_verified": video.is_verified,
-            "content_source": video.content_source,
-            "generation_status": video.generation_status,
-            "ai_prompt": video.ai_prompt,
-            "ai_tools_used": video.ai_tools_used,
-            "generation_metadata": video.generation_metadata,
-            "script_content": video.script_content,
-            "voice_settings": video.voice_settings,
-            "visual_style": video.visual_style,
-            "target_audience": video.target_audience,
-            "creator": creator_info,
-            "created_at": video.created_at,
-            "updated_at": video.updated_at
-        }
-        
-        return video_response
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error creating video: {str(e)}")
+    channels = [_generation_channel(current_user.id, generation_id)] if generation_id else []
+    progress = ProgressReporter(channels, generation_id=generation_id)
+    
+    async def create():
+        try:
+            # Get or create creator for the current user
+            from ..models.creator import Creator
+            creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
+            
+            if not creator:
+                # Create a creator for the user
+                creator = Creator(
+                    name=current_user.username or "AI Content Creator",
+                    username=current_user.username or f"ai_creator_{current_user.id}",
+                    bio="AI-powered educational content creator",
+                    avatar_url="https://example.com/ai-creator-avatar.jpg",
+                    user_id=current_user.id,
+                    verified=True
+                )
+                db.add(creator)
+                db.commit()
+                db.refresh(creator)
+            
+            with priority_scope(Lane.INTERACTIVE, user_id=current_user.id):
+                video = await ai_content_generator.create_video_from_script(
+                    script=script,
+                    title=title,
+                    category=category,
+                    difficulty=difficulty,
+                    creator_id=creator.id,
+                    voice_settings=voice_settings,
+                    visual_style=visual_style,
+                    progress=progress,
+                    db=db
+                )
+            
+            # Create a safe creator info
+            creator_info = {
+                "id": video.creator.id,
+                "name": video.creator.name,
+                "username": video.creator.username or video.creator.name,
+                "avatar_url": video.creator.avatar_url,
+                "verified": video.creator.verified
+            }
+            
+            # Create video response manually
+            video_response = {
+                "id": video.id,
+                "title": video.title,
+                "description": video.description,
+                "video_url": video.video_url,
+                "thumbnail_url": video.thumbnail_url,
+                "duration": video.duration,
+                "views": video.views,
+                "likes": video.likes,
+                "category": video.category,
+                "difficulty": video.difficulty,
+                "tags": video.tags,
+                "source": video.source,
+                "source_id": video.source_id,
+                "is_educational": video.is_educational,
+                "is_verified": video.is_verified,
+                "content_source": video.content_source,
+                "generation_status": video.generation_status,
+                "ai_prompt": video.ai_prompt,
+                "ai_tools_used": video.ai_tools_used,
+                "generation_metadata": video.generation_metadata,
+                "script_content": video.script_content,
+                "voice_settings": video.voice_settings,
+                "visual_style": video.visual_style,
+                "target_audience": video.target_audience,
+                "creator": creator_info,
+                "created_at": video.created_at,
+                "updated_at": video.updated_at
+            }
+            
+            return video_response
+            
+        except NearDuplicateError as e:
+            await progress.stage("failed", percent=100, error=str(e))
+            # Retrying once the other generation finishes returns that video
+            raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "30"})
+        except HTTPException:
+            raise
+        except Exception as e:
+            await progress.stage("failed", percent=100, error=str(e))
+            raise HTTPException(status_code=500, detail=f"Error creating video: {str(e)}")
+    
+    fingerprint = idempotency_store.fingerprint("create-video", {
+        "script": script,
+        "title": title,
+        "category": category,
+        "difficulty": difficulty,
+        "voice_settings": voice_settings,
+        "visual_style": visual_style
+    })
+    return await idempotency_store.run(current_user.id, "create-video", idempotency_key, fingerprint, create, response)
 
 
 @router.post("/ai/generate-batch")
@@ -475,50 +591,269 @@ async def generate_content_batch(
     topics: List[str],
     category: VideoCategory,
     difficulty: VideoDifficulty,
-    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Generate multiple videos in a batch (runs in background)
+    Generate multiple videos in a batch (queued for generation workers)
+    
+    A repeated Idempotency-Key returns the original job instead of queueing
+    the topics again.
     """
-    try:
-        # Get or create creator for the current user
-        from ..models.creator import Creator
-        creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
-        
-        if not creator:
-            creator = Creator(
-                name=current_user.username or "AI Content Creator",
-                username=current_user.username or f"ai_creator_{current_user.id}",
-                bio="AI-powered educational content creator",
-                avatar_url="https://example.com/ai-creator-avatar.jpg",
-                user_id=current_user.id,
-                verified=True
+    async def enqueue():
+        try:
+            # Get or create creator for the current user
+            from ..models.creator import Creator
+            creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
+            
+            if not creator:
+                creator = Creator(
+                    name=current_user.username or "AI Content Creator",
+                    username=current_user.username or f"ai_creator_{current_user.id}",
+                    bio="AI-powered educational content creator",
+                    avatar_url="https://example.com/ai-creator-avatar.jpg",
+                    user_id=current_user.id,
+                    verified=True
+                )
+                db.add(creator)
+                db.commit()
+                db.refresh(creator)
+            
+            # Persist the batch so workers can pick it up
+            job = generation_job_queue.enqueue_batch(
+                db,
+                topics=topics,
+                category=category,
+                difficulty=difficulty,
+                creator_id=creator.id,
+                user_id=current_user.id
             )
-            db.add(creator)
-            db.commit()
-            db.refresh(creator)
-        
-        # Add batch generation to background tasks
-        background_tasks.add_task(
-            ai_content_generator.generate_content_batch,
-            topics=topics,
-            category=category,
-            difficulty=difficulty,
-            creator_id=creator.id
-        )
-        
-        return {
-            "success": True,
-            "message": f"Started generating {len(topics)} videos in background",
-            "topics": topics,
-            "category": category.value,
-            "difficulty": difficulty.value
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error starting batch generation: {str(e)}")
+            
+            return {
+                "success": True,
+                "message": f"Queued {len(topics)} videos for generation",
+                "job_id": job.id,
+                "topics": topics,
+                "category": category.value,
+                "difficulty": difficulty.value
+            }
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error starting batch generation: {str(e)}")
+    
+    fingerprint = idempotency_store.fingerprint("generate-batch", {
+        "topics": topics,
+        "category": category,
+        "difficulty": difficulty
+    })
+    return await idempotency_store.run(current_user.id, "generate-batch", idempotency_key, fingerprint, enqueue, response)
+
+
+@router.get("/ai/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a batch generation job with per-topic status
+    """
+    job = generation_job_queue.get_job(db, job_id)
+    
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+
+@router.get("/ai/jobs/{job_id}/events")
+async def stream_generation_job_events(
+    job_id: int,
+    item_id: int = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream generation progress of a batch job as Server-Sent Events
+    
+    Sends a `snapshot` of every item first, then a `progress` event for each
+    stage transition (script, voice, video, persisted) with the item and
+    overall job percentage, and `done` once every item has finished. Pass
+    item_id to follow a single topic.
+    """
+    job = generation_job_queue.get_job(db, job_id)
+    
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    finished = {JobStatus.COMPLETED, JobStatus.DEAD_LETTER}
+    
+    async def event_stream():
+        # Subscribe before reading the snapshot so no transition is missed
+        async with progress_bus.subscribe(f"job:{job_id}") as queue:
+            snapshot_db = SessionLocal()
+            try:
+                items = snapshot_db.query(GenerationJobItem).filter(GenerationJobItem.job_id == job_id).all()
+                percents = {
+                    item.id: 100 if item.status in finished else 0
+                    for item in items
+                    if item_id is None or item.id == item_id
+                }
+                snapshot = [
+                    {"item_id": item.id, "topic": item.topic, "status": item.status.value, "video_id": item.video_id}
+                    for item in items
+                    if item.id in percents
+                ]
+            finally:
+                snapshot_db.close()
+            
+            def job_percent() -> float:
+                return round(sum(percents.values()) / len(percents), 1) if percents else 100.0
+            
+            yield _sse("snapshot", {"job_id": job_id, "items": snapshot, "job_percent": job_percent()})
+            
+            while percents and min(percents.values()) < 100:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                if event.get("item_id") not in percents:
+                    continue
+                
+                percents[event["item_id"]] = event["percent"]
+                yield _sse("progress", {**event, "job_percent": job_percent()})
+            
+            yield _sse("done", {"job_id": job_id, "job_percent": job_percent()})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/ai/jobs/{job_id}/retry")
+async def retry_generation_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Requeue the dead-lettered topics of a batch generation job
+    """
+    job = generation_job_queue.get_job(db, job_id)
+    
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    requeued = generation_job_queue.retry_dead_letter(db, job_id)
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "requeued": requeued
+    }
+
+
+@router.post("/ai/curriculum")
+async def generate_curriculum(
+    subject: str,
+    category: VideoCategory,
+    response: Response,
+    min_difficulty: VideoDifficulty = VideoDifficulty.BEGINNER,
+    max_difficulty: VideoDifficulty = VideoDifficulty.ADVANCED,
+    max_topics: Optional[int] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Plan a course on a subject and generate all of its videos
+    
+    The subject is broken into subtopics with prerequisites, persisted as a
+    learning path and returned right away; the videos are queued as a
+    generation job, each subtopic becoming claimable once the ones it builds
+    on have finished. Follow progress with GET /ai/curricula/{path_id} or
+    stream it from GET /ai/jobs/{job_id}/events.
+    """
+    levels = list(VideoDifficulty)
+    if levels.index(min_difficulty) > levels.index(max_difficulty):
+        raise HTTPException(status_code=400, detail="min_difficulty must not be harder than max_difficulty")
+    if max_topics is not None and max_topics < 1:
+        raise HTTPException(status_code=400, detail="max_topics must be at least 1")
+    
+    async def plan():
+        try:
+            # Get or create creator for the current user
+            from ..models.creator import Creator
+            creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
+            
+            if not creator:
+                creator = Creator(
+                    name=current_user.username or "AI Content Creator",
+                    username=current_user.username or f"ai_creator_{current_user.id}",
+                    bio="AI-powered educational content creator",
+                    avatar_url="https://example.com/ai-creator-avatar.jpg",
+                    user_id=current_user.id,
+                    verified=True
+                )
+                db.add(creator)
+                db.commit()
+                db.refresh(creator)
+            
+            # The user waits for the plan, so planning is interactive; the videos go through the batch lane
+            with priority_scope(Lane.INTERACTIVE, user_id=current_user.id):
+                path = await curriculum_generator.create_path(
+                    db,
+                    user_id=current_user.id,
+                    creator_id=creator.id,
+                    subject=subject,
+                    category=category,
+                    min_difficulty=min_difficulty,
+                    max_difficulty=max_difficulty,
+                    max_topics=max_topics
+                )
+            job = curriculum_generator.start(db, path)
+            
+            return {
+                "success": True,
+                "message": f"Generating {len(path.items)} videos on {subject}",
+                "job_id": job.id,
+                "path": LearningPathResponse.model_validate(path).model_dump(mode="json")
+            }
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error starting curriculum generation: {str(e)}")
+    
+    fingerprint = idempotency_store.fingerprint("curriculum", {
+        "subject": subject,
+        "category": category,
+        "min_difficulty": min_difficulty,
+        "max_difficulty": max_difficulty,
+        "max_topics": max_topics
+    })
+    return await idempotency_store.run(current_user.id, "curriculum", idempotency_key, fingerprint, plan, response)
+
+
+@router.get("/ai/curricula/{path_id}", response_model=LearningPathResponse)
+async def get_curriculum(
+    path_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a learning path with the status and video of each subtopic, in learning order
+    """
+    path = curriculum_generator.get_path(db, path_id)
+    
+    if not path or path.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Learning path not found")
+    
+    return path
 
 
 @router.get("/ai/generation-status/{video_id}")
@@ -545,6 +880,104 @@ async def get_generation_status(
     }
 
 
+def _generation_channel(user_id: int, generation_id: str) -> str:
+    """Progress channel of a create-video call, scoped to the user who made it"""
+    return f"generation:{user_id}:{generation_id}"
+
+
+@router.get("/ai/generations/{generation_id}/events")
+async def stream_generation_request_events(
+    generation_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream progress of a create-video call as Server-Sent Events
+    
+    generation_id is the X-Generation-Id header sent with POST
+    /ai/create-video; subscribe before or while it runs. Sends a `progress`
+    event per stage (voice, video, persisted with the video_id, or failed)
+    and `done` at the end. Subscribing after the call ended replays its last
+    event. When the API runs as several processes, this needs
+    PROGRESS_BUS_BACKEND=redis to see progress made in another process.
+    """
+    channel = _generation_channel(current_user.id, generation_id)
+    
+    async def event_stream():
+        # Subscribe before reading the last event so no transition is missed
+        async with progress_bus.subscribe(channel) as queue:
+            event = await progress_bus.last_event(channel)
+            while True:
+                if event is not None:
+                    yield _sse("progress", event)
+                    if event["percent"] >= 100:
+                        yield _sse("done", {
+                            "generation_id": generation_id,
+                            "stage": event["stage"],
+                            "video_id": event.get("video_id")
+                        })
+                        return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    event = None
+                    yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/ai/generation-events/{video_id}")
+async def stream_generation_events(
+    video_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream generation progress of a single video as Server-Sent Events
+    
+    Push-based alternative to polling /ai/generation-status/{video_id}.
+    Videos generated through the job queue or create-video are stored once
+    they are finished, so this mostly reports `done`; follow those with
+    /ai/jobs/{job_id}/events or /ai/generations/{generation_id}/events.
+    """
+    if not db.query(Video.id).filter(Video.id == video_id).first():
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    async def event_stream():
+        # Subscribe before reading the status so no transition is missed
+        async with progress_bus.subscribe(f"video:{video_id}") as queue:
+            status_db = SessionLocal()
+            try:
+                status = status_db.query(Video.generation_status).filter(Video.id == video_id).scalar()
+            finally:
+                status_db.close()
+            
+            if status in (GenerationStatus.COMPLETED, GenerationStatus.FAILED):
+                yield _sse("done", {"video_id": video_id, "generation_status": status.value, "percent": 100})
+                return
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                yield _sse("progress", event)
+                if event["percent"] >= 100:
+                    yield _sse("done", {"video_id": video_id, "percent": 100})
+                    return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/ai/generated")
 async def get_ai_generated_videos(
     skip: int = 0,
@@ -564,7 +997,8 @@ async def get_ai_generated_videos(
     if difficulty:
         query = query.filter(Video.difficulty == difficulty)
     
-    videos = query.offset(skip).limit(limit).all()
+    # Load creators in the same query; reading video.creator per row would be an N+1
+    videos = query.options(joinedload(Video.creator)).offset(skip).limit(limit).all()
     
     # Convert to response format manually to handle missing user data
     video_responses = []
@@ -615,6 +1049,7 @@ async def get_ai_generated_videos(
 
 @router.post("/upload")
 async def upload_video(
+    response: Response,
     file: UploadFile = File(...),
     title: str = Form(...),
     description: str = Form(...),
@@ -622,78 +1057,147 @@ async def upload_video(
     difficulty: VideoDifficulty = Form(...),
     tags: str = Form(None),
     is_educational: bool = Form(True),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Upload a video file
+    
+    A repeated Idempotency-Key returns the stored video instead of storing
+    the file again.
     """
-    try:
-        # Get or create creator for the current user
-        from ..models.creator import Creator
-        creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
-        
-        if not creator:
-            creator = Creator(
-                name=current_user.username or "Video Creator",
-                username=current_user.username or f"creator_{current_user.id}",
-                bio="Educational content creator",
-                avatar_url="https://example.com/creator-avatar.jpg",
-                user_id=current_user.id,
-                verified=True
+    async def upload():
+        try:
+            # Get or create creator for the current user
+            from ..models.creator import Creator
+            creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
+            
+            if not creator:
+                creator = Creator(
+                    name=current_user.username or "Video Creator",
+                    username=current_user.username or f"creator_{current_user.id}",
+                    bio="Educational content creator",
+                    avatar_url="https://example.com/creator-avatar.jpg",
+                    user_id=current_user.id,
+                    verified=True
+                )
+                db.add(creator)
+                db.commit()
+                db.refresh(creator)
+            
+            # Upload video
+            video = await video_upload_service.upload_video(
+                file=file,
+                title=title,
+                description=description,
+                category=category,
+                difficulty=difficulty,
+                creator_id=creator.id,
+                tags=tags,
+                is_educational=is_educational,
+                db=db
             )
-            db.add(creator)
-            db.commit()
-            db.refresh(creator)
-        
-        # Upload video
-        video = await video_upload_service.upload_video(
-            file=file,
-            title=title,
-            description=description,
-            category=category,
-            difficulty=difficulty,
-            creator_id=creator.id,
-            tags=tags,
-            is_educational=is_educational
-        )
-        
-        return VideoResponse.from_orm(video)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
+            
+            return VideoResponse.from_orm(video)
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
+    
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = idempotency_store.fingerprint("upload", {
+            "title": title,
+            "description": description,
+            "category": category,
+            "difficulty": difficulty,
+            "tags": tags,
+            "is_educational": is_educational,
+            "filename": file.filename,
+            "content_sha256": await hash_upload(file)
+        })
+    return await idempotency_store.run(current_user.id, "upload", idempotency_key, fingerprint, upload, response)
 
 
 @router.get("/upload/stats")
-async def get_upload_stats():
+async def get_upload_stats(db: Session = Depends(get_db)):
     """
-    Get upload directory statistics
+    Get upload statistics from the storage ledger
     """
-    return video_upload_service.get_upload_stats()
+    return video_upload_service.get_upload_stats(db)
 
 
-@router.get("/ai/service-status")
-async def get_ai_service_status():
+@router.get("/upload/usage")
+async def get_upload_usage(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
-    Get the status of AI services
+    Get storage usage and remaining quota for the current user
+    """
+    from ..models.creator import Creator
+    creator = db.query(Creator).filter(Creator.user_id == current_user.id).first()
+    
+    if not creator:
+        return {
+            "creator_id": None,
+            "video_count": 0,
+            "total_bytes": 0,
+            "by_extension": {},
+            "quota_mb": None,
+            "remaining_bytes": None
+        }
+    
+    return video_upload_service.get_creator_usage(db, creator.id)
+
+
+@router.delete("/upload/{video_id}")
+async def delete_uploaded_video(
+    video_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
-    from ..services.ai_services import AIServiceManager
+    Delete an uploaded video owned by the current user
+    """
+    from ..models.creator import Creator
+    video = db.query(Video).join(Creator).filter(
+        Video.id == video_id,
+        Video.content_source == ContentSource.UPLOADED,
+        Creator.user_id == current_user.id
+    ).first()
     
-    ai_manager = AIServiceManager()
-    status = ai_manager.get_service_status()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    video_upload_service.delete_video(db, video)
     
+    return {"message": "Video deleted successfully"}
+
+
+@router.get("/ai/service-status")
+async def get_ai_service_status(db: Session = Depends(get_db)):
+    """
+    Get the status of AI services
+    
+    Provider health comes from the periodic background probe, so this
+    endpoint makes no provider calls.
+    """
     return {
-        "services": status,
+        "services": ai_service_manager.get_service_status(),
+        "last_batch": generation_job_queue.last_batch_stats(db),
+        "idempotency": idempotency_store.get_stats(),
+        "near_duplicates": near_duplicate_index.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
+
+
+@router.get("/ai/cache-stats")
+async def get_script_cache_stats(db: Session = Depends(get_db)):
     """
-    Get status of all AI services
+    Get script cache size and hit ratio (counters are per process)
     """
-    return {
-        "chatgpt": False,
-        "elevenlabs": False,
-        "video_generation": "Manual upload required (AI services temporarily disabled)"
-    }
+    return script_cache.get_stats(db)
 
 
 @router.get("/ai/stats")
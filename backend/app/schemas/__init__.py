@@ -1,5 +1,6 @@
 from .user import UserCreate, UserUpdate, UserResponse, UserLogin
 from .video import VideoCreate, VideoUpdate, VideoResponse, VideoList, ScriptGenerationRequest, ScriptGenerationResponse, VideoCreationRequest, BatchGenerationRequest, GenerationStatusResponse, GenerationStatsResponse
+from .job import GenerationJobResponse, GenerationJobItemResponse
 
 __all__ = [
     "UserCreate",
@@ -15,5 +16,7 @@ __all__ = [
     "VideoCreationRequest",
     "BatchGenerationRequest",
     "GenerationStatusResponse",
-    "GenerationStatsResponse"
+    "GenerationStatsResponse",
+    "GenerationJobResponse",
+    "GenerationJobItemResponse"
 ] 
\ No newline at end of file
@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from ..models.video import VideoCategory, VideoDifficulty
+from ..models.job import JobStatus
+
+
+class LearningPathItemResponse(BaseModel):
+    id: int
+    position: int
+    topic: str
+    difficulty: VideoDifficulty
+    prerequisites: List[int] = []
+    status: JobStatus
+    last_error: Optional[str] = None
+    video_id: Optional[int] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class LearningPathResponse(BaseModel):
+    id: int
+    subject: str
+    category: VideoCategory
+    min_difficulty: VideoDifficulty
+    max_difficulty: VideoDifficulty
+    status: JobStatus
+    generation_metadata: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    items: List[LearningPathItemResponse]
+
+    class Config:
+        from_attributes = True
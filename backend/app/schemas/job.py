@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from ..models.video import VideoCategory, VideoDifficulty
+from ..models.job import JobStatus
+
+
+class GenerationJobItemResponse(BaseModel):
+    id: int
+    topic: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    video_id: Optional[int] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GenerationJobResponse(BaseModel):
+    id: int
+    status: JobStatus
+    category: VideoCategory
+    difficulty: VideoDifficulty
+    total_items: int
+    completed_items: int
+    failed_items: int
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    items: List[GenerationJobItemResponse]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,248 @@
+import re
+import json
+import asyncio
+import logging
+import importlib.util
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, AsyncIterator
+from ..config import settings
+
+# httpx is imported when the first client is built, keeping it off the import path
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ProviderAPIError(Exception):
+    """Non-2xx response from an AI provider"""
+
+    def __init__(self, provider: str, status_code: int, body: str, headers: Optional["httpx.Headers"] = None):
+        super().__init__(f"{provider} API error {status_code}: {body[:500]}")
+        self.provider = provider
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers if headers is not None else {}
+
+
+def _close_pool_sockets(client: "httpx.AsyncClient"):
+    """Close a client's pooled sockets without its event loop, which has already closed"""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    for connection in list(getattr(pool, "connections", [])):
+        stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+        sock = stream.get_extra_info("socket") if stream is not None else None
+        if sock is not None:
+            # asyncio hands out a TransportSocket wrapper, which has no close()
+            getattr(sock, "_sock", sock).close()
+
+
+class PooledProviderClient:
+    """
+    Base for AI provider clients sharing one keep-alive connection pool
+
+    Pooled connections cannot cross event loops, so there is one
+    httpx.AsyncClient per loop, created lazily (e.g. a Celery task calling
+    asyncio.run gets its own). Clients left behind by a closed loop have
+    their sockets closed when the next client is built.
+    """
+
+    provider = "provider"
+    health_path = "/models"
+
+    def __init__(self, base_url: str, headers: Dict[str, str]):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self._clients: Dict[asyncio.AbstractEventLoop, "httpx.AsyncClient"] = {}
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            self._discard_closed_loops()
+            client = self._clients[loop] = self._build_client()
+        return client
+
+    def _build_client(self) -> "httpx.AsyncClient":
+        import httpx
+        http2 = settings.ai_http2 and HTTP2_AVAILABLE
+        if settings.ai_http2 and not HTTP2_AVAILABLE:
+            logger.warning("⚠️ AI_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.ai_http_max_connections,
+                max_keepalive_connections=settings.ai_http_max_keepalive_connections,
+                keepalive_expiry=settings.ai_http_keepalive_seconds
+            ),
+            timeout=httpx.Timeout(
+                settings.ai_http_timeout_seconds,
+                connect=settings.ai_http_connect_timeout_seconds
+            )
+        )
+
+    def _discard_closed_loops(self):
+        for loop, client in list(self._clients.items()):
+            if loop.is_closed():
+                del self._clients[loop]
+                _close_pool_sockets(client)
+
+    def _raise_for_status(self, response: "httpx.Response", body: Optional[str] = None):
+        if response.status_code >= 400:
+            raise ProviderAPIError(
+                self.provider,
+                response.status_code,
+                body if body is not None else response.text,
+                response.headers
+            )
+
+    async def health_check(self, timeout: float):
+        """Make a cheap authenticated request, raising if the provider is not healthy"""
+        response = await self.client.get(self.health_path, timeout=timeout)
+        self._raise_for_status(response)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage, for status reporting"""
+        open_connections = 0
+        for loop, client in list(self._clients.items()):
+            if client.is_closed or loop.is_closed():
+                continue
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            open_connections += len(getattr(pool, "connections", []))
+        return {
+            "open_connections": open_connections,
+            "max_connections": settings.ai_http_max_connections,
+            "http2": settings.ai_http2 and HTTP2_AVAILABLE
+        }
+
+    async def aclose(self):
+        current = asyncio.get_running_loop()
+        for loop, client in list(self._clients.items()):
+            if client.is_closed:
+                pass
+            elif loop is current:
+                await client.aclose()
+            elif loop.is_closed():
+                _close_pool_sockets(client)
+            else:
+                # Still serving another thread; let that loop close it
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        self._clients.clear()
+
+
+class OpenAIClient(PooledProviderClient):
+    """Async client for the OpenAI chat completions API"""
+
+    provider = "OpenAI"
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        super().__init__(
+            base_url or settings.openai_base_url,
+            {"Authorization": f"Bearer {api_key}"}
+        )
+
+    async def chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float = 0.7
+    ) -> Dict[str, Any]:
+        """Create a chat completion and return the decoded response"""
+        response = await self.client.post("/chat/completions", json={
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        })
+        self._raise_for_status(response)
+        return response.json()
+
+    async def stream_chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float = 0.7
+    ) -> AsyncIterator[str]:
+        """Create a streaming chat completion, yielding content deltas"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.status_code >= 400:
+                body = (await response.aread()).decode("utf-8", "replace")
+                self._raise_for_status(response, body)
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text:
+                    yield text
+
+
+class ElevenLabsClient(PooledProviderClient):
+    """Async client for the ElevenLabs text-to-speech API"""
+
+    provider = "ElevenLabs"
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        super().__init__(
+            base_url or settings.elevenlabs_base_url,
+            {"xi-api-key": api_key}
+        )
+        self._voice_ids: Dict[str, str] = {}
+
+    async def resolve_voice_id(self, voice: str) -> str:
+        """Map a voice name like 'Josh' to its voice id (ids pass through)"""
+        if re.fullmatch(r"[A-Za-z0-9]{20}", voice):
+            return voice
+
+        if voice not in self._voice_ids:
+            response = await self.client.get("/voices")
+            self._raise_for_status(response)
+            for entry in response.json().get("voices", []):
+                self._voice_ids[entry["name"]] = entry["voice_id"]
+
+        if voice not in self._voice_ids:
+            raise ValueError(f"Unknown ElevenLabs voice: {voice}")
+        return self._voice_ids[voice]
+
+    async def text_to_speech(
+        self,
+        text: str,
+        voice: str,
+        model: str,
+        stability: float = 0.5,
+        similarity_boost: float = 0.75
+    ) -> bytes:
+        """Synthesize `text` and return the MP3 bytes"""
+        voice_id = await self.resolve_voice_id(voice)
+        response = await self.client.post(
+            f"/text-to-speech/{voice_id}",
+            headers={"Accept": "audio/mpeg"},
+            json={
+                "text": text,
+                "model_id": model,
+                "voice_settings": {
+                    "stability": stability,
+                    "similarity_boost": similarity_boost
+                }
+            }
+        )
+        self._raise_for_status(response)
+        return response.content
+
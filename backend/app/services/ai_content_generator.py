@@ -1,14 +1,16 @@
-import asyncio
-import json
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, Optional, Any, AsyncIterator, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 from ..models.video import Video, VideoCategory, VideoDifficulty, ContentSource, GenerationStatus
-from ..models.creator import Creator
-from ..schemas.video import VideoCreate, VideoUpdate
-from ..database import get_db
-from .ai_services import AIServiceManager
+from ..schemas.video import VideoCreate
+from ..database import session_scope
+from ..config import settings
+from .ai_services import ai_service_manager
+from .script_cache import script_cache, CacheMode
+from .progress_bus import ProgressReporter
+from .pipeline import Pipeline
+from .near_duplicates import near_duplicate_index, NearDuplicateError, Screening
 
 logger = logging.getLogger(__name__)
 
@@ -16,10 +18,13 @@ logger = logging.getLogger(__name__)
 class AIContentGenerator:
     """Service for generating AI-powered educational content"""
     
+    # Render pipeline stage -> progress event announced when it starts
+    PROGRESS_STAGES = {"voice": "voice", "visuals": "video"}
+    
     def __init__(self):
         self.supported_categories = [cat.value for cat in VideoCategory]
         self.supported_difficulties = [diff.value for diff in VideoDifficulty]
-        self.ai_service_manager = AIServiceManager()
+        self.ai_service_manager = ai_service_manager
     
     async def generate_video_script(
         self,
@@ -28,7 +33,9 @@ class AIContentGenerator:
         difficulty: VideoDifficulty,
         target_audience: str = "beginners",
         duration_minutes: int = 3,
-        style: str = "engaging and educational"
+        style: str = "engaging and educational",
+        cache: CacheMode = CacheMode.USE,
+        progress: Optional[ProgressReporter] = None
     ) -> Dict[str, Any]:
         """
         Generate a video script using AI
@@ -40,10 +47,29 @@ class AIContentGenerator:
             target_audience: Target audience description
             duration_minutes: Target duration in minutes
             style: Writing style for the script
+            cache: Whether to serve from, skip or refresh the script cache
+            progress: Reporter for pipeline stage events
             
         Returns:
-            Dict containing script, metadata, and generation info
+            Dict containing script, metadata, generation info and cache_status
         """
+        if progress:
+            await progress.stage("script")
+        
+        if not settings.script_cache_enabled:
+            cache = CacheMode.BYPASS
+        
+        cache_key = script_cache.make_key(topic, category, difficulty, target_audience, duration_minutes, style)
+        
+        if cache == CacheMode.USE:
+            cached = script_cache.get(cache_key)
+            if cached:
+                return {**cached, "cache_status": "hit"}
+        elif cache == CacheMode.BYPASS:
+            script_cache.record_bypass()
+        else:
+            script_cache.record_refresh()
+        
         try:
             # Use real AI service for script generation
             result = await self.ai_service_manager.generate_script_with_chatgpt(
@@ -55,13 +81,66 @@ class AIContentGenerator:
                 style=style
             )
             
-            return result
+            # Only cache real generations, never placeholder output
+            if cache != CacheMode.BYPASS and "placeholder" not in result.get("ai_tools_used", []):
+                script_cache.set(cache_key, topic, result)
+            
+            return {**result, "cache_status": "miss" if cache == CacheMode.USE else cache.value}
             
         except Exception as e:
             logger.error(f"Error generating script: {e}")
             # Fallback to placeholder if AI service fails
             return await self._generate_fallback_script(topic, category, difficulty, target_audience, duration_minutes, style)
     
+    async def stream_video_script(
+        self,
+        topic: str,
+        category: VideoCategory,
+        difficulty: VideoDifficulty,
+        target_audience: str = "beginners",
+        duration_minutes: int = 3,
+        style: str = "engaging and educational",
+        cache: CacheMode = CacheMode.USE
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a video script as it is generated
+        
+        Yields the events of AIServiceManager.stream_script_with_chatgpt. A
+        cache hit yields the whole script as one token. The final "done"
+        result carries cache_status and is stored in the script cache, just
+        like generate_video_script.
+        """
+        if not settings.script_cache_enabled:
+            cache = CacheMode.BYPASS
+        
+        cache_key = script_cache.make_key(topic, category, difficulty, target_audience, duration_minutes, style)
+        
+        if cache == CacheMode.USE:
+            cached = script_cache.get(cache_key)
+            if cached:
+                yield "token", cached["script"]
+                yield "done", {**cached, "cache_status": "hit"}
+                return
+        elif cache == CacheMode.BYPASS:
+            script_cache.record_bypass()
+        else:
+            script_cache.record_refresh()
+        
+        async for event, data in self.ai_service_manager.stream_script_with_chatgpt(
+            topic=topic,
+            category=category.value,
+            difficulty=difficulty.value,
+            target_audience=target_audience,
+            duration_minutes=duration_minutes,
+            style=style
+        ):
+            if event == "done":
+                if cache != CacheMode.BYPASS and "placeholder" not in data.get("ai_tools_used", []):
+                    script_cache.set(cache_key, topic, data)
+                data = {**data, "cache_status": "miss" if cache == CacheMode.USE else cache.value}
+            
+            yield event, data
+    
     async def create_video_from_script(
         self,
         script: str,
@@ -70,11 +149,18 @@ class AIContentGenerator:
         difficulty: VideoDifficulty,
         creator_id: int,
         voice_settings: Optional[Dict] = None,
-        visual_style: str = "modern and clean"
+        visual_style: str = "modern and clean",
+        progress: Optional[ProgressReporter] = None,
+        db: Optional[Session] = None,
+        script_route: Optional[Dict[str, Any]] = None
     ) -> Video:
         """
         Create a video record from generated script
         
+        The script is first checked against the near-duplicate index: if one
+        of the creator's existing videos has a near-duplicate script, that
+        video is returned instead of synthesizing narration again.
+        
         Args:
             script: The generated script
             title: Video title
@@ -83,124 +169,194 @@ class AIContentGenerator:
             creator_id: ID of the creator
             voice_settings: Voice configuration
             visual_style: Visual style description
+            progress: Reporter for pipeline stage events
+            db: Session to join (a short-lived one is used otherwise)
+            script_route: Model route the script was generated with, for the metadata
             
         Returns:
             Video object
+        
+        Raises:
+            NearDuplicateError: A near-duplicate script is being generated concurrently
         """
+        video, screening = await self.prepare_video_from_script(
+            script=script,
+            title=title,
+            category=category,
+            difficulty=difficulty,
+            creator_id=creator_id,
+            voice_settings=voice_settings,
+            visual_style=visual_style,
+            progress=progress,
+            db=db,
+            script_route=script_route
+        )
         try:
-            db = next(get_db())
+            if video.id is not None:
+                return video
             
-            # Generate audio using ElevenLabs
-            audio_result = await self.ai_service_manager.generate_voice_with_elevenlabs(
-                script=script,
-                voice_settings=voice_settings
-            )
+            # The session is only opened once generation is done, so slow
+            # provider calls never hold a pooled connection
+            with session_scope(db) as session:
+                session.add(video)
+                session.flush()
+                near_duplicate_index.add(session, video.id, screening.signature)
             
-            # Generate video placeholder (since full video generation requires more complex setup)
-            video_result = await self.ai_service_manager.generate_video_placeholder(
-                script=script,
-                visual_style=visual_style,
-                duration_seconds=180  # 3 minutes
-            )
+            if progress:
+                progress.add_channel(f"video:{video.id}")
+                await progress.stage("persisted", video_id=video.id)
+            
+            return video
+        finally:
+            near_duplicate_index.release(screening)
+    
+    async def prepare_video_from_script(
+        self,
+        script: str,
+        title: str,
+        category: VideoCategory,
+        difficulty: VideoDifficulty,
+        creator_id: int,
+        voice_settings: Optional[Dict] = None,
+        visual_style: str = "modern and clean",
+        progress: Optional[ProgressReporter] = None,
+        db: Optional[Session] = None,
+        script_route: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Video, Screening]:
+        """
+        Screen a script and render its video without saving it
+        
+        Returns the creator's existing video (which has an id) when the script
+        is a near-duplicate, otherwise an unsaved Video. The caller persists it
+        together with screening.signature and must release the screening
+        afterwards, so concurrent near-duplicates keep waiting until then.
+        Arguments are the same as for create_video_from_script.
+        
+        Raises:
+            NearDuplicateError: A near-duplicate script is being generated concurrently
+        """
+        screening = near_duplicate_index.screen(script, creator_id)
+        try:
+            if screening.pending:
+                raise NearDuplicateError(f"A near-duplicate of '{title}' is being generated right now")
             
-            # Create video record with real AI-generated content
-            video_data = VideoCreate(
+            if screening.duplicate_of is not None:
+                with session_scope(db) as session:
+                    video = session.get(Video, screening.duplicate_of)
+                if video is not None and video.creator_id == creator_id:
+                    logger.info(
+                        f"♻️ '{title}' is a near-duplicate of video {video.id} "
+                        f"({screening.similarity:.0%} similar), reusing it"
+                    )
+                    if progress:
+                        progress.add_channel(f"video:{video.id}")
+                        await progress.stage("persisted", video_id=video.id, duplicate=True)
+                    return video, screening
+            
+            video = await self._render_video(
+                script=script,
                 title=title,
-                description=f"AI-generated educational content about {title}",
-                video_url=video_result.get("video_url", f"/data/{title.lower().replace(' ', '-')}.mp4"),
-                thumbnail_url=video_result.get("thumbnail_url", f"/thumbnails/{title.lower().replace(' ', '-')}.jpg"),
-                duration=180,  # 3 minutes
                 category=category,
                 difficulty=difficulty,
-                tags=f"{category.value},{difficulty.value},ai-generated",
-                source="ai-generated",
-                source_id=f"ai-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
-                is_educational=True,
-                is_verified=True,
                 creator_id=creator_id,
-                content_source=ContentSource.AI_GENERATED,
-                generation_status=GenerationStatus.COMPLETED,
-                ai_prompt=f"Create an educational video about {title}",
-                ai_tools_used=audio_result.get("ai_tools_used", []) + video_result.get("ai_tools_used", []),
-                generation_metadata={
-                    "script_length": len(script),
-                    "audio_duration": audio_result.get("duration", 0),
-                    "generation_time": datetime.now().isoformat(),
-                    "tools_used": audio_result.get("ai_tools_used", []) + video_result.get("ai_tools_used", []),
-                    "voice_settings": voice_settings,
-                    "visual_style": visual_style
-                },
-                script_content=script,
-                voice_settings=voice_settings or {
-                    "speed": 1.0,
-                    "tone": "professional",
-                    "language": "en"
-                },
+                voice_settings=voice_settings,
                 visual_style=visual_style,
-                target_audience="beginners"
+                progress=progress,
+                script_route=script_route
             )
-            
-            # Create video record
-            video = Video(**video_data.dict())
-            db.add(video)
-            db.commit()
-            db.refresh(video)
-            
-            return video
+            return video, screening
             
         except Exception as e:
             logger.error(f"Error creating video from script: {e}")
+            near_duplicate_index.release(screening)
             raise
     
-    async def generate_content_batch(
+    async def _render_video(
         self,
-        topics: List[str],
+        script: str,
+        title: str,
         category: VideoCategory,
         difficulty: VideoDifficulty,
-        creator_id: int
-    ) -> List[Video]:
+        creator_id: int,
+        voice_settings: Optional[Dict] = None,
+        visual_style: str = "modern and clean",
+        progress: Optional[ProgressReporter] = None,
+        script_route: Optional[Dict[str, Any]] = None
+    ) -> Video:
         """
-        Generate multiple videos in a batch
+        Generate narration and video assets and build the (unsaved) Video row
         
-        Args:
-            topics: List of topics to generate videos for
-            category: Video category
-            difficulty: Video difficulty
-            creator_id: ID of the creator
-            
-        Returns:
-            List of generated Video objects
+        Narration and visuals each only need the script, so they run
+        concurrently; their timings are recorded in generation_metadata.
         """
-        videos = []
         
-        for topic in topics:
-            try:
-                # Generate script
-                script_result = await self.generate_video_script(
-                    topic=topic,
-                    category=category,
-                    difficulty=difficulty
-                )
-                
-                # Create video
-                video = await self.create_video_from_script(
-                    script=script_result["script"],
-                    title=f"Learn {topic} - {difficulty.value.title()} Guide",
-                    category=category,
-                    difficulty=difficulty,
-                    creator_id=creator_id
-                )
-                
-                videos.append(video)
-                
-                # Add delay to avoid rate limiting
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error generating video for topic '{topic}': {e}")
-                continue
+        async def voice_stage(script: str) -> Dict[str, Any]:
+            # Generate audio using ElevenLabs
+            return await self.ai_service_manager.generate_voice_with_elevenlabs(
+                script=script,
+                voice_settings=voice_settings
+            )
+        
+        async def visuals_stage(script: str) -> Dict[str, Any]:
+            # Generate video placeholder (since full video generation requires more complex setup)
+            return await self.ai_service_manager.generate_video_placeholder(
+                script=script,
+                visual_style=visual_style,
+                duration_seconds=180  # 3 minutes
+            )
+        
+        async def on_stage_start(stage: str):
+            if progress:
+                await progress.stage(self.PROGRESS_STAGES[stage])
+        
+        pipeline = Pipeline("render_video")
+        pipeline.add_stage("voice", voice_stage, requires=["script"])
+        pipeline.add_stage("visuals", visuals_stage, requires=["script"])
+        result = await pipeline.run(on_stage_start=on_stage_start, script=script)
+        audio_result = result["voice"]
+        video_result = result["visuals"]
+        
+        # Create video record with real AI-generated content
+        video_data = VideoCreate(
+            title=title,
+            description=f"AI-generated educational content about {title}",
+            video_url=video_result.get("video_url", f"/data/{title.lower().replace(' ', '-')}.mp4"),
+            thumbnail_url=video_result.get("thumbnail_url", f"/thumbnails/{title.lower().replace(' ', '-')}.jpg"),
+            duration=180,  # 3 minutes
+            category=category,
+            difficulty=difficulty,
+            tags=f"{category.value},{difficulty.value},ai-generated",
+            source="ai-generated",
+            source_id=f"ai-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+            is_educational=True,
+            is_verified=True,
+            creator_id=creator_id,
+            content_source=ContentSource.AI_GENERATED,
+            generation_status=GenerationStatus.COMPLETED,
+            ai_prompt=f"Create an educational video about {title}",
+            ai_tools_used=audio_result.get("ai_tools_used", []) + video_result.get("ai_tools_used", []),
+            generation_metadata={
+                "script_length": len(script),
+                "audio_duration": audio_result.get("duration", 0),
+                "audio_file": audio_result.get("audio_file"),
+                "generation_time": datetime.now().isoformat(),
+                "tools_used": audio_result.get("ai_tools_used", []) + video_result.get("ai_tools_used", []),
+                "voice_settings": voice_settings,
+                "visual_style": visual_style,
+                "script_route": script_route,
+                **result.timing_metadata()
+            },
+            script_content=script,
+            voice_settings=voice_settings or {
+                "speed": 1.0,
+                "tone": "professional",
+                "language": "en"
+            },
+            visual_style=visual_style,
+            target_audience="beginners"
+        )
         
-        return videos
+        return Video(**video_data.dict())
     
     def _get_script_template(self, category: VideoCategory, difficulty: VideoDifficulty) -> str:
         """Get script template based on category and difficulty"""
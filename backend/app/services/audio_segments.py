@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Prune down to this fraction of TTS_CACHE_MAX_MB, so a full cache isn't rescanned on every write
+_PRUNE_TARGET = 0.9
+
+
+def split_script(script: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Split a narration script into segments for parallel synthesis
+
+    Paragraphs become segments of their own, so shared intros and outros map
+    to identical segments across scripts. Paragraphs longer than `max_chars`
+    are split on sentence boundaries and packed back up to that length.
+    Template placeholders in square brackets are not narrated.
+    """
+    max_chars = max_chars or settings.tts_segment_max_chars
+    segments = []
+
+    for paragraph in re.split(r"\n\s*\n", script):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph or re.fullmatch(r"\[[^\]]*\]", paragraph):
+            continue
+
+        current = ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            segments.append(current)
+
+    return segments
+
+
+def strip_id3(data: bytes, leading: bool = True, trailing: bool = True) -> bytes:
+    """Remove the ID3v2 header and/or ID3v1 trailer so MP3 frames can be concatenated"""
+    if leading and len(data) >= 10 and data[:3] == b"ID3":
+        # Tag size is a 28-bit syncsafe integer, excluding the 10-byte header
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        if data[5] & 0x10:  # Footer present
+            size += 10
+        data = data[10 + size:]
+    if trailing and len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def concatenate_mp3(segments: List[bytes]) -> bytes:
+    """Join MP3 segments in order, keeping only the first header and the last trailer"""
+    last = len(segments) - 1
+    return b"".join(
+        strip_id3(data, leading=index > 0, trailing=index < last)
+        for index, data in enumerate(segments)
+    )
+
+
+class AudioSegmentCache:
+    """
+    Content-addressed cache of synthesized narration segments
+
+    Each segment is stored at TTS_CACHE_DIR/<sha256>.mp3, keyed by its text
+    and voice settings, so re-generating a script or reusing a phrase in
+    another script costs no synthesis. Least recently used segments are
+    pruned once the directory grows past TTS_CACHE_MAX_MB. The directory
+    size is kept as a running total, seeded by one scan and re-measured only
+    when pruning, so writes by other processes are noticed at the next prune.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.tts_cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.scans = 0
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def make_key(self, text: str, voice_settings: Dict[str, Any]) -> str:
+        """Build the cache key for a segment and its voice settings"""
+        return hashlib.sha256(
+            json.dumps([text, voice_settings], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached segment audio, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def set(self, key: str, data: bytes):
+        """Store segment audio, pruning the cache if it is over its size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+
+        # Write then rename, so concurrent readers never see a partial file
+        tmp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        limit = settings.tts_cache_max_mb * 1024 * 1024
+        if limit <= 0:
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan()[1]
+            else:
+                self._total_bytes += len(data) - replaced
+            if self._total_bytes > limit:
+                self._prune(int(limit * _PRUNE_TARGET))
+
+    def _scan(self):
+        """List cached segments oldest first, with their total size"""
+        self.scans += 1
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries), sum(size for _, size, _ in entries)
+
+    def _prune(self, target: int):
+        """Evict least recently used segments until the cache is at most `target` bytes (caller holds the lock)"""
+        entries, total = self._scan()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                total -= size  # Evicted by another process
+            except OSError as e:
+                logger.warning(f"Could not evict cached segment {path}: {e}")
+        self._total_bytes = total
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "scans": self.scans,
+            "size_bytes": self._total_bytes
+        }
+
+
+# Global instance
+audio_segment_cache = AudioSegmentCache()
@@ -0,0 +1,192 @@
+import logging
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from ..models.curriculum import LearningPath, LearningPathItem
+from ..models.job import GenerationJob, JobStatus
+from ..models.video import VideoCategory, VideoDifficulty
+from ..database import session_scope
+from ..config import settings
+from .ai_services import ai_service_manager
+from .generation_jobs import generation_job_queue
+
+logger = logging.getLogger(__name__)
+
+
+class CurriculumGenerator:
+    """
+    Turns a seed subject into a learning path and generates its videos
+
+    The planner breaks the subject into subtopics, each listing the
+    subtopics it builds on. The videos are generated as a job on the
+    durable generation queue with that DAG as item dependencies: a
+    subtopic's script prompt names the prerequisites the viewer has
+    already seen, so it waits for them to finish. Independent subtopics
+    run concurrently (paced by the provider quotas and AI_BATCH_CONCURRENCY),
+    so a course takes about as long as its longest prerequisite chain.
+    """
+
+    @staticmethod
+    def difficulty_range(min_difficulty: VideoDifficulty, max_difficulty: VideoDifficulty) -> List[VideoDifficulty]:
+        """Difficulty levels from min_difficulty to max_difficulty, easiest first"""
+        levels = list(VideoDifficulty)
+        return levels[levels.index(min_difficulty):levels.index(max_difficulty) + 1]
+
+    def build_plan(
+        self,
+        topics: List[Dict[str, Any]],
+        difficulties: List[VideoDifficulty],
+        max_topics: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Clean up a planner answer into a DAG in learning order
+
+        Duplicate topics are merged, difficulties are clamped to the
+        requested range and prerequisites naming unknown topics are dropped.
+        Nodes are then ordered so every prerequisite comes first; if the
+        answer has a cycle, the edges closing it are dropped.
+
+        Args:
+            topics: Planner topics (topic, difficulty, prerequisite names)
+            difficulties: Allowed difficulty levels, easiest first
+            max_topics: Maximum number of nodes kept
+
+        Returns:
+            Nodes with topic, difficulty and prerequisites (as positions), by position
+        """
+        nodes, index = [], {}
+        for raw in topics:
+            name = " ".join(str(raw.get("topic", "")).split())[:255]
+            if not name or name.lower() in index:
+                continue
+            if len(nodes) >= max_topics:
+                break
+
+            try:
+                difficulty = VideoDifficulty(str(raw.get("difficulty", "")).strip().lower())
+            except ValueError:
+                difficulty = difficulties[0]
+            if difficulty not in difficulties:
+                levels = list(VideoDifficulty)
+                difficulty = difficulties[0] if levels.index(difficulty) < levels.index(difficulties[0]) else difficulties[-1]
+
+            prerequisites = raw.get("prerequisites") or []
+            if isinstance(prerequisites, str):
+                prerequisites = [prerequisites]
+
+            index[name.lower()] = len(nodes)
+            nodes.append({"topic": name, "difficulty": difficulty, "names": prerequisites})
+
+        edges = [
+            {index[key] for key in (" ".join(str(name).split()).lower() for name in node.pop("names")) if key in index} - {i}
+            for i, node in enumerate(nodes)
+        ]
+
+        # Kahn's algorithm, keeping the planner's order among nodes that are ready
+        order, placed = [], set()
+        while len(order) < len(nodes):
+            ready = [i for i in range(len(nodes)) if i not in placed and edges[i] <= placed]
+            if not ready:
+                # Every remaining node waits on another, so there is a cycle: follow
+                # unmet prerequisites until a node repeats and drop the edge closing it
+                walk = [min(i for i in range(len(nodes)) if i not in placed)]
+                while True:
+                    following = min(edges[walk[-1]] - placed)
+                    if following in walk:
+                        break
+                    walk.append(following)
+                logger.warning(f"📚 Dropping cyclic prerequisite '{nodes[following]['topic']}' of '{nodes[walk[-1]]['topic']}'")
+                edges[walk[-1]].discard(following)
+                continue
+            for i in ready:
+                order.append(i)
+                placed.add(i)
+
+        position = {node: pos for pos, node in enumerate(order)}
+        return [
+            {**nodes[i], "prerequisites": sorted(position[p] for p in edges[i])}
+            for i in order
+        ]
+
+    async def create_path(
+        self,
+        db: Session,
+        user_id: int,
+        creator_id: int,
+        subject: str,
+        category: VideoCategory,
+        min_difficulty: VideoDifficulty,
+        max_difficulty: VideoDifficulty,
+        max_topics: Optional[int] = None
+    ) -> LearningPath:
+        """
+        Plan a learning path and persist it with pending items
+
+        Args:
+            db: Database session
+            user_id: ID of the requesting user
+            creator_id: ID of the creator the videos are published as
+            subject: Seed subject of the course
+            category: Video category
+            min_difficulty: Easiest difficulty in the course
+            max_difficulty: Hardest difficulty in the course
+            max_topics: Maximum number of subtopics (default: CURRICULUM_MAX_TOPICS)
+
+        Returns:
+            The persisted LearningPath
+        """
+        difficulties = self.difficulty_range(min_difficulty, max_difficulty)
+        max_topics = min(max_topics or settings.curriculum_max_topics, settings.curriculum_max_topics)
+
+        plan = await ai_service_manager.plan_curriculum_with_chatgpt(
+            subject=subject,
+            category=category.value,
+            difficulties=[difficulty.value for difficulty in difficulties],
+            max_topics=max_topics
+        )
+        nodes = self.build_plan(plan["topics"], difficulties, max_topics)
+
+        with session_scope(db) as session:
+            path = LearningPath(
+                user_id=user_id,
+                creator_id=creator_id,
+                subject=subject,
+                category=category,
+                min_difficulty=min_difficulty,
+                max_difficulty=max_difficulty,
+                status=JobStatus.PENDING,
+                generation_metadata={"planner_model": plan["ai_model"]}
+            )
+            session.add(path)
+            session.flush()
+            session.add_all(
+                LearningPathItem(
+                    path_id=path.id,
+                    position=position,
+                    topic=node["topic"],
+                    difficulty=node["difficulty"],
+                    prerequisites=node["prerequisites"]
+                )
+                for position, node in enumerate(nodes)
+            )
+
+        logger.info(f"📚 Planned learning path {path.id} on '{subject}' with {len(nodes)} subtopics")
+        return path
+
+    def start(self, db: Session, path: LearningPath) -> GenerationJob:
+        """
+        Queue a path's videos on the durable job queue
+
+        Generation survives API restarts and runs on any generation worker;
+        the job's progress is mirrored onto the path and its items.
+        """
+        job = generation_job_queue.enqueue_path(db, path)
+        path.generation_metadata = {**(path.generation_metadata or {}), "job_id": job.id}
+        db.commit()
+        return job
+
+    def get_path(self, db: Session, path_id: int) -> Optional[LearningPath]:
+        return db.query(LearningPath).filter(LearningPath.id == path_id).first()
+
+
+# Global instance
+curriculum_generator = CurriculumGenerator()
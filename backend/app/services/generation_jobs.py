@@ -0,0 +1,656 @@
+import os
+import random
+import socket
+import asyncio
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update, select, func, exists
+from sqlalchemy.orm import Session, aliased
+from ..models.video import VideoCategory, VideoDifficulty
+from ..models.video import Video
+from ..models.job import GenerationJob, GenerationJobItem, GenerationJobItemDependency, JobStatus
+from ..models.curriculum import LearningPath
+from ..database import SessionLocal, session_scope
+from ..config import settings
+from .ai_content_generator import ai_content_generator
+from .near_duplicates import near_duplicate_index
+from .progress_bus import ProgressReporter
+from .priority_scheduler import Lane, priority_scope
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back without a timezone; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# (item_id, job_id, video, script signature) of a finished item
+Completion = Tuple[int, int, Video, Optional[List[int]]]
+
+
+class CompletionWriter:
+    """
+    Write-behind buffer for the items a worker finishes
+
+    Items finishing within JOB_FLUSH_INTERVAL_SECONDS of each other get their
+    videos, script signatures and item/job status written in one transaction
+    instead of one per item. Each writer waits until its batch is committed
+    and gets the video ID back, or the error the whole batch failed with.
+    """
+
+    def __init__(self, queue: "GenerationJobQueue", max_items: int = 1, interval: float = 0.0):
+        self.queue = queue
+        self.max_items = max_items
+        self.interval = interval
+        self._pending: List[Tuple[Completion, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def write(self, item_id: int, job_id: int, video: Video, signature: Optional[List[int]]) -> int:
+        """Queue a finished item and wait until it is committed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((item_id, job_id, video, signature), future))
+
+        if len(self._pending) >= self.max_items or self.interval <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.interval, self.flush)
+        return await future
+
+    def flush(self):
+        """Commit every queued item in one transaction"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        try:
+            with session_scope() as session:
+                video_ids = self.queue._complete_batch(session, [completion for completion, _ in pending])
+        except Exception as e:
+            logger.error(f"Failed to write {len(pending)} finished generation items: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), video_id in zip(pending, video_ids):
+            if not future.done():
+                future.set_result(video_id)
+        self.queue.dispatch_unblocked([completion[0] for completion, _ in pending])
+
+
+class GenerationJobQueue:
+    """
+    Durable queue for batch video generation
+
+    Jobs and their per-topic items live in the database, so work survives API
+    restarts and can be picked up by any number of worker processes. Workers
+    claim items with a conditional UPDATE, which is atomic on both SQLite and
+    PostgreSQL. An item with prerequisites (a course subtopic) can only be
+    claimed once they have all finished. At most AI_BATCH_CONCURRENCY items of one job run at once,
+    so a large batch can't take every worker slot. Failed items are retried
+    with exponential backoff and move to the dead-letter state once they run
+    out of attempts.
+    """
+
+    def enqueue_batch(
+        self,
+        db: Session,
+        topics: List[str],
+        category: VideoCategory,
+        difficulty: VideoDifficulty,
+        creator_id: int,
+        user_id: int
+    ) -> GenerationJob:
+        """
+        Persist a batch generation job with one item per topic
+
+        Args:
+            db: Database session
+            topics: Topics to generate videos for
+            category: Video category
+            difficulty: Video difficulty
+            creator_id: ID of the creator that will own the videos
+            user_id: ID of the user who requested the batch
+
+        Returns:
+            GenerationJob object
+        """
+        job = GenerationJob(
+            user_id=user_id,
+            creator_id=creator_id,
+            category=category,
+            difficulty=difficulty,
+            status=JobStatus.PENDING,
+            total_items=len(topics)
+        )
+        job.items = [
+            GenerationJobItem(
+                topic=topic,
+                status=JobStatus.PENDING,
+                max_attempts=settings.job_max_attempts,
+                next_attempt_at=_utcnow()
+            )
+            for topic in topics
+        ]
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.dispatch([item.id for item in job.items])
+
+        logger.info(f"📥 Enqueued generation job {job.id} with {len(topics)} topics")
+        return job
+
+    def enqueue_path(self, db: Session, path: LearningPath) -> GenerationJob:
+        """
+        Persist a job generating every subtopic of a learning path
+
+        Each subtopic becomes an item that depends on the items of the
+        subtopics it builds on, so its script can name them as already
+        learned. Only items without prerequisites are dispatched now; the
+        rest are dispatched as their prerequisites finish.
+
+        Args:
+            db: Database session
+            path: Learning path with its items
+
+        Returns:
+            GenerationJob object
+        """
+        path_items = sorted(path.items, key=lambda path_item: path_item.position)
+        job = GenerationJob(
+            user_id=path.user_id,
+            creator_id=path.creator_id,
+            category=path.category,
+            difficulty=path.min_difficulty,
+            path_id=path.id,
+            status=JobStatus.PENDING,
+            total_items=len(path_items)
+        )
+        job.items = [
+            GenerationJobItem(
+                topic=path_item.topic,
+                difficulty=path_item.difficulty,
+                path_item_id=path_item.id,
+                status=JobStatus.PENDING,
+                max_attempts=settings.job_max_attempts,
+                next_attempt_at=_utcnow()
+            )
+            for path_item in path_items
+        ]
+        db.add(job)
+        db.flush()
+
+        by_position = {path_item.position: item for path_item, item in zip(path_items, job.items)}
+        db.add_all(
+            GenerationJobItemDependency(item_id=by_position[path_item.position].id, depends_on_id=by_position[position].id)
+            for path_item in path_items
+            for position in path_item.prerequisites or []
+        )
+        db.commit()
+        db.refresh(job)
+
+        self.dispatch([
+            by_position[path_item.position].id for path_item in path_items if not path_item.prerequisites
+        ])
+
+        logger.info(f"📥 Enqueued generation job {job.id} for learning path {path.id} ({len(path_items)} subtopics)")
+        return job
+
+    def dispatch(self, item_ids: List[int], countdown: float = 0):
+        """
+        Push items to the Celery broker when one is configured
+
+        With the database broker this is a no-op: polling workers find
+        pending items on their own.
+        """
+        if settings.job_broker != "celery" or not item_ids:
+            return
+
+        from ..celery_app import process_generation_item
+        for item_id in item_ids:
+            process_generation_item.apply_async(args=[item_id], countdown=countdown)
+
+    def dispatch_unblocked(self, finished_ids: List[int]):
+        """Dispatch the dependents of finished items that have nothing left to wait for"""
+        if settings.job_broker != "celery" or not finished_ids:
+            return
+
+        with session_scope() as session:
+            dependents = select(GenerationJobItemDependency.item_id).where(
+                GenerationJobItemDependency.depends_on_id.in_(finished_ids)
+            )
+            ready = [
+                item_id for (item_id,) in session.query(GenerationJobItem.id).filter(
+                    GenerationJobItem.id.in_(dependents),
+                    GenerationJobItem.status == JobStatus.PENDING,
+                    ~self._waiting_on_prerequisites(GenerationJobItem.id)
+                ).all()
+            ]
+        self.dispatch(ready)
+
+    def claim(self, db: Session, worker_id: str, item_id: Optional[int] = None) -> Optional[int]:
+        """
+        Atomically claim a due item for a worker
+
+        Args:
+            db: Database session
+            worker_id: Identifier of the claiming worker
+            item_id: Claim this specific item instead of the oldest due one
+
+        Returns:
+            ID of the claimed item, or None when nothing was claimed
+        """
+        now = _utcnow()
+
+        if item_id is None:
+            item_id = db.query(GenerationJobItem.id).filter(
+                GenerationJobItem.status == JobStatus.PENDING,
+                GenerationJobItem.next_attempt_at <= now,
+                self._running_in_job(GenerationJobItem.job_id) < settings.ai_batch_concurrency,
+                ~self._waiting_on_prerequisites(GenerationJobItem.id)
+            ).order_by(GenerationJobItem.next_attempt_at, GenerationJobItem.id).limit(1).scalar()
+            if item_id is None:
+                return None
+
+        # Re-checked in the UPDATE: another worker may have claimed from the same job meanwhile
+        job_id = db.query(GenerationJobItem.job_id).filter(GenerationJobItem.id == item_id).scalar()
+        result = db.execute(
+            update(GenerationJobItem)
+            .where(
+                GenerationJobItem.id == item_id,
+                GenerationJobItem.status == JobStatus.PENDING,
+                GenerationJobItem.next_attempt_at <= now,
+                self._running_in_job(job_id) < settings.ai_batch_concurrency,
+                ~self._waiting_on_prerequisites(item_id)
+            )
+            .values(
+                status=JobStatus.RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=GenerationJobItem.attempts + 1
+            )
+        )
+        db.commit()
+
+        # Another worker won the race for this row, the job is at its concurrency
+        # limit, or a prerequisite hasn't finished yet
+        if result.rowcount != 1:
+            return None
+
+        db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.status == JobStatus.PENDING)
+            .values(status=JobStatus.RUNNING)
+        )
+        db.commit()
+        return item_id
+
+    @staticmethod
+    def _running_in_job(job_id) -> Any:
+        """Scalar subquery counting a job's running items"""
+        running = aliased(GenerationJobItem)
+        return select(func.count(running.id)).where(
+            running.job_id == job_id,
+            running.status == JobStatus.RUNNING
+        ).scalar_subquery()
+
+    @staticmethod
+    def _waiting_on_prerequisites(item_id) -> Any:
+        """EXISTS clause: one of the item's prerequisites hasn't finished yet"""
+        prerequisite = aliased(GenerationJobItem)
+        return exists().where(
+            GenerationJobItemDependency.item_id == item_id,
+            GenerationJobItemDependency.depends_on_id == prerequisite.id,
+            prerequisite.status.notin_([JobStatus.COMPLETED, JobStatus.DEAD_LETTER])
+        )
+
+    def requeue_stale(self, db: Session) -> int:
+        """
+        Return running items whose worker lease expired to the queue
+
+        The requeued items are dispatched again, so with the Celery broker
+        they are delivered to a live worker; an acks_late redelivery of the
+        crashed task can't claim an item that is still RUNNING.
+        """
+        cutoff = _utcnow() - timedelta(seconds=settings.job_lease_seconds)
+        stale = [
+            item_id for (item_id,) in db.query(GenerationJobItem.id).filter(
+                GenerationJobItem.status == JobStatus.RUNNING,
+                GenerationJobItem.locked_at < cutoff
+            ).all()
+        ]
+        if not stale:
+            db.commit()
+            return 0
+
+        # Re-checked in the UPDATE: a worker may have finished one meanwhile
+        requeued = [
+            item_id for (item_id,) in db.execute(
+                update(GenerationJobItem)
+                .where(
+                    GenerationJobItem.id.in_(stale),
+                    GenerationJobItem.status == JobStatus.RUNNING,
+                    GenerationJobItem.locked_at < cutoff
+                )
+                .values(status=JobStatus.PENDING, locked_by=None, locked_at=None, next_attempt_at=_utcnow())
+                .returning(GenerationJobItem.id)
+            ).all()
+        ]
+        db.commit()
+
+        if requeued:
+            logger.warning(f"♻️ Requeued {len(requeued)} generation items with expired leases")
+            self.dispatch(requeued)
+        return len(requeued)
+
+    def retry_dead_letter(self, db: Session, job_id: int) -> int:
+        """Give dead-lettered items of a job a fresh set of attempts"""
+        item_ids = [
+            item_id for (item_id,) in db.query(GenerationJobItem.id).filter(
+                GenerationJobItem.job_id == job_id,
+                GenerationJobItem.status == JobStatus.DEAD_LETTER
+            ).all()
+        ]
+        if not item_ids:
+            return 0
+
+        db.execute(
+            update(GenerationJobItem)
+            .where(GenerationJobItem.id.in_(item_ids))
+            .values(status=JobStatus.PENDING, attempts=0, next_attempt_at=_utcnow(), completed_at=None)
+        )
+        db.commit()
+        self._refresh_job(db, job_id)
+
+        self.dispatch(item_ids)
+        return len(item_ids)
+
+    def _backoff_seconds(self, attempts: int) -> float:
+        """Exponential backoff with jitter, capped at one hour"""
+        delay = settings.job_retry_base_seconds * (2 ** max(attempts - 1, 0))
+        return min(delay, 3600) * random.uniform(0.8, 1.2)
+
+    def _complete_batch(self, db: Session, completions: List[Completion]) -> List[int]:
+        """Persist new videos and mark their items completed, without committing"""
+        created = [(video, signature) for _, _, video, signature in completions if video.id is None]
+        db.add_all([video for video, _ in created])
+        db.flush()
+        for video, signature in created:
+            near_duplicate_index.add(db, video.id, signature)
+
+        now = _utcnow()
+        db.execute(update(GenerationJobItem), [
+            {
+                "id": item_id,
+                "status": JobStatus.COMPLETED,
+                "video_id": video.id,
+                "last_error": None,
+                "locked_by": None,
+                "completed_at": now
+            }
+            for item_id, _, video, _ in completions
+        ])
+        for job_id in sorted({job_id for _, job_id, _, _ in completions}):
+            self._recount_job(db, job_id)
+        return [video.id for _, _, video, _ in completions]
+
+    def _fail(self, db: Session, item: GenerationJobItem, error: Exception) -> Optional[float]:
+        """Record a failed attempt; returns the retry delay, or None when dead-lettered"""
+        item.last_error = str(error)[:2000]
+        item.locked_by = None
+
+        retry_in = None
+        if item.attempts >= item.max_attempts:
+            item.status = JobStatus.DEAD_LETTER
+            item.completed_at = _utcnow()
+            logger.error(f"☠️ Generation item {item.id} ('{item.topic}') moved to dead letter: {error}")
+        else:
+            retry_in = self._backoff_seconds(item.attempts)
+            item.status = JobStatus.PENDING
+            item.next_attempt_at = _utcnow() + timedelta(seconds=retry_in)
+            logger.warning(f"🔁 Generation item {item.id} ('{item.topic}') failed, retrying in {retry_in:.0f}s: {error}")
+
+        db.commit()
+        self._refresh_job(db, item.job_id)
+        if retry_in is None:
+            # Dependents go ahead without it, like without any failed prerequisite
+            self.dispatch_unblocked([item.id])
+        return retry_in
+
+    def _refresh_job(self, db: Session, job_id: int):
+        """Recompute job counters and status from its items"""
+        self._recount_job(db, job_id)
+        db.commit()
+
+    def _recount_job(self, db: Session, job_id: int):
+        """Recompute job counters and status, in the caller's transaction"""
+        counts = dict(
+            db.query(GenerationJobItem.status, func.count(GenerationJobItem.id))
+            .filter(GenerationJobItem.job_id == job_id)
+            .group_by(GenerationJobItem.status)
+            .all()
+        )
+        job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+
+        job.completed_items = counts.get(JobStatus.COMPLETED, 0)
+        job.failed_items = counts.get(JobStatus.DEAD_LETTER, 0)
+        unfinished = counts.get(JobStatus.PENDING, 0) + counts.get(JobStatus.RUNNING, 0)
+
+        if unfinished:
+            started = job.completed_items or job.failed_items or counts.get(JobStatus.RUNNING)
+            job.status = JobStatus.RUNNING if started else JobStatus.PENDING
+            job.completed_at = None
+        else:
+            finished = job.completed_at is None
+            job.status = JobStatus.FAILED if job.failed_items else JobStatus.COMPLETED
+            job.completed_at = job.completed_at or _utcnow()
+            if finished:
+                stats = self.batch_stats(job)
+                logger.info(
+                    f"📊 Job {job.id} generated {stats['generated']}/{stats['topics']} videos in "
+                    f"{stats['elapsed_seconds']}s ({stats['videos_per_minute']} videos/min)"
+                )
+
+        if job.path_id is not None:
+            self._sync_path(db, job)
+
+    def _sync_path(self, db: Session, job: GenerationJob):
+        """Mirror a course job's progress onto its learning path"""
+        path = db.query(LearningPath).filter(LearningPath.id == job.path_id).first()
+        path.status = job.status
+        path.completed_at = job.completed_at
+
+        path_items = {path_item.id: path_item for path_item in path.items}
+        for item in db.query(GenerationJobItem).filter(GenerationJobItem.job_id == job.id).all():
+            path_item = path_items.get(item.path_item_id)
+            if path_item is None:
+                continue
+            path_item.status = JobStatus.FAILED if item.status == JobStatus.DEAD_LETTER else item.status
+            path_item.video_id = item.video_id
+            path_item.last_error = item.last_error
+            path_item.completed_at = item.completed_at
+
+    def batch_stats(self, job: GenerationJob) -> Dict[str, Any]:
+        """Throughput of a job, from when it was queued until it finished (or now)"""
+        elapsed = 0.0
+        if job.created_at is not None:
+            finished_at = _as_utc(job.completed_at) if job.completed_at else _utcnow()
+            elapsed = (finished_at - _as_utc(job.created_at)).total_seconds()
+        return {
+            "job_id": job.id,
+            "topics": job.total_items,
+            "generated": job.completed_items,
+            "failed": job.failed_items,
+            "elapsed_seconds": round(elapsed, 2),
+            "videos_per_minute": round(job.completed_items / elapsed * 60, 2) if elapsed > 0 else None
+        }
+
+    def last_batch_stats(self, db: Session) -> Optional[Dict[str, Any]]:
+        """Throughput of the most recently finished job, whichever worker ran it"""
+        job = db.query(GenerationJob).filter(GenerationJob.completed_at.isnot(None)).order_by(
+            GenerationJob.completed_at.desc(), GenerationJob.id.desc()
+        ).first()
+        return self.batch_stats(job) if job else None
+
+    def _learned_topics(self, db: Session, item_id: int) -> List[str]:
+        """Topics of an item's prerequisites that were generated (failed ones are left out)"""
+        return [
+            topic for (topic,) in db.query(GenerationJobItem.topic).join(
+                GenerationJobItemDependency, GenerationJobItemDependency.depends_on_id == GenerationJobItem.id
+            ).filter(
+                GenerationJobItemDependency.item_id == item_id,
+                GenerationJobItem.status == JobStatus.COMPLETED
+            ).order_by(GenerationJobItem.id).all()
+        ]
+
+    async def process_item(self, item_id: int, writer: Optional[CompletionWriter] = None):
+        """
+        Generate the video for a claimed item and record the outcome
+
+        Args:
+            item_id: ID of the claimed item
+            writer: Batches the write with other finished items (written alone otherwise)
+        """
+        writer = writer or CompletionWriter(self)
+        db = SessionLocal()
+        try:
+            item = db.query(GenerationJobItem).filter(GenerationJobItem.id == item_id).first()
+            job = item.job
+            topic, category, creator_id = item.topic, job.category, job.creator_id
+            difficulty = item.difficulty or job.difficulty
+            user_id = job.user_id
+            title = f"Learn {topic} - {difficulty.value.title()} Guide"
+            script_options = {}
+            if job.path_id is not None:
+                # Course subtopics are titled by topic and build on the prerequisites already generated
+                title = topic
+                learned = self._learned_topics(db, item.id)
+                script_options["target_audience"] = f"{difficulty.value} learners" + (
+                    f" who have already learned {', '.join(learned)}" if learned else ""
+                )
+            progress = ProgressReporter([f"job:{job.id}"], job_id=job.id, item_id=item.id, topic=topic)
+
+            # End the read transaction so no connection is held during generation
+            db.commit()
+
+            try:
+                # Background work: interactive requests get provider quota first
+                with priority_scope(Lane.BATCH, user_id=user_id):
+                    script_result = await ai_content_generator.generate_video_script(
+                        topic=topic,
+                        category=category,
+                        difficulty=difficulty,
+                        progress=progress,
+                        **script_options
+                    )
+
+                    video, screening = await ai_content_generator.prepare_video_from_script(
+                        script=script_result["script"],
+                        title=title,
+                        category=category,
+                        difficulty=difficulty,
+                        creator_id=creator_id,
+                        progress=progress,
+                        db=db,
+                        script_route=script_result["metadata"].get("route")
+                    )
+
+                created = video.id is None
+                try:
+                    video_id = await writer.write(item.id, job.id, video, screening.signature)
+                finally:
+                    near_duplicate_index.release(screening)
+            except Exception as e:
+                db.rollback()
+                retry_in = self._fail(db, item, e)
+                if retry_in is not None:
+                    self.dispatch([item.id], countdown=retry_in)
+                    await progress.stage("retrying", percent=0, error=str(e), retry_in=round(retry_in, 1))
+                else:
+                    await progress.stage("dead-letter", percent=100, error=str(e))
+                return
+
+            if created:
+                progress.add_channel(f"video:{video_id}")
+                await progress.stage("persisted", video_id=video_id)
+            logger.info(f"✅ Generation item {item_id} ('{topic}') completed as video {video_id}")
+        finally:
+            db.close()
+
+    async def run_worker(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        stop_event: Optional[asyncio.Event] = None,
+        drain: bool = False
+    ):
+        """
+        Poll the database for due items and process them
+
+        Args:
+            worker_id: Identifier recorded on claimed items
+            concurrency: Maximum items processed at once
+            poll_interval: Seconds to sleep when the queue is empty
+            stop_event: Set to stop claiming new items
+            drain: Exit once the queue has no due items left
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = concurrency or settings.job_worker_concurrency
+        poll_interval = poll_interval or settings.job_poll_interval_seconds
+        stop_event = stop_event or asyncio.Event()
+        writer = CompletionWriter(self, max_items=concurrency, interval=settings.job_flush_interval_seconds)
+        in_flight = set()
+
+        logger.info(f"👷 Generation worker {worker_id} started (concurrency={concurrency})")
+
+        while not stop_event.is_set():
+            db = SessionLocal()
+            try:
+                self.requeue_stale(db)
+                while len(in_flight) < concurrency:
+                    item_id = self.claim(db, worker_id)
+                    if item_id is None:
+                        break
+                    task = asyncio.create_task(self.process_item(item_id, writer))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+            except Exception as e:
+                logger.error(f"Generation worker {worker_id} failed to claim work: {e}")
+            finally:
+                db.close()
+
+            if drain and not in_flight:
+                break
+
+            # Wake up early when a slot frees up, otherwise poll again later
+            try:
+                waiters = [asyncio.create_task(stop_event.wait())]
+                if len(in_flight) >= concurrency:
+                    waiters += list(in_flight)
+                await asyncio.wait(waiters, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiters[0].cancel()
+
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        logger.info(f"👷 Generation worker {worker_id} stopped")
+
+    def get_job(self, db: Session, job_id: int) -> Optional[GenerationJob]:
+        """Get a job with its items"""
+        return db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+
+
+# Global instance
+generation_job_queue = GenerationJobQueue()
@@ -0,0 +1,225 @@
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Optional, Any, Awaitable, Callable, Tuple
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, Response, UploadFile
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from ..models.idempotency import IdempotencyRecord, IdempotencyStatus
+from ..database import session_scope
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.5  # How often a duplicate re-checks an original running in another process
+PURGE_INTERVAL_SECONDS = 3600
+
+
+async def hash_upload(file: UploadFile, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of an uploaded file's content; the file is rewound afterwards"""
+    digest = hashlib.sha256()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Replays the stored response of a write request retried with the same Idempotency-Key
+
+    The first request with a key inserts an in-progress record (the unique
+    constraint on user, endpoint and key decides the race, across processes
+    too) and runs the work. Its response is stored and replayed to later
+    requests with the same key for IDEMPOTENCY_TTL_HOURS. Duplicates that
+    arrive while the original is still running wait for it. If the original
+    fails, its record is removed so a retry runs the work again.
+    """
+
+    def __init__(self):
+        self._running: Dict[Tuple[int, str, str], asyncio.Event] = {}
+        self._last_purge = 0.0
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.conflicts = 0
+
+    def fingerprint(self, endpoint: str, params: Dict[str, Any]) -> str:
+        """Hash the parameters that define a request, so a key can't be reused for a different one"""
+        payload = json.dumps([endpoint, jsonable_encoder(params)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _filter(self, query, user_id: int, endpoint: str, key: str):
+        return query.filter(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.endpoint == endpoint,
+            IdempotencyRecord.key == key
+        )
+
+    def _claim(self, user_id: int, endpoint: str, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Insert an in-progress record; returns None if this request now owns the key, else the existing record"""
+        now = datetime.now(timezone.utc)
+        self._purge_expired(now)
+
+        with session_scope() as session:
+            # Expired and abandoned records no longer hold the key
+            self._filter(session.query(IdempotencyRecord), user_id, endpoint, key).filter(or_(
+                IdempotencyRecord.expires_at <= now,
+                and_(
+                    IdempotencyRecord.status == IdempotencyStatus.IN_PROGRESS,
+                    IdempotencyRecord.locked_until <= now
+                )
+            )).delete(synchronize_session=False)
+
+        try:
+            with session_scope() as session:
+                session.add(IdempotencyRecord(
+                    user_id=user_id,
+                    endpoint=endpoint,
+                    key=key,
+                    fingerprint=fingerprint,
+                    status=IdempotencyStatus.IN_PROGRESS,
+                    locked_until=now + timedelta(seconds=settings.idempotency_lock_seconds),
+                    expires_at=now + timedelta(hours=settings.idempotency_ttl_hours)
+                ))
+            return None
+        except IntegrityError:
+            pass
+
+        with session_scope() as session:
+            record = self._filter(session.query(IdempotencyRecord), user_id, endpoint, key).first()
+            if record is None:
+                # The original failed and released the key in the meantime
+                return {"status": None, "fingerprint": fingerprint}
+            return {"status": record.status, "fingerprint": record.fingerprint, "response": record.response}
+
+    def _complete(self, user_id: int, endpoint: str, key: str, result: Any):
+        with session_scope() as session:
+            self._filter(session.query(IdempotencyRecord), user_id, endpoint, key).update({
+                "status": IdempotencyStatus.COMPLETED,
+                "response": jsonable_encoder(result),
+                "completed_at": datetime.now(timezone.utc)
+            }, synchronize_session=False)
+
+    def _release(self, user_id: int, endpoint: str, key: str):
+        with session_scope() as session:
+            self._filter(session.query(IdempotencyRecord), user_id, endpoint, key).delete(synchronize_session=False)
+
+    def _purge_expired(self, now: datetime):
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        with session_scope() as session:
+            purged = session.query(IdempotencyRecord).filter(
+                IdempotencyRecord.expires_at <= now
+            ).delete(synchronize_session=False)
+        if purged:
+            logger.info(f"🧹 Purged {purged} expired idempotency records")
+
+    async def run(
+        self,
+        user_id: int,
+        endpoint: str,
+        key: Optional[str],
+        fingerprint: Optional[str],
+        execute: Callable[[], Awaitable[Any]],
+        response: Optional[Response] = None
+    ) -> Any:
+        """
+        Run `execute()` once per Idempotency-Key
+
+        Args:
+            user_id: ID of the requesting user (keys are scoped per user and endpoint)
+            endpoint: Name of the endpoint
+            key: Value of the Idempotency-Key header; without one the work just runs
+            fingerprint: fingerprint() of the request parameters
+            execute: Coroutine function doing the work and returning the response body
+            response: Response to mark replays on with an Idempotent-Replayed header
+
+        Returns:
+            The response body, stored or fresh
+        """
+        if not key:
+            return await execute()
+        if len(key) > 255:
+            raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+
+        scope = (user_id, endpoint, key)
+        deadline = time.monotonic() + settings.idempotency_wait_seconds
+        waited = False
+
+        while True:
+            existing = self._claim(user_id, endpoint, key, fingerprint)
+            if existing is None:
+                break
+
+            if existing["fingerprint"] != fingerprint:
+                self.conflicts += 1
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+
+            if existing["status"] == IdempotencyStatus.COMPLETED:
+                self.replayed += 1
+                if response is not None:
+                    response.headers["Idempotent-Replayed"] = "true"
+                return existing["response"]
+
+            if existing["status"] is None:
+                continue
+
+            # The original is still running: wait for it rather than doing the work twice
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+            if not waited:
+                waited = True
+                self.waited += 1
+
+            running = self._running.get(scope)
+            if running:
+                try:
+                    await asyncio.wait_for(running.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Running in another process; poll the record
+                await asyncio.sleep(min(POLL_SECONDS, remaining))
+
+        done = self._running[scope] = asyncio.Event()
+        try:
+            result = await execute()
+            self._complete(user_id, endpoint, key, result)
+        except BaseException:
+            self._release(user_id, endpoint, key)
+            raise
+        finally:
+            done.set()
+            self._running.pop(scope, None)
+
+        self.executed += 1
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._running),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "conflicts": self.conflicts
+        }
+
+
+# Global instance
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,265 @@
+import math
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast DB queries up to slow provider calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# (name, type, help, [(labels, value)]) as returned by collectors
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()  # DB events also fire from threadpool threads
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Metric {self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics in the Prometheus text exposition format
+
+    Instrumented code updates counters, gauges and histograms as it runs.
+    Numbers that services already keep (cache hits, pool usage, queue
+    lengths) are read by collectors at scrape time instead, so the hot paths
+    don't pay for them twice. Metrics are per process; with several workers,
+    scrape each one.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Register a function returning metric families to read at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name: str, type: str, help: str, samples: Iterable[Tuple[str, Dict[str, Any], float]]):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+            for sample_name, labels, value in samples:
+                if value is not None:
+                    lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for metric in self._metrics.values():
+            family(metric.name, metric.type, metric.help, metric.samples())
+
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                # One broken collector must not take the whole scrape down
+                logger.error(f"Metrics collector {collector.__name__} failed: {e}")
+                continue
+            for name, type, help, samples in families:
+                family(name, type, help, ((name, labels, value) for labels, value in samples))
+
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "edutok_http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+http_request_seconds = metrics.histogram(
+    "edutok_http_request_duration_seconds", "Time to response headers by route template", ["method", "route"]
+)
+http_in_progress = metrics.gauge("edutok_http_requests_in_progress", "HTTP requests being handled")
+stream_bytes = metrics.counter("edutok_video_stream_bytes_total", "Bytes sent by /data/{filename}")
+stream_requests = metrics.counter(
+    "edutok_video_stream_requests_total", "/data/{filename} requests, whole file or byte range", ["kind"]
+)
+db_queries = metrics.counter("edutok_db_queries_total", "SQL statements executed", ["operation"])
+db_query_seconds = metrics.histogram("edutok_db_query_duration_seconds", "SQL statement execution time", ["operation"])
+stage_seconds = metrics.histogram(
+    "edutok_generation_stage_duration_seconds", "Generation pipeline stage durations", ["pipeline", "stage"]
+)
+provider_call_seconds = metrics.histogram(
+    "edutok_ai_provider_call_duration_seconds", "AI provider call latency per attempt", ["provider", "outcome"]
+)
+
+
+def instrument_engine(engine: Engine):
+    """Count and time every statement run on `engine`"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_queries.inc(operation=operation)
+        db_query_seconds.observe(time.perf_counter() - started, operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # The failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get("metrics_started"):
+            context.connection.info["metrics_started"].pop()
+
+
+def collect_service_stats() -> List[Family]:
+    """Cache hit ratios, connection pools and provider queues from the services' own counters"""
+    from ..database import engine
+    from .script_cache import script_cache
+    from .audio_segments import audio_segment_cache
+    from .provider_registry import provider_registry
+    from .resilience import openai_policy, elevenlabs_policy
+
+    caches = {"script": script_cache, "audio_segment": audio_segment_cache}
+    lookups, ratios = [], []
+    for name, cache in caches.items():
+        lookups.append(({"cache": name, "result": "hit"}, cache.hits))
+        lookups.append(({"cache": name, "result": "miss"}, cache.misses))
+        total = cache.hits + cache.misses
+        ratios.append(({"cache": name}, cache.hits / total if total else None))
+
+    pool = engine.pool
+    db_pool = [
+        ({"state": state}, getattr(pool, method)())
+        for state, method in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"))
+        if hasattr(pool, method)
+    ]
+
+    provider_pools = [
+        ({"provider": name}, stats["open_connections"])
+        for name, stats in provider_registry.get_pool_stats().items()
+    ]
+
+    queued = []
+    for policy in (openai_policy, elevenlabs_policy):
+        for lane, stats in policy.scheduler.get_stats().items():
+            queued.append(({"provider": policy.name, "lane": lane}, stats["queued"]))
+
+    return [
+        ("edutok_cache_lookups_total", "counter", "Cache lookups by result", lookups),
+        ("edutok_cache_hit_ratio", "gauge", "Share of cache lookups that hit", ratios),
+        ("edutok_db_pool_connections", "gauge", "Database connection pool usage", db_pool),
+        ("edutok_ai_http_pool_open_connections", "gauge", "Open connections in each AI provider's pool", provider_pools),
+        ("edutok_ai_scheduler_queued", "gauge", "Provider calls waiting for quota by lane", queued)
+    ]
+
+
+metrics.add_collector(collect_service_stats)
@@ -0,0 +1,153 @@
+import math
+import logging
+from typing import Dict, List, Optional, Any
+from ..config import settings
+from .resilience import LatencyTracker, remaining_time
+
+logger = logging.getLogger(__name__)
+
+MIN_SCRIPT_TOKENS = 300
+FALLBACK_HEADROOM = 1.25  # Time kept back for the next tier, as a multiple of its p95
+REPROBE_AFTER_SKIPS = 20
+
+
+class ScriptRoute:
+    """The model tiers to try for one script, best first, and the token budget"""
+
+    def __init__(self, models: List[str], max_tokens: int, budget_seconds: Optional[float], reason: str):
+        self.models = models
+        self.max_tokens = max_tokens
+        self.budget_seconds = budget_seconds
+        self.reason = reason
+        self.attempts: List[Dict[str, Any]] = []
+
+    @property
+    def model(self) -> str:
+        return self.models[0]
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "model": self.attempts[-1]["model"] if self.attempts else self.model,
+            "max_tokens": self.max_tokens,
+            "budget_seconds": round(self.budget_seconds, 2) if self.budget_seconds is not None else None,
+            "reason": self.reason,
+            "attempts": self.attempts
+        }
+
+
+class ModelRouter:
+    """
+    Picks the chat model and token budget for a script
+
+    SCRIPT_MODEL_TIERS lists models from preferred to fastest. The completion
+    budget scales with the requested duration. The latency budget is
+    SCRIPT_LATENCY_SLO_SECONDS, or whatever is left of the request deadline
+    if that is less. Each tier but the last keeps back enough of the budget
+    for the next tier to answer. A tier whose rolling p95 latency doesn't fit
+    its share is skipped, and if none fits the fastest tier is used. Tiers
+    without enough samples yet are assumed to fit.
+    """
+
+    def __init__(self):
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.routed: Dict[str, int] = {}
+        self._skipped: Dict[str, int] = {}
+        self.fallbacks = 0
+
+    @property
+    def tiers(self) -> List[str]:
+        return [model.strip() for model in settings.script_model_tiers.split(",") if model.strip()]
+
+    def token_budget(self, duration_minutes: int) -> int:
+        """Completion tokens for a script of `duration_minutes` of narration"""
+        budget = math.ceil(max(duration_minutes, 1) * settings.script_tokens_per_minute)
+        return max(MIN_SCRIPT_TOKENS, min(budget, settings.script_max_tokens_cap))
+
+    def p95(self, model: str) -> Optional[float]:
+        """Rolling p95 latency of a model, or None until it has enough samples"""
+        tracker = self.latency.get(model)
+        if tracker is None or len(tracker) < settings.script_route_min_samples:
+            return None
+        return tracker.percentile(95)
+
+    def route(self, duration_minutes: int) -> ScriptRoute:
+        """Choose the tiers to try for a script, best first"""
+        tiers = self.tiers
+        max_tokens = self.token_budget(duration_minutes)
+
+        budget = settings.script_latency_slo_seconds or None
+        remaining = remaining_time()
+        if remaining is not None and (budget is None or remaining < budget):
+            budget = max(remaining, 0.0)
+
+        if budget is None:
+            start, reason = 0, "no latency budget"
+        else:
+            fitting = [index for index, model in enumerate(tiers) if self._fits(tiers, index, budget)]
+            if fitting:
+                start = fitting[0]
+                reason = "primary" if start == 0 else f"p95 of {', '.join(tiers[:start])} over budget"
+            else:
+                start = min(range(len(tiers)), key=lambda index: self.p95(tiers[index]))
+                reason = "no tier fits the budget; fastest"
+
+            # A skipped tier gets no new samples, so now and then send it a call to see if it recovered
+            for index in range(start):
+                self._skipped[tiers[index]] = self._skipped.get(tiers[index], 0) + 1
+                if self._skipped[tiers[index]] >= REPROBE_AFTER_SKIPS:
+                    self._skipped[tiers[index]] = 0
+                    start, reason = index, f"re-probing {tiers[index]}"
+                    break
+
+        route = ScriptRoute(tiers[start:], max_tokens, budget, reason)
+        self.routed[route.model] = self.routed.get(route.model, 0) + 1
+        return route
+
+    def _available(self, models: List[str], index: int, left: float) -> float:
+        """Share of `left` seconds for models[index], keeping enough back for the next tier to answer"""
+        if index == len(models) - 1:
+            return left
+        next_p95 = self.p95(models[index + 1])
+        if next_p95 is None:
+            return left / 2
+        return max(left - next_p95 * FALLBACK_HEADROOM, 0.0)
+
+    def _fits(self, models: List[str], index: int, budget: float) -> bool:
+        p95 = self.p95(models[index])
+        return p95 is None or p95 < self._available(models, index, budget)
+
+    def attempt_budget(self, route: ScriptRoute, index: int, elapsed: float) -> Optional[float]:
+        """Time the attempt on route.models[index] may take, `elapsed` seconds into the route"""
+        if route.budget_seconds is None:
+            return None
+        return self._available(route.models, index, max(route.budget_seconds - elapsed, 0.0))
+
+    def record(self, model: str, seconds: float):
+        """Record a call's latency; timed-out attempts are recorded at their budget, which counts as not fitting"""
+        self.latency.setdefault(model, LatencyTracker()).record(seconds)
+
+    def record_fallback(self, model: str, reason: str):
+        self.fallbacks += 1
+        logger.warning(f"🔀 Script model {model} fell back: {reason}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        models = {}
+        for model in self.tiers:
+            tracker = self.latency.get(model)
+            p50 = tracker.percentile(50) if tracker else None
+            p95 = tracker.percentile(95) if tracker else None
+            models[model] = {
+                "samples": len(tracker) if tracker else 0,
+                "latency_p50_seconds": round(p50, 3) if p50 is not None else None,
+                "latency_p95_seconds": round(p95, 3) if p95 is not None else None,
+                "routed": self.routed.get(model, 0)
+            }
+        return {
+            "slo_seconds": settings.script_latency_slo_seconds,
+            "models": models,
+            "fallbacks": self.fallbacks
+        }
+
+
+# Global instance
+model_router = ModelRouter()
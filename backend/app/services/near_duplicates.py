@@ -0,0 +1,279 @@
+import re
+import random
+import hashlib
+import logging
+import itertools
+from typing import Dict, List, Optional, Any, Set, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from ..models.video import Video
+from ..models.dedup import ScriptSignature, ScriptLSHBucket
+from ..database import session_scope
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_PRIME = (1 << 61) - 1  # Mersenne prime for the universal hash family
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r"[a-z0-9']+")
+_PLACEHOLDER = re.compile(r"\[[^\]]*\]")
+
+
+class NearDuplicateError(Exception):
+    """The script is a near-duplicate of one being generated right now"""
+
+
+class Screening:
+    """Outcome of checking one script against the index"""
+
+    def __init__(
+        self,
+        signature: Optional[List[int]],
+        duplicate_of: Optional[int] = None,
+        similarity: float = 0.0,
+        pending: bool = False
+    ):
+        self.signature = signature
+        self.duplicate_of = duplicate_of  # ID of the persisted near-duplicate video
+        self.similarity = similarity
+        self.pending = pending  # The near-duplicate is still being generated
+        self.token: Optional[int] = None
+
+    @property
+    def duplicate(self) -> bool:
+        return self.duplicate_of is not None or self.pending
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over video scripts
+
+    Each script is reduced to DEDUP_NUM_PERM minimum hashes of its word
+    5-gram shingles; the share of equal minimums estimates the Jaccard
+    similarity of two scripts. The signature is cut into DEDUP_BANDS bands
+    and each band is stored as a bucket row, so candidates are found with
+    one indexed lookup instead of a scan, and only they are compared.
+    Scripts still being generated are held in memory so concurrent topics
+    of a batch are checked against each other too. Matches are scoped to
+    one creator: another owner's video is never reused.
+    """
+
+    def __init__(self):
+        self._permutations = None
+        self._pending: Dict[int, Tuple[int, List[int]]] = {}  # token -> (creator ID, signature)
+        self._pending_buckets: Dict[str, Set[int]] = {}
+        self._tokens = itertools.count(1)
+        self.screened = 0
+        self.duplicates = 0
+
+    @property
+    def permutations(self):
+        if self._permutations is None or len(self._permutations[0]) != settings.dedup_num_perm:
+            # Fixed seed: stored signatures must stay comparable across processes and restarts
+            rng = random.Random(1)
+            self._permutations = (
+                [rng.randint(1, _PRIME - 1) for _ in range(settings.dedup_num_perm)],
+                [rng.randint(0, _PRIME - 1) for _ in range(settings.dedup_num_perm)]
+            )
+        return self._permutations
+
+    def signature(self, script: Optional[str]) -> Optional[List[int]]:
+        """MinHash signature of a script, or None for empty and template placeholder scripts"""
+        if not script:
+            return None
+
+        paragraphs = [" ".join(paragraph.split()) for paragraph in re.split(r"\n\s*\n", script)]
+        if any(_PLACEHOLDER.fullmatch(paragraph) for paragraph in paragraphs):
+            # Fallback templates differ only by topic; they are not real content to compare
+            return None
+
+        words = _WORD.findall(script.lower())
+        if not words:
+            return None
+
+        size = settings.dedup_shingle_words
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+            for shingle in shingles
+        ]
+
+        a_values, b_values = self.permutations
+        return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in zip(a_values, b_values)]
+
+    def buckets(self, signature: List[int]) -> List[str]:
+        """LSH bucket keys of a signature, one per band"""
+        rows = max(len(signature) // settings.dedup_bands, 1)
+        keys = []
+        for band in range(settings.dedup_bands):
+            values = signature[band * rows:(band + 1) * rows]
+            if not values:
+                break
+            digest = hashlib.blake2b(",".join(map(str, values)).encode("ascii"), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    @staticmethod
+    def similarity(a: List[int], b: List[int]) -> float:
+        """Estimated Jaccard similarity of the scripts behind two signatures"""
+        if not a or len(a) != len(b):
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+    def find(self, session: Session, signature: List[int], creator_id: int) -> Optional[Screening]:
+        """Most similar persisted script of the creator at or above the threshold, if any"""
+        candidate_ids = [
+            video_id for (video_id,) in session.query(ScriptLSHBucket.video_id)
+            .join(Video, Video.id == ScriptLSHBucket.video_id)
+            .filter(ScriptLSHBucket.bucket.in_(self.buckets(signature)), Video.creator_id == creator_id)
+            .distinct()
+            .all()
+        ]
+        if not candidate_ids:
+            return None
+
+        best = None
+        for video_id, stored in session.query(ScriptSignature.video_id, ScriptSignature.signature).filter(
+            ScriptSignature.video_id.in_(candidate_ids)
+        ):
+            score = self.similarity(signature, stored)
+            if score >= settings.dedup_similarity_threshold and (best is None or score > best.similarity):
+                best = Screening(signature, duplicate_of=video_id, similarity=score)
+        return best
+
+    def _find_pending(self, signature: List[int], creator_id: int) -> Optional[Screening]:
+        tokens = set()
+        for bucket in self.buckets(signature):
+            tokens |= self._pending_buckets.get(bucket, set())
+
+        for token in tokens:
+            owner, pending = self._pending[token]
+            if owner != creator_id:
+                continue
+            score = self.similarity(signature, pending)
+            if score >= settings.dedup_similarity_threshold:
+                return Screening(signature, similarity=score, pending=True)
+        return None
+
+    def screen(self, script: Optional[str], creator_id: int) -> Screening:
+        """
+        Check a script for near-duplicates before spending TTS on it
+
+        A script that is not a duplicate is held as in-flight until
+        release(), so near-duplicates generated concurrently are caught.
+
+        Args:
+            script: The generated script
+            creator_id: Creator the video is generated for; only their videos are matched
+
+        Returns:
+            Screening with the near-duplicate's video ID, or pending=True
+            when it is still being generated
+        """
+        signature = self.signature(script) if settings.dedup_enabled else None
+        if signature is None:
+            return Screening(None)
+
+        self.screened += 1
+        with session_scope() as session:
+            match = self.find(session, signature, creator_id)
+        match = match or self._find_pending(signature, creator_id)
+        if match:
+            self.duplicates += 1
+            return match
+
+        screening = Screening(signature)
+        screening.token = next(self._tokens)
+        self._pending[screening.token] = (creator_id, signature)
+        for bucket in self.buckets(signature):
+            self._pending_buckets.setdefault(bucket, set()).add(screening.token)
+        return screening
+
+    def release(self, screening: Screening):
+        """Stop holding a screened script as in-flight (once it is persisted or abandoned)"""
+        if screening.token is None:
+            return
+        pending = self._pending.pop(screening.token, None)
+        if pending is None:
+            return
+        _, signature = pending
+        for bucket in self.buckets(signature):
+            tokens = self._pending_buckets.get(bucket)
+            if tokens:
+                tokens.discard(screening.token)
+                if not tokens:
+                    del self._pending_buckets[bucket]
+
+    def add(self, session: Session, video_id: int, signature: Optional[List[int]]):
+        """Index a persisted video's signature (in the caller's unit of work)"""
+        if signature is None:
+            return
+        session.add(ScriptSignature(video_id=video_id, signature=signature))
+        session.add_all(ScriptLSHBucket(bucket=bucket, video_id=video_id) for bucket in self.buckets(signature))
+
+    def backfill(self, db: Session, batch_size: int = 500, rebuild: bool = False) -> Dict[str, int]:
+        """
+        Index every video with a script that has no signature yet
+
+        Args:
+            db: Database session
+            batch_size: Videos read and signatures inserted per round trip
+            rebuild: Drop all signatures first (after changing DEDUP_* settings)
+
+        Returns:
+            Counts of scanned, indexed and skipped (placeholder) videos
+        """
+        if rebuild:
+            db.query(ScriptLSHBucket).delete(synchronize_session=False)
+            db.query(ScriptSignature).delete(synchronize_session=False)
+            db.commit()
+
+        indexed_ids = db.query(ScriptSignature.video_id)
+        report = {"scanned": 0, "indexed": 0, "skipped": 0}
+        last_id = 0
+
+        while True:
+            batch = (
+                db.query(Video.id, Video.script_content)
+                .filter(Video.id > last_id, Video.script_content.isnot(None), ~Video.id.in_(indexed_ids))
+                .order_by(Video.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            signature_rows, bucket_rows = [], []
+            for video_id, script in batch:
+                signature = self.signature(script)
+                if signature is None:
+                    report["skipped"] += 1
+                    continue
+                signature_rows.append({"video_id": video_id, "signature": signature})
+                bucket_rows.extend({"bucket": bucket, "video_id": video_id} for bucket in self.buckets(signature))
+
+            # executemany inserts, one round trip per table and batch
+            if signature_rows:
+                db.execute(insert(ScriptSignature), signature_rows)
+                db.execute(insert(ScriptLSHBucket), bucket_rows)
+            db.commit()
+
+            report["scanned"] += len(batch)
+            report["indexed"] += len(signature_rows)
+            logger.info(f"🔎 Indexed {report['indexed']} script signatures ({report['scanned']} videos scanned)")
+
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.dedup_enabled,
+            "threshold": settings.dedup_similarity_threshold,
+            "screened": self.screened,
+            "duplicates": self.duplicates,
+            "in_flight": len(self._pending)
+        }
+
+
+# Global instance
+near_duplicate_index = NearDuplicateIndex()
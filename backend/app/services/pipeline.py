@@ -0,0 +1,168 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Any, Awaitable, Callable, Iterable
+from .metrics import stage_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """A pipeline stage raised; the original exception is chained"""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], requires: Iterable[str]):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+
+class PipelineResult:
+    """Stage outputs plus timing for one pipeline run"""
+
+    def __init__(self, outputs: Dict[str, Any], timings: Dict[str, Dict[str, float]], total_ms: float, critical_path_ms: float):
+        self.outputs = outputs
+        self.timings = timings
+        self.total_ms = total_ms
+        self.critical_path_ms = critical_path_ms
+
+    def __getitem__(self, name: str) -> Any:
+        return self.outputs[name]
+
+    def timing_metadata(self) -> Dict[str, Any]:
+        """Per-stage timings in the shape stored in generation_metadata"""
+        return {
+            "stage_timings": self.timings,
+            "pipeline_ms": self.total_ms,
+            "critical_path_ms": self.critical_path_ms
+        }
+
+
+class Pipeline:
+    """
+    Small DAG executor for generation stages
+
+    Each stage declares the names it requires: pipeline inputs or other
+    stages. A stage starts as soon as everything it requires is available
+    and is called with those values as keyword arguments, so stages that
+    don't depend on each other run concurrently and the run takes as long
+    as its critical path.
+
+        pipeline = Pipeline("video")
+        pipeline.add_stage("voice", make_voice, requires=["script"])
+        pipeline.add_stage("visuals", make_visuals, requires=["script"])
+        pipeline.add_stage("record", build_row, requires=["voice", "visuals"])
+        result = await pipeline.run(script=text)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Awaitable[Any]], requires: Iterable[str] = ()) -> "Pipeline":
+        if name in self.stages:
+            raise ValueError(f"Pipeline '{self.name}' already has a stage named '{name}'")
+        self.stages[name] = Stage(name, func, requires)
+        return self
+
+    def _validate(self, inputs: Dict[str, Any]):
+        for stage in self.stages.values():
+            for dependency in stage.requires:
+                if dependency not in self.stages and dependency not in inputs:
+                    raise ValueError(f"Stage '{stage.name}' requires unknown '{dependency}'")
+
+        # Depth-first search for cycles
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done or name not in self.stages:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline '{self.name}' has a dependency cycle through '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].requires:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _critical_path_ms(self, timings: Dict[str, Dict[str, float]]) -> float:
+        finish: Dict[str, float] = {}
+
+        def longest(name: str) -> float:
+            if name not in self.stages:
+                return 0.0
+            if name not in finish:
+                before = max((longest(dependency) for dependency in self.stages[name].requires), default=0.0)
+                finish[name] = before + timings[name]["duration_ms"]
+            return finish[name]
+
+        return round(max((longest(name) for name in self.stages), default=0.0), 1)
+
+    async def run(
+        self,
+        on_stage_start: Optional[Callable[[str], Awaitable[None]]] = None,
+        **inputs: Any
+    ) -> PipelineResult:
+        """
+        Run every stage, each as soon as its requirements are met
+
+        Args:
+            on_stage_start: Awaited with the stage name before each stage runs
+            **inputs: Values stages can require besides other stages' outputs
+
+        Returns:
+            PipelineResult with each stage's output and timing
+        """
+        self._validate(inputs)
+
+        started = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+        timings: Dict[str, Dict[str, float]] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            kwargs = {}
+            for dependency in stage.requires:
+                kwargs[dependency] = await tasks[dependency] if dependency in self.stages else inputs[dependency]
+
+            if on_stage_start:
+                await on_stage_start(stage.name)
+
+            stage_started = time.monotonic()
+            try:
+                return await stage.func(**kwargs)
+            except Exception as e:
+                raise PipelineError(stage.name, e) from e
+            finally:
+                duration = time.monotonic() - stage_started
+                timings[stage.name] = {
+                    "start_ms": round((stage_started - started) * 1000, 1),
+                    "duration_ms": round(duration * 1000, 1)
+                }
+                # Per-item names like "script:3" share one series
+                stage_seconds.observe(duration, pipeline=self.name.split(":")[0], stage=stage.name.split(":")[0])
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            # Let cancelled stages unwind before reporting the failure
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        total_ms = round((time.monotonic() - started) * 1000, 1)
+        outputs = {name: task.result() for name, task in tasks.items()}
+        logger.debug(f"Pipeline {self.name} finished in {total_ms}ms: {timings}")
+        return PipelineResult(outputs, timings, total_ms, self._critical_path_ms(timings))
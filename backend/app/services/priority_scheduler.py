@@ -0,0 +1,197 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from enum import Enum as PyEnum
+from typing import Dict, Optional, Any, AsyncIterator, Deque, Iterator, Tuple
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(str, PyEnum):
+    INTERACTIVE = "interactive"  # A user is waiting on the response
+    BATCH = "batch"  # Background generation jobs
+
+
+# (lane, user id, fair-share weight) of the work running in this context
+_priority: ContextVar[Tuple[Lane, Optional[int], float]] = ContextVar(
+    "ai_priority", default=(Lane.INTERACTIVE, None, 1.0)
+)
+
+
+@contextmanager
+def priority_scope(lane: Lane, user_id: Optional[int] = None, weight: float = 1.0) -> Iterator[None]:
+    """Schedule provider calls made inside this block in `lane`, on behalf of `user_id`"""
+    token = _priority.set((lane, user_id, weight))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Tuple[Lane, Optional[int], float]:
+    return _priority.get()
+
+
+class _Waiter:
+    __slots__ = ("future", "lane", "user_id", "weight", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, lane: Lane, user_id: Optional[int], weight: float):
+        self.future = future
+        self.lane = lane
+        self.user_id = user_id
+        self.weight = weight
+        self.enqueued_at = time.monotonic()
+
+
+class _LaneQueue:
+    """
+    Waiters of one lane, shared fairly between users
+
+    Start-time fair queueing: each user has a virtual time that advances by
+    1/weight per call dispatched, and the user with the lowest virtual time
+    goes next. A user who was idle restarts at the lane's clock instead of
+    spending credit saved up while away.
+    """
+
+    def __init__(self):
+        self.users: Dict[Optional[int], Deque[_Waiter]] = {}
+        self.virtual_time: Dict[Optional[int], float] = {}
+        self.clock = 0.0
+
+    def push(self, waiter: _Waiter):
+        self.users.setdefault(waiter.user_id, deque()).append(waiter)
+
+    def _drop_abandoned(self):
+        for user_id in list(self.users):
+            waiters = self.users[user_id]
+            while waiters and waiters[0].future.done():
+                waiters.popleft()
+            if not waiters:
+                del self.users[user_id]
+                if self.virtual_time.get(user_id, 0.0) <= self.clock:
+                    self.virtual_time.pop(user_id, None)
+
+    def oldest(self) -> Optional[float]:
+        self._drop_abandoned()
+        return min((waiters[0].enqueued_at for waiters in self.users.values()), default=None)
+
+    def pop(self) -> Optional[_Waiter]:
+        self._drop_abandoned()
+        if not self.users:
+            return None
+
+        user_id = min(self.users, key=lambda user: max(self.virtual_time.get(user, 0.0), self.clock))
+        waiter = self.users[user_id].popleft()
+        if not self.users[user_id]:
+            del self.users[user_id]
+        self.charge(user_id, waiter.weight)
+        return waiter
+
+    def charge(self, user_id: Optional[int], weight: float):
+        """Advance a user's virtual time for one dispatched call"""
+        start = max(self.virtual_time.get(user_id, 0.0), self.clock)
+        self.clock = start
+        self.virtual_time[user_id] = start + 1.0 / max(weight, 0.01)
+
+    def __len__(self) -> int:
+        return sum(1 for waiters in self.users.values() for waiter in waiters if not waiter.future.done())
+
+
+class _LaneStats:
+    def __init__(self, window: int = 500):
+        self.dispatched = 0
+        self.promoted = 0
+        self._waits = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.dispatched += 1
+        self._waits.append(seconds)
+
+    def get_stats(self, queued: int) -> Dict[str, Any]:
+        ordered = sorted(self._waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 1)
+
+        return {
+            "queued": queued,
+            "dispatched": self.dispatched,
+            "starvation_promotions": self.promoted,
+            "wait_p50_ms": percentile(50),
+            "wait_p95_ms": percentile(95),
+            "wait_max_ms": round(ordered[-1] * 1000, 1) if ordered else None
+        }
+
+
+class PriorityScheduler:
+    """
+    Decides who reserves provider quota next
+
+    Only one caller at a time is let into the provider's rate limiter; the
+    rest queue here. Interactive work always goes before batch work, except
+    that a batch call waiting longer than AI_SCHEDULER_BATCH_MAX_WAIT_SECONDS
+    is served next, so batches slow down under interactive load but never
+    stop. Within a lane users share the quota by weight.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._busy = False
+        self._queues = {lane: _LaneQueue() for lane in Lane}
+        self._stats = {lane: _LaneStats() for lane in Lane}
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        batch_oldest = self._queues[Lane.BATCH].oldest()
+        if batch_oldest is not None and time.monotonic() - batch_oldest >= settings.ai_scheduler_batch_max_wait_seconds:
+            if len(self._queues[Lane.INTERACTIVE]):
+                self._stats[Lane.BATCH].promoted += 1
+            return self._queues[Lane.BATCH].pop()
+
+        return self._queues[Lane.INTERACTIVE].pop() or self._queues[Lane.BATCH].pop()
+
+    def _release(self):
+        waiter = self._next_waiter()
+        if waiter is None:
+            self._busy = False
+        else:
+            # Hand the turn straight over; _busy stays set
+            waiter.future.set_result(None)
+
+    @asynccontextmanager
+    async def turn(self) -> AsyncIterator[None]:
+        """Wait for this context's turn to reserve quota; hold it for the block"""
+        if not settings.ai_scheduler_enabled:
+            yield
+            return
+
+        lane, user_id, weight = current_priority()
+        started = time.monotonic()
+
+        if self._busy:
+            waiter = _Waiter(asyncio.get_running_loop().create_future(), lane, user_id, weight)
+            self._queues[lane].push(waiter)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                # Cancelled just after being handed the turn: pass it on
+                if waiter.future.done() and not waiter.future.cancelled():
+                    self._release()
+                raise
+        else:
+            self._busy = True
+            self._queues[lane].charge(user_id, weight)
+
+        self._stats[lane].record(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {lane.value: self._stats[lane].get_stats(len(self._queues[lane])) for lane in Lane}
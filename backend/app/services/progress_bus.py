@@ -0,0 +1,203 @@
+import json
+import time
+import asyncio
+import logging
+import importlib.util
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any, Set, AsyncIterator
+from ..config import settings
+
+# Optional dependency for cross-process delivery, imported only when used
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "edutok:progress:"
+LAST_EVENT_PREFIX = "edutok:progress-last:"
+
+# How long, and for how many channels in memory, the last event is kept
+LAST_EVENT_TTL_SECONDS = 3600
+LAST_EVENT_LIMIT = 1024
+
+# Generation pipeline stages and the overall percentage reached when each starts
+STAGES = {
+    "queued": 0,
+    "script": 5,
+    "voice": 35,
+    "video": 70,
+    "persisted": 100
+}
+
+
+def _close_redis_sockets(client):
+    """Close a Redis client's pooled sockets without its event loop, which has already closed"""
+    pool = getattr(client, "connection_pool", None)
+    connections = list(getattr(pool, "_available_connections", [])) + list(getattr(pool, "_in_use_connections", []))
+    for connection in connections:
+        writer = getattr(connection, "_writer", None)
+        sock = writer.get_extra_info("socket") if writer is not None else None
+        if sock is not None:
+            # asyncio hands out a TransportSocket wrapper, which has no close()
+            getattr(sock, "_sock", sock).close()
+
+
+class ProgressBus:
+    """
+    Publish/subscribe bus for generation progress events
+
+    Events are delivered to subscribers in this process directly. With
+    PROGRESS_BUS_BACKEND=redis they go through Redis pub/sub instead, so a
+    client connected to one API worker sees progress from generation
+    workers running anywhere. Redis clients are kept per event loop: a
+    Celery worker runs every task in a fresh asyncio.run(), and a client
+    from a finished loop can't be used again. The last event of each channel is kept, so
+    a client that subscribes mid-generation (or after it ended) can read
+    the current stage with last_event().
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._last: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._redis: Dict[asyncio.AbstractEventLoop, Any] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._warned_missing_redis = False
+
+    @property
+    def uses_redis(self) -> bool:
+        if settings.progress_bus_backend != "redis":
+            return False
+        if not REDIS_AVAILABLE and not self._warned_missing_redis:
+            self._warned_missing_redis = True
+            logger.warning(
+                "⚠️ PROGRESS_BUS_BACKEND=redis but the redis package is not installed; "
+                "progress is only delivered within this process"
+            )
+        return REDIS_AVAILABLE
+
+    def _get_redis(self):
+        loop = asyncio.get_running_loop()
+        client = self._redis.get(loop)
+        if client is None:
+            self._discard_closed_loops()
+            client = self._redis[loop] = self._build_redis()
+        return client
+
+    def _build_redis(self):
+        import redis.asyncio as aioredis
+        return aioredis.from_url(settings.redis_url, decode_responses=True)
+
+    def _discard_closed_loops(self):
+        for loop, client in list(self._redis.items()):
+            if loop.is_closed():
+                del self._redis[loop]
+                _close_redis_sockets(client)
+
+    async def publish(self, channel: str, event: Dict[str, Any]):
+        """Publish an event to every subscriber of `channel`"""
+        event = {**event, "channel": channel, "timestamp": time.time()}
+
+        self._remember(channel, event)
+        if self.uses_redis:
+            try:
+                payload = json.dumps(event, default=str)
+                async with self._get_redis().pipeline(transaction=False) as pipe:
+                    pipe.set(LAST_EVENT_PREFIX + channel, payload, ex=LAST_EVENT_TTL_SECONDS)
+                    pipe.publish(CHANNEL_PREFIX + channel, payload)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                # Progress is advisory; never fail generation because the bus is down
+                logger.warning(f"Progress bus publish failed, delivering locally only: {e}")
+
+        self._deliver(channel, event)
+
+    def _remember(self, channel: str, event: Dict[str, Any]):
+        self._last[channel] = event
+        self._last.move_to_end(channel)
+        while len(self._last) > LAST_EVENT_LIMIT:
+            self._last.popitem(last=False)
+
+    async def last_event(self, channel: str) -> Optional[Dict[str, Any]]:
+        """
+        The most recent event published to `channel`, if it is still kept
+
+        Subscribe first and read this afterwards: an event published in
+        between is then delivered to the subscription rather than lost.
+        """
+        if self.uses_redis:
+            try:
+                payload = await self._get_redis().get(LAST_EVENT_PREFIX + channel)
+                return json.loads(payload) if payload else None
+            except Exception as e:
+                logger.warning(f"Progress bus lookup failed, using this process's events only: {e}")
+
+        event = self._last.get(channel)
+        if event and time.time() - event["timestamp"] > LAST_EVENT_TTL_SECONDS:
+            return None
+        return event
+
+    def _deliver(self, channel: str, event: Dict[str, Any]):
+        for queue in list(self._subscribers.get(channel, ())):
+            queue.put_nowait(event)
+
+    async def _listen(self):
+        """Forward events from Redis to local subscribers"""
+        pubsub = self._get_redis().pubsub()
+        await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "pmessage":
+                    continue
+                channel = message["channel"][len(CHANNEL_PREFIX):]
+                self._deliver(channel, json.loads(message["data"]))
+        finally:
+            await pubsub.close()
+
+    @asynccontextmanager
+    async def subscribe(self, *channels: str) -> AsyncIterator[asyncio.Queue]:
+        """Subscribe to one or more channels; yields a queue of events"""
+        listener = self._listener
+        stale = listener is None or listener.done() or listener.get_loop() is not asyncio.get_running_loop()
+        if self.uses_redis and stale:
+            self._listener = asyncio.create_task(self._listen())
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for channel in channels:
+            self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(queue)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class ProgressReporter:
+    """Publishes stage transitions of one generation to a set of channels"""
+
+    def __init__(self, channels: List[str], **context: Any):
+        self.channels = list(channels)
+        self.context = context
+
+    def add_channel(self, channel: str):
+        if channel not in self.channels:
+            self.channels.append(channel)
+
+    async def stage(self, stage: str, percent: Optional[float] = None, **data: Any):
+        """Report that the generation entered `stage`"""
+        event = {
+            **self.context,
+            **data,
+            "stage": stage,
+            "percent": STAGES.get(stage, 0) if percent is None else percent
+        }
+        for channel in self.channels:
+            await progress_bus.publish(channel, event)
+
+
+# Global instance
+progress_bus = ProgressBus()
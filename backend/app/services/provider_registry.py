@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Any
+from ..config import settings
+from .ai_clients import PooledProviderClient, OpenAIClient, ElevenLabsClient
+
+logger = logging.getLogger(__name__)
+
+# name -> (client class, settings attribute / env var holding the API key, display name, feature disabled without it)
+PROVIDERS = {
+    "openai": (OpenAIClient, "openai_api_key", "OpenAI/ChatGPT", "ChatGPT features"),
+    "elevenlabs": (ElevenLabsClient, "elevenlabs_api_key", "ElevenLabs", "Voice synthesis")
+}
+
+
+class ProviderRegistry:
+    """
+    Process-wide registry of AI provider clients
+
+    Clients are built on first use, so importing the services or creating
+    an AIServiceManager costs nothing, and every caller shares one client
+    (and so one connection pool) per provider. A background probe measures
+    each provider's real round-trip latency every
+    AI_HEALTH_PROBE_INTERVAL_SECONDS; get_health() only reads the result.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Optional[PooledProviderClient]] = {}
+        self._health: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, name: str) -> Optional[PooledProviderClient]:
+        """Get the client for a provider, or None if it has no API key"""
+        if name not in self._clients:
+            client_class, key_setting, display_name, feature = PROVIDERS[name]
+            api_key = getattr(settings, key_setting) or os.getenv(key_setting.upper())
+            if api_key:
+                self._clients[name] = client_class(api_key)
+                logger.info(f"✅ {display_name} service initialized")
+            else:
+                self._clients[name] = None
+                logger.warning(f"⚠️ {display_name} API key not found. {feature} will be disabled.")
+        return self._clients[name]
+
+    @property
+    def openai(self) -> Optional[OpenAIClient]:
+        return self.get("openai")
+
+    @property
+    def elevenlabs(self) -> Optional[ElevenLabsClient]:
+        return self.get("elevenlabs")
+
+    async def probe(self, name: str) -> Dict[str, Any]:
+        """Measure one provider's round-trip latency and cache the result"""
+        client = self.get(name)
+        result: Dict[str, Any] = {"checked_at": datetime.now().isoformat()}
+
+        if client is None:
+            result["status"] = "unconfigured"
+        else:
+            started = time.monotonic()
+            try:
+                await client.health_check(settings.ai_health_probe_timeout_seconds)
+                result["status"] = "up"
+            except Exception as e:
+                result["status"] = "down"
+                result["error"] = str(e)[:200]
+            result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        self._health[name] = result
+        return result
+
+    async def probe_all(self) -> Dict[str, Dict[str, Any]]:
+        await asyncio.gather(*(self.probe(name) for name in PROVIDERS))
+        return self.get_health()
+
+    async def run_health_probes(self, stop_event: asyncio.Event, interval: Optional[float] = None):
+        """Refresh provider health every `interval` seconds until `stop_event` is set"""
+        interval = interval or settings.ai_health_probe_interval_seconds
+        while not stop_event.is_set():
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Provider health probe failed: {e}")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_health(self) -> Dict[str, Dict[str, Any]]:
+        """Last probe result per provider (no network calls)"""
+        return {name: self._health.get(name, {"status": "unknown"}) for name in PROVIDERS}
+
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection pool usage of the clients built so far (never builds one)"""
+        return {name: client.get_pool_stats() for name, client in self._clients.items() if client is not None}
+
+    async def aclose(self):
+        """Close every pooled provider connection (on application shutdown)"""
+        for client in self._clients.values():
+            if client is not None:
+                await client.aclose()
+
+
+# Global instance
+provider_registry = ProviderRegistry()
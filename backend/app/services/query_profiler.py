@@ -0,0 +1,178 @@
+import re
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any, Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def statement_shape(statement: str) -> str:
+    """A statement with literals and IN lists collapsed, so repeats of one query compare equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERAL.sub("?", shape)
+    return _IN_LIST.sub("(?)", shape)
+
+
+class QueryProfile:
+    """Statements run on behalf of one request"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, List[float]] = {}  # shape -> [count, seconds]
+        self.closed = False
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold: int) -> List[Dict[str, Any]]:
+        """SELECT shapes run at least `threshold` times, most frequent first (N+1 candidates)"""
+        return sorted(
+            (
+                {"shape": shape, "count": int(count), "ms": round(seconds * 1000, 1)}
+                for shape, (count, seconds) in self.shapes.items()
+                if count >= threshold and shape.upper().startswith("SELECT")
+            ),
+            key=lambda entry: entry["count"],
+            reverse=True
+        )
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: DB time and statement count, plus the most repeated query"""
+        parts = [f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"']
+        repeated = self.repeated(2)
+        if repeated:
+            top = repeated[0]
+            # Quotes can't be escaped portably in the header, and it must stay short
+            shape = top["shape"][:80].replace('"', "'").replace("\\", "")
+            parts.append(f'db-repeat;dur={top["ms"]};desc="{top["count"]}x {shape}"')
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        lines = [f"{self.label}: {self.count} queries in {self.seconds * 1000:.1f}ms"]
+        for shape, (count, seconds) in sorted(self.shapes.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"  {int(count)}x {seconds * 1000:.1f}ms  {shape[:200]}")
+        return "\n".join(lines)
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+class QueryProfiler:
+    """
+    Request-scoped SQL statement profiling
+
+    The middleware opens a profile per request in a context variable; engine
+    events add every statement run in that context to it. A SELECT shape
+    repeated SQL_N_PLUS_ONE_THRESHOLD times in one request is logged as a
+    likely N+1 query (typically a lazy-loaded relationship read in a loop).
+    """
+
+    def __init__(self):
+        self._captures: List[List[QueryProfile]] = []
+        self.flagged = 0
+
+    def install(self, engine: Engine):
+        """Attach the statement hooks to `engine`"""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _profile.get() is not None:
+                conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            profile = _profile.get()
+            started = conn.info.get("profiler_started")
+            if profile is None or not started:
+                return
+            elapsed = time.perf_counter() - started.pop()
+            if not profile.closed:
+                profile.record(statement, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context):
+            connection = context.connection
+            if connection is not None and connection.info.get("profiler_started") and _profile.get() is not None:
+                connection.info["profiler_started"].pop()
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[QueryProfile]:
+        """Record the statements run in this context (and tasks started from it) until the block exits"""
+        profile = QueryProfile(label)
+        token = _profile.set(profile)
+        try:
+            yield profile
+        finally:
+            # Background tasks copied the context; stop counting their queries against this request
+            profile.closed = True
+            _profile.reset(token)
+            self._finish(profile)
+
+    def _finish(self, profile: QueryProfile):
+        for capture in self._captures:
+            capture.append(profile)
+
+        repeated = profile.repeated(settings.sql_n_plus_one_threshold)
+        if repeated:
+            self.flagged += 1
+            for entry in repeated:
+                logger.warning(
+                    f"🐢 Possible N+1 in {profile.label}: {entry['count']} x {entry['shape'][:200]} "
+                    f"({entry['ms']}ms)"
+                )
+
+    @contextmanager
+    def capture(self) -> Iterator[List[QueryProfile]]:
+        """Collect the profiles of every request finished during the block, from any thread"""
+        profiles: List[QueryProfile] = []
+        self._captures.append(profiles)
+        try:
+            yield profiles
+        finally:
+            self._captures.remove(profiles)
+
+
+# Global instance
+query_profiler = QueryProfiler()
+
+
+def assert_max_queries(client, method: str, url: str, max_queries: int, **kwargs) -> Any:
+    """
+    Pytest helper: make a request and fail if it ran more than `max_queries` statements
+
+        def test_feed_has_no_n_plus_one(client):
+            assert_max_queries(client, "GET", "/videos/?limit=20", 3)
+
+    Args:
+        client: fastapi.testclient.TestClient for the app
+        method: HTTP method
+        url: Request URL
+        max_queries: Highest acceptable statement count
+        **kwargs: Passed on to client.request (headers, params, json, ...)
+
+    Returns:
+        The response
+    """
+    with query_profiler.capture() as profiles:
+        response = client.request(method, url, **kwargs)
+    count = sum(profile.count for profile in profiles)
+    assert count <= max_queries, (
+        f"{method} {url} ran {count} queries, more than {max_queries}:\n"
+        + "\n".join(profile.summary() for profile in profiles)
+    )
+    return response
@@ -0,0 +1,149 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Optional, Any
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `per_minute` tokens per minute
+
+    Callers reserve tokens up front and the balance may go negative; each
+    caller then sleeps until its own reservation is covered. That keeps
+    callers in FIFO order without holding a lock across the sleep.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self, scale: float):
+        now = time.monotonic()
+        rate = self.per_minute * scale / 60
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float, scale: float = 1.0) -> float:
+        """Take `amount` tokens, sleeping until they are available; returns seconds waited"""
+        # Requests larger than the bucket would never fit, so they just drain it
+        amount = min(amount, self.capacity)
+
+        self._refill(scale)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+
+        delay = -self.tokens / (self.per_minute * scale / 60)
+        await asyncio.sleep(delay)
+        return delay
+
+
+class ProviderRateLimiter:
+    """
+    Paces calls to one AI provider with a set of token buckets
+
+    Each bucket tracks one quota dimension (requests, tokens, characters) in
+    units per minute. The effective rate adapts AIMD-style: a 429 halves it
+    and blocks all callers for the provider's Retry-After, each success
+    restores it a little.
+    """
+
+    def __init__(self, name: str, limits: Dict[str, float], min_scale: float = 0.1):
+        self.name = name
+        self.buckets = {dimension: TokenBucket(per_minute) for dimension, per_minute in limits.items() if per_minute}
+        self.min_scale = min_scale
+        self.scale = 1.0
+        self.blocked_until = 0.0
+        self.rate_limited_count = 0
+        self.total_wait_seconds = 0.0
+        self._window = deque()  # (timestamp, costs) of recent calls for throughput reporting
+
+    async def acquire(self, **costs: float):
+        """Wait until the provider quota allows a call costing `costs`"""
+        started = time.monotonic()
+
+        pause = self.blocked_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        for dimension, amount in costs.items():
+            bucket = self.buckets.get(dimension)
+            if bucket:
+                await bucket.acquire(amount, self.scale)
+
+        self.total_wait_seconds += time.monotonic() - started
+        self._window.append((time.monotonic(), costs))
+
+    def on_success(self):
+        """Additively restore the rate after a successful call"""
+        self.scale = min(1.0, self.scale + 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Back off after a 429 from the provider"""
+        self.rate_limited_count += 1
+        self.scale = max(self.min_scale, self.scale / 2)
+        pause = retry_after if retry_after is not None else 5.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        logger.warning(f"⏳ {self.name} rate limited, pausing {pause:.1f}s (rate scale {self.scale:.2f})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Achieved throughput over the last minute plus limiter state"""
+        cutoff = time.monotonic() - 60
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+
+        achieved = {}
+        for _, costs in self._window:
+            for dimension, amount in costs.items():
+                achieved[dimension] = achieved.get(dimension, 0) + amount
+
+        return {
+            "limits_per_minute": {dimension: bucket.per_minute for dimension, bucket in self.buckets.items()},
+            "achieved_per_minute": achieved,
+            "rate_scale": round(self.scale, 2),
+            "rate_limited_count": self.rate_limited_count,
+            "total_wait_seconds": round(self.total_wait_seconds, 2)
+        }
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a provider client exception is an HTTP 429"""
+    response = getattr(error, "response", None)
+    status = (
+        getattr(error, "status_code", None)
+        or getattr(error, "http_status", None)
+        or getattr(response, "status_code", None)
+        or getattr(response, "status", None)
+    )
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after_from_error(error: Exception) -> Optional[float]:
+    """Read the Retry-After header (in seconds) from a provider client exception"""
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Global instances, shared by every AIServiceManager in the process
+openai_rate_limiter = ProviderRateLimiter("OpenAI", {
+    "requests": settings.openai_requests_per_minute,
+    "tokens": settings.openai_tokens_per_minute
+})
+
+elevenlabs_rate_limiter = ProviderRateLimiter("ElevenLabs", {
+    "requests": settings.elevenlabs_requests_per_minute,
+    "characters": settings.elevenlabs_characters_per_minute
+})
@@ -0,0 +1,369 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum as PyEnum
+from typing import Dict, Optional, Any, Awaitable, Callable, AsyncIterator, Iterator, Tuple
+from ..config import settings
+from .ai_clients import ProviderAPIError
+from .priority_scheduler import PriorityScheduler
+from .metrics import provider_call_seconds
+from .rate_limiter import (
+    ProviderRateLimiter,
+    openai_rate_limiter,
+    elevenlabs_rate_limiter,
+    is_rate_limit_error,
+    retry_after_from_error
+)
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time by which the current HTTP request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("ai_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit breaker is rejecting calls"""
+
+
+class DeadlineExceeded(Exception):
+    """The caller's time budget ran out before the provider answered"""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Give provider calls made inside this block at most `seconds` in total"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(deadline, current) if current else deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def without_deadline() -> Iterator[None]:
+    """Lift the current deadline inside this block (for work shared between requests)"""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitState(str, PyEnum):
+    CLOSED = "closed"  # Calls flow normally
+    OPEN = "open"  # Calls are rejected without reaching the provider
+    HALF_OPEN = "half-open"  # A few probe calls decide whether to close again
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one provider
+
+    After `failure_threshold` failures in a row the circuit opens and every
+    call fails immediately. Once `reset_seconds` have passed, up to
+    `half_open_probes` calls are let through: a success closes the circuit,
+    a failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float, half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            self.state = CircuitState.HALF_OPEN
+            self.probes_in_flight = 0
+            logger.info(f"🔌 {self.name} circuit half-open, probing")
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is half-open and already probing")
+            self.probes_in_flight += 1
+
+    def record_success(self):
+        if self.state == CircuitState.HALF_OPEN:
+            logger.info(f"✅ {self.name} circuit closed")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.probes_in_flight = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                self.times_opened += 1
+                logger.warning(f"⛔ {self.name} circuit opened after {self.consecutive_failures} consecutive failures")
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+            self.probes_in_flight = 0
+
+    def release(self):
+        """Give back a half-open probe slot for a call that neither succeeded nor failed"""
+        if self.state == CircuitState.HALF_OPEN and self.probes_in_flight:
+            self.probes_in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def _is_provider_failure(error: BaseException) -> bool:
+    """Errors that say the provider is unhealthy (as opposed to the request being bad)"""
+    import httpx
+    if isinstance(error, ProviderAPIError):
+        return error.status_code >= 500 or error.status_code in (401, 403)
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+
+class ProviderPolicy:
+    """
+    Scheduling, rate limiting, circuit breaking, deadlines and hedging for one provider
+
+    Every attempt is bounded by AI_CALL_TIMEOUT_SECONDS and by whatever is
+    left of the current request's deadline. Hedged calls start a second
+    attempt once the first has run longer than the provider's p95 latency
+    and take whichever answers first; only use them for idempotent calls.
+    """
+
+    def __init__(self, name: str, rate_limiter: ProviderRateLimiter):
+        self.name = name
+        self.rate_limiter = rate_limiter
+        self.scheduler = PriorityScheduler(name)
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.ai_breaker_failure_threshold,
+            reset_seconds=settings.ai_breaker_reset_seconds,
+            half_open_probes=settings.ai_breaker_half_open_probes
+        )
+        self.latency = LatencyTracker()
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    def _attempt_timeout(self) -> Tuple[float, bool]:
+        """Timeout for the next attempt, and whether the request deadline is what bounds it"""
+        timeout = settings.ai_call_timeout_seconds
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                self.deadline_exceeded += 1
+                raise DeadlineExceeded(f"No time left to call {self.name}")
+            if remaining < timeout:
+                return remaining, True
+        return timeout, False
+
+    async def _attempt(self, costs: Dict[str, float], func: Callable[..., Awaitable[Any]], args, kwargs) -> Any:
+        for retry in range(settings.ai_rate_limit_retries + 1):
+            self.breaker.allow()
+            try:
+                async with self.scheduler.turn():
+                    await self.rate_limiter.acquire(**costs)
+                timeout, bounded_by_deadline = self._attempt_timeout()
+            except BaseException:
+                self.breaker.release()
+                raise
+
+            started = time.monotonic()
+            outcome = "error"
+            try:
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+                outcome = "ok"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                if bounded_by_deadline:
+                    self.breaker.release()
+                    self.deadline_exceeded += 1
+                    raise DeadlineExceeded(f"{self.name} did not answer within the request deadline")
+                self.breaker.record_failure()
+                raise
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    outcome = "rate_limited"
+                    self.breaker.release()
+                    if retry == settings.ai_rate_limit_retries:
+                        raise
+                    self.rate_limiter.on_rate_limited(retry_after_from_error(e))
+                    continue
+                if _is_provider_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release()
+                raise
+            finally:
+                provider_call_seconds.observe(time.monotonic() - started, provider=self.name, outcome=outcome)
+
+            self.latency.record(time.monotonic() - started)
+            self.breaker.record_success()
+            self.rate_limiter.on_success()
+            return result
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None if hedging is off or there is too little data"""
+        if not settings.ai_hedging_enabled or len(self.latency) < settings.ai_hedge_min_samples:
+            return None
+        return self.latency.percentile(95)
+
+    async def call(
+        self,
+        costs: Dict[str, float],
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        hedge: bool = False,
+        **kwargs
+    ) -> Any:
+        """
+        Await a provider call under this policy
+
+        Args:
+            costs: Rate limiter cost of one attempt, e.g. {"requests": 1, "tokens": 900}
+            func: Coroutine function making the call
+            hedge: Allow a hedged second attempt (idempotent calls only)
+
+        Returns:
+            The result of the first attempt to succeed
+        """
+        delay = self.hedge_delay() if hedge else None
+        first = asyncio.ensure_future(self._attempt(costs, func, args, kwargs))
+        if delay is None:
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            self.hedged_calls += 1
+            second = asyncio.ensure_future(self._attempt(costs, func, args, kwargs))
+            tasks.add(second)
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def stream(self, costs: Dict[str, float], func: Callable[..., AsyncIterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """Iterate a streaming provider call, bounding the wait for each chunk"""
+        self.breaker.allow()
+        try:
+            async with self.scheduler.turn():
+                await self.rate_limiter.acquire(**costs)
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        iterator = func(*args, **kwargs).__aiter__()
+        try:
+            while True:
+                timeout, bounded_by_deadline = self._attempt_timeout()
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    if bounded_by_deadline:
+                        self.deadline_exceeded += 1
+                        raise DeadlineExceeded(f"{self.name} stream did not finish within the request deadline")
+                    raise
+                yield chunk
+        except (DeadlineExceeded, asyncio.CancelledError, GeneratorExit):
+            self.breaker.release()
+            raise
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.breaker.release()
+                self.rate_limiter.on_rate_limited(retry_after_from_error(e))
+            elif _is_provider_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            raise
+        finally:
+            await iterator.aclose()
+
+        self.breaker.record_success()
+        self.rate_limiter.on_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "circuit": self.breaker.get_stats(),
+            "queue_wait": self.scheduler.get_stats(),
+            "latency_p50_seconds": round(p50, 3) if p50 is not None else None,
+            "latency_p95_seconds": round(p95, 3) if p95 is not None else None,
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded
+        }
+
+
+# Global instances, shared by every AIServiceManager in the process
+openai_policy = ProviderPolicy("OpenAI", openai_rate_limiter)
+elevenlabs_policy = ProviderPolicy("ElevenLabs", elevenlabs_rate_limiter)
@@ -0,0 +1,233 @@
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from enum import Enum as PyEnum
+from typing import Dict, Optional, Any, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from ..models.cache import ScriptCacheEntry
+from ..database import SessionLocal
+from ..config import settings
+from .model_router import model_router
+
+logger = logging.getLogger(__name__)
+
+HIT_FLUSH_SECONDS = 60.0  # Hits are counted in memory and written at most this often
+EVICT_EVERY_SETS = 50  # Stores between eviction passes
+EVICT_BATCH = 500  # Most entries deleted per eviction pass
+
+
+class CacheMode(str, PyEnum):
+    USE = "use"  # Serve from cache, store on miss
+    BYPASS = "bypass"  # Neither read nor write the cache
+    REFRESH = "refresh"  # Regenerate and overwrite the cached entry
+
+
+def _normalize(value: Any) -> str:
+    """Lowercase and collapse whitespace so trivially different requests share a key"""
+    value = getattr(value, "value", value)
+    return re.sub(r"\s+", " ", str(value).strip().lower())
+
+
+class ScriptCache:
+    """
+    Database-backed cache for generated scripts
+
+    Entries are keyed by a hash of the normalized generation parameters and
+    expire after SCRIPT_CACHE_TTL_HOURS, or SCRIPT_CACHE_FALLBACK_TTL_HOURS
+    for scripts written by a fallback model tier. Lookups are read-only;
+    hits and access times are batched in memory and flushed periodically.
+    Every EVICT_EVERY_SETS stores, expired entries and the least recently
+    used ones beyond SCRIPT_CACHE_MAX_ENTRIES are deleted in bounded batches,
+    so the table may briefly run over its limit.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending_hits: Dict[str, Tuple[int, datetime]] = {}
+        self._flushed_at = time.monotonic()
+        self._sets_since_evict = EVICT_EVERY_SETS  # Evict on the first store after startup
+
+    def make_key(
+        self,
+        topic: str,
+        category: Any,
+        difficulty: Any,
+        target_audience: str,
+        duration_minutes: int,
+        style: str
+    ) -> str:
+        """Build the cache key for a set of script parameters"""
+        params = [
+            _normalize(topic),
+            _normalize(category),
+            _normalize(difficulty),
+            _normalize(target_audience),
+            int(duration_minutes),
+            _normalize(style)
+        ]
+        return hashlib.sha256(json.dumps(params).encode("utf-8")).hexdigest()
+
+    def get(self, key: str, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+        """Get a cached script result, or None on a miss"""
+        session = db or SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            payload = session.query(ScriptCacheEntry.payload).filter(
+                ScriptCacheEntry.cache_key == key,
+                ScriptCacheEntry.expires_at > now
+            ).scalar()
+        finally:
+            if db is None:
+                session.close()
+
+        if payload is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self._lock:
+            count, _ = self._pending_hits.get(key, (0, now))
+            self._pending_hits[key] = (count + 1, now)
+            due = time.monotonic() - self._flushed_at >= HIT_FLUSH_SECONDS
+        if due:
+            self.flush_hits()
+        return payload
+
+    def flush_hits(self):
+        """Write the hit counts and access times batched since the last flush"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        # Own session, so a lookup never commits the caller's transaction
+        session = SessionLocal()
+        try:
+            for key, (count, accessed_at) in pending.items():
+                session.query(ScriptCacheEntry).filter(ScriptCacheEntry.cache_key == key).update({
+                    ScriptCacheEntry.hit_count: ScriptCacheEntry.hit_count + count,
+                    ScriptCacheEntry.last_accessed_at: accessed_at
+                }, synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            # Access bookkeeping only orders eviction; losing a batch is harmless
+            session.rollback()
+            logger.warning(f"Could not record script cache hits: {e}")
+        finally:
+            session.close()
+
+    def _ttl_hours(self, payload: Dict[str, Any]) -> float:
+        """Scripts from a fallback tier expire sooner, so the primary model gets to replace them"""
+        route = (payload.get("metadata") or {}).get("route")
+        tiers = model_router.tiers
+        if route and tiers and route.get("model") != tiers[0]:
+            return settings.script_cache_fallback_ttl_hours
+        return settings.script_cache_ttl_hours
+
+    def set(self, key: str, topic: str, payload: Dict[str, Any], db: Optional[Session] = None):
+        """Store a script result, evicting expired and least recently used entries now and then"""
+        ttl_hours = self._ttl_hours(payload)
+        if ttl_hours <= 0:
+            return
+
+        session = db or SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            expires_at = now + timedelta(hours=ttl_hours)
+
+            entry = session.query(ScriptCacheEntry).filter(ScriptCacheEntry.cache_key == key).first()
+            if entry:
+                entry.payload = payload
+                entry.expires_at = expires_at
+                entry.last_accessed_at = now
+            else:
+                session.add(ScriptCacheEntry(
+                    cache_key=key,
+                    topic=_normalize(topic)[:255],
+                    payload=payload,
+                    expires_at=expires_at,
+                    last_accessed_at=now
+                ))
+            session.commit()
+
+            with self._lock:
+                self._sets_since_evict += 1
+                due = self._sets_since_evict >= EVICT_EVERY_SETS
+                if due:
+                    self._sets_since_evict = 0
+            if due:
+                self._evict(session)
+        except Exception as e:
+            # A concurrent writer may have inserted the same key first; the cache is best-effort
+            session.rollback()
+            logger.warning(f"Could not store script in cache: {e}")
+        finally:
+            if db is None:
+                session.close()
+
+    def _evict(self, session: Session):
+        """Delete up to EVICT_BATCH expired entries and least recently used ones beyond the size limit"""
+        now = datetime.now(timezone.utc)
+        expired_ids = session.query(ScriptCacheEntry.id).filter(
+            ScriptCacheEntry.expires_at <= now
+        ).limit(EVICT_BATCH)
+        stale_ids = {entry_id for (entry_id,) in expired_ids.all()}
+
+        # Walk the last_accessed_at index to the oldest entry still within the limit, instead of counting the table
+        cutoff = session.query(ScriptCacheEntry.last_accessed_at).order_by(
+            ScriptCacheEntry.last_accessed_at.desc()
+        ).offset(settings.script_cache_max_entries).limit(1).scalar()
+        if cutoff is not None:
+            stale_ids.update(entry_id for (entry_id,) in session.query(ScriptCacheEntry.id).filter(
+                ScriptCacheEntry.last_accessed_at <= cutoff
+            ).order_by(ScriptCacheEntry.last_accessed_at).limit(EVICT_BATCH))
+
+        if stale_ids:
+            self.evictions += session.query(ScriptCacheEntry).filter(
+                ScriptCacheEntry.id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+
+    def record_bypass(self):
+        self.bypasses += 1
+
+    def record_refresh(self):
+        self.refreshes += 1
+
+    def get_stats(self, db: Optional[Session] = None) -> Dict[str, Any]:
+        """Hit ratio and size of the cache"""
+        session = db or SessionLocal()
+        try:
+            entries = session.query(ScriptCacheEntry).count()
+        finally:
+            if db is None:
+                session.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.script_cache_enabled,
+            "entries": entries,
+            "max_entries": settings.script_cache_max_entries,
+            "ttl_hours": settings.script_cache_ttl_hours,
+            "fallback_ttl_hours": settings.script_cache_fallback_ttl_hours,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "bypasses": self.bypasses,
+            "refreshes": self.refreshes,
+            "evictions": self.evictions
+        }
+
+
+# Global instance
+script_cache = ScriptCache()
@@ -0,0 +1,95 @@
+import copy
+import asyncio
+import logging
+from typing import Dict, Any, Awaitable, Callable, List, Tuple
+from .priority_scheduler import Lane, current_priority
+from .resilience import DeadlineExceeded, remaining_time, without_deadline
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight task
+
+    The first caller for a key starts the work; later callers with the same
+    key await the same task. A caller that is cancelled only detaches itself;
+    the shared task is cancelled once every waiter has left.
+
+    The shared task keeps the priority lane of the caller that started it,
+    so an interactive caller never joins a batch-lane call; batch callers
+    may join either. The task itself runs without a request deadline: each
+    caller stops waiting at its own deadline (with DeadlineExceeded), so the
+    call lives as long as the most patient waiter still needs it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Tuple[Lane, str], _Call] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _joinable_lanes(lane: Lane) -> List[Lane]:
+        """Lanes whose in-flight calls a caller in `lane` may wait on"""
+        return [Lane.INTERACTIVE] if lane == Lane.INTERACTIVE else [Lane.INTERACTIVE, lane]
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `factory()` for `key`, or join the call already in flight"""
+        lane = current_priority()[0]
+        for candidate in self._joinable_lanes(lane):
+            slot = (candidate, key)
+            call = self._calls.get(slot)
+            if call is not None and not call.task.done():
+                self.coalesced += 1
+                logger.debug(f"{self.name}: joined in-flight {candidate.value} call for {key[:12]}")
+                break
+        else:
+            slot = (lane, key)
+            with without_deadline():
+                call = _Call(asyncio.ensure_future(factory()))
+            self._calls[slot] = call
+            call.task.add_done_callback(lambda _task, slot=slot, call=call: self._forget(slot, call))
+            self.started += 1
+
+        timeout = remaining_time()
+        if timeout is not None:
+            timeout = max(timeout, 0.0)
+        call.waiters += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except asyncio.TimeoutError:
+            if call.task.done():
+                raise  # The call itself timed out
+            raise DeadlineExceeded(f"{self.name} call did not finish within the request deadline")
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Evict first, so a caller arriving while it unwinds starts a new call
+                self._forget(slot, call)
+                call.task.cancel()
+
+        # Every caller gets its own copy, so one can't mutate another's result
+        return copy.deepcopy(result)
+
+    def _forget(self, slot: Tuple[Lane, str], call: _Call):
+        if self._calls.get(slot) is call:
+            del self._calls[slot]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
+
+
+# Global instances, shared by every AIServiceManager in the process
+script_flight = SingleFlight("script")
+voice_flight = SingleFlight("voice")
@@ -0,0 +1,129 @@
+import os
+import time
+import logging
+from typing import Dict, Any, Set, Optional
+from sqlalchemy.orm import Session
+from ..models.video import Video
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StorageGarbageCollector:
+    """
+    Mark-and-sweep collector for media files that no video row references
+
+    Mark collects every file name referenced by the videos table (video,
+    thumbnail and narration audio). Sweep walks the storage roots and deletes
+    unreferenced files older than the grace period, so files that belong to an
+    upload or generation still in flight are never touched.
+    """
+
+    def __init__(self):
+        self.roots = {
+            "videos": "uploads/videos",
+            "thumbnails": "uploads/thumbnails",
+            "temp": "temp"
+        }
+
+    def mark(self, db: Session) -> Set[str]:
+        """Collect the file names referenced by any video row"""
+        referenced = set()
+
+        rows = db.query(
+            Video.video_url,
+            Video.thumbnail_url,
+            Video.generation_metadata
+        ).yield_per(1000)
+
+        for video_url, thumbnail_url, metadata in rows:
+            for url in (video_url, thumbnail_url, (metadata or {}).get("audio_file")):
+                if url:
+                    referenced.add(os.path.basename(url))
+
+        return referenced
+
+    def sweep(
+        self,
+        referenced: Set[str],
+        grace_hours: float,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Delete unreferenced files older than the grace period"""
+        cutoff = time.time() - grace_hours * 3600
+        report = {}
+
+        for name, root in self.roots.items():
+            stats = {"scanned": 0, "deleted": 0, "reclaimed_bytes": 0, "errors": 0}
+
+            if os.path.isdir(root):
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stats["scanned"] += 1
+
+                        if entry.name in referenced:
+                            continue
+
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                            if stat.st_mtime > cutoff:
+                                continue
+                            if not dry_run:
+                                os.remove(entry.path)
+                            stats["deleted"] += 1
+                            stats["reclaimed_bytes"] += stat.st_size
+                        except OSError as e:
+                            logger.warning(f"Could not remove {entry.path}: {e}")
+                            stats["errors"] += 1
+
+            report[name] = stats
+
+        return report
+
+    def collect(
+        self,
+        db: Session,
+        grace_hours: Optional[float] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run a full mark-and-sweep pass
+
+        Args:
+            db: Database session
+            grace_hours: Minimum age of an unreferenced file before it is deleted
+            dry_run: Report what would be deleted without deleting anything
+
+        Returns:
+            Dict with per-root counts and the total reclaimed bytes
+        """
+        if grace_hours is None:
+            grace_hours = settings.storage_gc_grace_hours
+
+        started = time.monotonic()
+        referenced = self.mark(db)
+        roots = self.sweep(referenced, grace_hours, dry_run=dry_run)
+
+        reclaimed = sum(stats["reclaimed_bytes"] for stats in roots.values())
+        deleted = sum(stats["deleted"] for stats in roots.values())
+
+        logger.info(
+            f"Storage GC {'(dry run) ' if dry_run else ''}removed {deleted} files, "
+            f"reclaimed {reclaimed} bytes"
+        )
+
+        return {
+            "dry_run": dry_run,
+            "grace_hours": grace_hours,
+            "referenced_files": len(referenced),
+            "deleted_files": deleted,
+            "reclaimed_bytes": reclaimed,
+            "roots": roots,
+            "duration_seconds": round(time.monotonic() - started, 3)
+        }
+
+
+# Global instance
+storage_garbage_collector = StorageGarbageCollector()
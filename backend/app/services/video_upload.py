@@ -4,11 +4,15 @@ import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from ..models.video import Video, VideoCategory, VideoDifficulty, ContentSource, GenerationStatus
-from ..models.creator import Creator
+from ..models.storage import StorageUsage
 from ..schemas.video import VideoCreate
-from ..database import get_db
+from ..database import session_scope
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +24,9 @@ class VideoUploadService:
         self.thumbnail_dir = "uploads/thumbnails"
         self.max_file_size = 100 * 1024 * 1024  # 100MB
         self.allowed_extensions = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
-        
-        # Create upload directories
+    
+    def _ensure_directories(self):
+        """Create upload directories on first write rather than at import"""
         os.makedirs(self.upload_dir, exist_ok=True)
         os.makedirs(self.thumbnail_dir, exist_ok=True)
     
@@ -34,7 +39,8 @@ class VideoUploadService:
         difficulty: VideoDifficulty,
         creator_id: int,
         tags: Optional[str] = None,
-        is_educational: bool = True
+        is_educational: bool = True,
+        db: Optional[Session] = None
     ) -> Video:
         """
         Upload and process a video file
@@ -48,10 +54,12 @@ class VideoUploadService:
             creator_id: ID of the creator
             tags: Comma-separated tags
             is_educational: Whether the video is educational
+            db: Session to join (a short-lived one is used otherwise)
             
         Returns:
             Video object
         """
+        video_path = thumbnail_path = None
         try:
             # Validate file
             self._validate_file(file)
@@ -60,68 +68,80 @@ class VideoUploadService:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_extension = os.path.splitext(file.filename)[1].lower()
             filename = f"{title.lower().replace(' ', '_')}_{timestamp}{file_extension}"
-            
-            # Save video file
-            video_path = os.path.join(self.upload_dir, filename)
-            with open(video_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Generate thumbnail (placeholder for now)
             thumbnail_filename = f"thumb_{filename.replace(file_extension, '.jpg')}"
+            video_path = os.path.join(self.upload_dir, filename)
             thumbnail_path = os.path.join(self.thumbnail_dir, thumbnail_filename)
             
-            # Create placeholder thumbnail
-            self._create_placeholder_thumbnail(thumbnail_path)
+            # Save the files off the event loop, before any transaction is open
+            file_size = await run_in_threadpool(self._save_files, file, video_path, thumbnail_path)
             
             # Get video duration (placeholder)
             duration = self._get_video_duration(video_path)
             
-            # Create video record
-            db = next(get_db())
-            
-            video_data = VideoCreate(
-                title=title,
-                description=description,
-                video_url=f"/uploads/videos/{filename}",
-                thumbnail_url=f"/uploads/thumbnails/{thumbnail_filename}",
-                duration=duration,
-                category=category,
-                difficulty=difficulty,
-                tags=tags or f"{category.value},{difficulty.value},uploaded",
-                source="uploaded",
-                source_id=f"upload-{timestamp}",
-                is_educational=is_educational,
-                is_verified=True,
-                creator_id=creator_id,
-                content_source=ContentSource.UPLOADED,
-                generation_status=GenerationStatus.COMPLETED,
-                ai_prompt=None,
-                ai_tools_used=None,
-                generation_metadata={
-                    "upload_time": datetime.now().isoformat(),
-                    "original_filename": file.filename,
-                    "file_size": os.path.getsize(video_path),
-                    "upload_method": "manual"
-                },
-                script_content=None,
-                voice_settings=None,
-                visual_style=None,
-                target_audience=None
-            )
-            
-            # Create video record
-            video = Video(**video_data.dict())
-            db.add(video)
-            db.commit()
-            db.refresh(video)
+            # Check the quota and create the video record and ledger entry in one unit of work
+            with session_scope(db) as session:
+                self._check_quota(session, creator_id, file_size)
+                
+                video_data = VideoCreate(
+                    title=title,
+                    description=description,
+                    video_url=f"/uploads/videos/{filename}",
+                    thumbnail_url=f"/uploads/thumbnails/{thumbnail_filename}",
+                    duration=duration,
+                    category=category,
+                    difficulty=difficulty,
+                    tags=tags or f"{category.value},{difficulty.value},uploaded",
+                    source="uploaded",
+                    source_id=f"upload-{timestamp}",
+                    is_educational=is_educational,
+                    is_verified=True,
+                    creator_id=creator_id,
+                    content_source=ContentSource.UPLOADED,
+                    generation_status=GenerationStatus.COMPLETED,
+                    ai_prompt=None,
+                    ai_tools_used=None,
+                    generation_metadata={
+                        "upload_time": datetime.now().isoformat(),
+                        "original_filename": file.filename,
+                        "file_size": file_size,
+                        "upload_method": "manual"
+                    },
+                    script_content=None,
+                    voice_settings=None,
+                    visual_style=None,
+                    target_audience=None
+                )
+                
+                # Create video record
+                video = Video(**video_data.dict())
+                session.add(video)
+                
+                # Record the new file in the storage ledger in the same transaction
+                self._record_usage(session, creator_id, file_extension, file_size, 1)
             
             logger.info(f"Video uploaded successfully: {video.id} - {title}")
             return video
             
         except Exception as e:
+            # Don't leave files behind for a row that was never committed
+            for path in (video_path, thumbnail_path):
+                if path and os.path.isfile(path):
+                    os.remove(path)
+            if isinstance(e, HTTPException):
+                raise
             logger.error(f"Error uploading video: {e}")
             raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
     
+    def _save_files(self, file: UploadFile, video_path: str, thumbnail_path: str) -> int:
+        """Write the uploaded video and its thumbnail to disk and return the video size"""
+        self._ensure_directories()
+        with open(video_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        
+        # Create placeholder thumbnail
+        self._create_placeholder_thumbnail(thumbnail_path)
+        return os.path.getsize(video_path)
+    
     def _validate_file(self, file: UploadFile):
         """Validate uploaded file"""
         # Check file extension
@@ -151,21 +171,164 @@ class VideoUploadService:
         # Placeholder - in production, use ffmpeg or similar
         return 180  # Default 3 minutes
     
-    def get_upload_stats(self) -> Dict[str, Any]:
-        """Get upload directory statistics"""
+    def delete_video(self, db: Session, video: Video):
+        """
+        Delete an uploaded video, its files and its ledger entry
+        
+        Args:
+            db: Database session
+            video: Uploaded Video object to delete
+        """
+        filename = os.path.basename(video.video_url)
+        video_path = os.path.join(self.upload_dir, filename)
+        thumbnail_path = os.path.join(self.thumbnail_dir, os.path.basename(video.thumbnail_url or ""))
+        file_extension = os.path.splitext(filename)[1].lower()
+        video_id, title, creator_id = video.id, video.title, video.creator_id
+        
+        file_size = 0
+        if os.path.isfile(video_path):
+            file_size = os.path.getsize(video_path)
+        elif video.generation_metadata:
+            file_size = video.generation_metadata.get("file_size", 0)
+        
+        db.delete(video)
+        self._record_usage(db, creator_id, file_extension, -file_size, -1)
+        db.commit()
+        
+        # Remove files only once the row is gone, so a failed commit leaves nothing dangling
+        for path in (video_path, thumbnail_path):
+            if os.path.isfile(path):
+                os.remove(path)
+        
+        logger.info(f"Video deleted: {video_id} - {title}")
+    
+    def _record_usage(self, db: Session, creator_id: int, extension: str, size_delta: int, count_delta: int):
+        """Apply a size/count delta to the storage ledger (caller commits)"""
+        dialect = db.get_bind().dialect.name
+        insert = None
+        # Imported here so the dialect modules aren't loaded at startup
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        if insert is not None:
+            # One atomic upsert, so concurrent first uploads can't both try to create the row
+            statement = insert(StorageUsage).values(
+                creator_id=creator_id, extension=extension, file_count=count_delta, total_bytes=size_delta
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[StorageUsage.creator_id, StorageUsage.extension],
+                set_={
+                    "file_count": StorageUsage.file_count + count_delta,
+                    "total_bytes": StorageUsage.total_bytes + size_delta,
+                    "updated_at": func.now()
+                }
+            ))
+            return
+        
+        for attempt in range(2):
+            usage = db.query(StorageUsage).filter(
+                StorageUsage.creator_id == creator_id,
+                StorageUsage.extension == extension
+            ).with_for_update().first()
+            if usage:
+                break
+            try:
+                # Savepoint, so losing the race to create the row doesn't abort the caller's transaction
+                with db.begin_nested():
+                    db.add(StorageUsage(
+                        creator_id=creator_id, extension=extension, file_count=count_delta, total_bytes=size_delta
+                    ))
+                return
+            except IntegrityError:
+                if attempt:
+                    raise
+        
+        # Increment in SQL so concurrent uploads don't overwrite each other
+        usage.file_count = StorageUsage.file_count + count_delta
+        usage.total_bytes = StorageUsage.total_bytes + size_delta
+        db.flush()
+    
+    def _check_quota(self, db: Session, creator_id: int, incoming_bytes: int):
+        """Reject the upload if it would push the creator past their storage quota"""
+        quota_bytes = settings.creator_storage_quota_mb * 1024 * 1024
+        if not quota_bytes:
+            return
+        
+        used_bytes = self.get_creator_usage(db, creator_id)["total_bytes"]
+        if used_bytes + incoming_bytes > quota_bytes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Storage quota exceeded. Quota: {settings.creator_storage_quota_mb}MB"
+            )
+    
+    def get_creator_usage(self, db: Session, creator_id: int) -> Dict[str, Any]:
+        """Get storage usage for a single creator from the ledger"""
+        # The ledger is updated with core upserts, so refresh rows already in the session
+        rows = db.query(StorageUsage).filter(StorageUsage.creator_id == creator_id).populate_existing().all()
+        total_bytes = sum(row.total_bytes for row in rows)
+        quota_mb = settings.creator_storage_quota_mb
+        
+        return {
+            "creator_id": creator_id,
+            "video_count": sum(row.file_count for row in rows),
+            "total_bytes": total_bytes,
+            "by_extension": {row.extension: {"count": row.file_count, "bytes": row.total_bytes} for row in rows},
+            "quota_mb": quota_mb or None,
+            "remaining_bytes": max(quota_mb * 1024 * 1024 - total_bytes, 0) if quota_mb else None
+        }
+    
+    def get_upload_stats(self, db: Session) -> Dict[str, Any]:
+        """Get upload statistics from the storage ledger"""
         try:
-            video_count = len([f for f in os.listdir(self.upload_dir) if f.endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm'))])
-            total_size = sum(os.path.getsize(os.path.join(self.upload_dir, f)) for f in os.listdir(self.upload_dir) if os.path.isfile(os.path.join(self.upload_dir, f)))
+            rows = db.query(
+                StorageUsage.extension,
+                func.sum(StorageUsage.file_count),
+                func.sum(StorageUsage.total_bytes)
+            ).group_by(StorageUsage.extension).all()
+            
+            creator_count = db.query(func.count(StorageUsage.creator_id.distinct())).filter(
+                StorageUsage.file_count > 0
+            ).scalar()
+            
+            video_count = sum(count or 0 for _, count, _ in rows)
+            total_size = sum(size or 0 for _, _, size in rows)
             
             return {
                 "video_count": video_count,
                 "total_size_mb": total_size // (1024 * 1024),
+                "total_bytes": total_size,
+                "by_extension": {ext: {"count": count or 0, "bytes": size or 0} for ext, count, size in rows},
+                "creator_count": creator_count,
                 "upload_dir": self.upload_dir,
                 "thumbnail_dir": self.thumbnail_dir
             }
         except Exception as e:
             logger.error(f"Error getting upload stats: {e}")
             return {"error": str(e)}
+    
+    def rebuild_ledger(self, db: Session) -> Dict[str, Any]:
+        """
+        Rebuild the storage ledger from the upload directory
+        
+        Only needed once for deployments that have uploads from before the
+        ledger existed, or to reconcile after files were changed by hand.
+        """
+        db.query(StorageUsage).delete()
+        
+        uploads = db.query(Video.creator_id, Video.video_url).filter(
+            Video.content_source == ContentSource.UPLOADED
+        ).all()
+        
+        for creator_id, video_url in uploads:
+            filename = os.path.basename(video_url)
+            video_path = os.path.join(self.upload_dir, filename)
+            if os.path.isfile(video_path):
+                extension = os.path.splitext(filename)[1].lower()
+                self._record_usage(db, creator_id, extension, os.path.getsize(video_path), 1)
+        
+        db.commit()
+        return self.get_upload_stats(db)
 
 # Global instance
 video_upload_service = VideoUploadService() 
\ No newline at end of file
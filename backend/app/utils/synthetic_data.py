@@ -0,0 +1,294 @@
+import io
+import csv
+import time
+import random
+import logging
+from enum import Enum
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Iterable, Iterator
+from sqlalchemy import insert, func
+from sqlalchemy.orm import Session
+from ..models.creator import Creator
+from ..models.video import Video, VideoCategory, VideoDifficulty, ContentSource, GenerationStatus
+from ..models.user import User
+from ..auth import get_password_hash
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_SOURCE = "synthetic"  # Video.source of every generated video, to tell them apart
+SYNTHETIC_PASSWORD = "password123"
+# The feed endpoints only list videos backed by one of the bundled files
+VIDEO_FILES = ("python-explained.mp4", "sql-nosql.mp4", "data-engineer.mp4")
+
+# Share of the catalogue per category and difficulty; most content is introductory
+CATEGORY_WEIGHTS = {
+    VideoCategory.PROGRAMMING: 22,
+    VideoCategory.AI: 18,
+    VideoCategory.DATA_SCIENCE: 14,
+    VideoCategory.MACHINE_LEARNING: 13,
+    VideoCategory.WEB_DEVELOPMENT: 12,
+    VideoCategory.DATA_ENGINEERING: 9,
+    VideoCategory.TECHNOLOGY: 8,
+    VideoCategory.MOBILE_DEVELOPMENT: 4
+}
+DIFFICULTY_WEIGHTS = {
+    VideoDifficulty.BEGINNER: 55,
+    VideoDifficulty.INTERMEDIATE: 32,
+    VideoDifficulty.ADVANCED: 13
+}
+
+# Topics per category, most popular first; titles and tags are drawn from them
+CATEGORY_TOPICS = {
+    VideoCategory.PROGRAMMING: ["python", "javascript", "sql", "git", "rust", "go", "typescript", "java", "regex", "testing", "recursion", "data structures"],
+    VideoCategory.AI: ["llms", "prompt engineering", "neural networks", "transformers", "rag", "embeddings", "ai agents", "computer vision", "ai safety"],
+    VideoCategory.DATA_SCIENCE: ["pandas", "statistics", "data visualization", "sql", "a/b testing", "numpy", "jupyter", "regression", "probability"],
+    VideoCategory.MACHINE_LEARNING: ["gradient descent", "decision trees", "neural networks", "feature engineering", "xgboost", "pytorch", "overfitting", "clustering"],
+    VideoCategory.WEB_DEVELOPMENT: ["react", "css", "html", "rest api", "next.js", "web performance", "authentication", "graphql", "accessibility"],
+    VideoCategory.DATA_ENGINEERING: ["etl", "data pipelines", "spark", "airflow", "kafka", "data warehouses", "dbt", "data lakes", "sql"],
+    VideoCategory.TECHNOLOGY: ["cloud computing", "docker", "kubernetes", "linux", "networking", "cybersecurity", "api design", "dns"],
+    VideoCategory.MOBILE_DEVELOPMENT: ["react native", "swift", "kotlin", "flutter", "mobile ui", "app store", "push notifications"]
+}
+TITLE_TEMPLATES = {
+    VideoDifficulty.BEGINNER: ["Intro to {topic}", "{topic} Explained", "{topic} in 60 Seconds", "What is {topic}?", "{topic} for Beginners"],
+    VideoDifficulty.INTERMEDIATE: ["{topic} Tips You Should Know", "Learning {topic} by Example", "{topic} vs {other}", "Common {topic} Mistakes"],
+    VideoDifficulty.ADVANCED: ["Advanced {topic}", "{topic} Internals", "{topic} at Scale", "Optimizing {topic}", "{topic} Deep Dive"]
+}
+
+VIDEO_COLUMNS = [
+    "title", "description", "video_url", "duration", "views", "likes", "category", "difficulty", "tags",
+    "source", "is_educational", "is_verified", "creator_id", "content_source", "generation_status", "created_at"
+]
+CREATOR_COLUMNS = ["name", "username", "bio", "followers_count", "verified", "platform", "categories", "created_at"]
+USER_COLUMNS = ["username", "email", "hashed_password", "full_name", "is_active", "created_at"]
+
+
+def _zipf_cum_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative weights where the n-th item is picked ~1/n^exponent as often as the first"""
+    cum_weights, total = [], 0.0
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+def _next_id(db: Session, model) -> int:
+    """First id past the existing rows, so generated names don't collide with an earlier run"""
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def generate_creators(count: int, start: int, rng: random.Random, now: datetime) -> Iterator[Dict[str, Any]]:
+    categories = list(CATEGORY_WEIGHTS)
+    for index in range(start, start + count):
+        # Audience size is heavy-tailed: a few channels have millions of followers
+        followers = int(min(rng.paretovariate(1.1) * 200, 20_000_000))
+        yield {
+            "name": f"Creator {index}",
+            "username": f"creator_{index}",
+            "bio": "Synthetic creator for load testing",
+            "followers_count": followers,
+            "verified": followers > 50_000,
+            "platform": rng.choice(("youtube", "tiktok", "both")),
+            "categories": ",".join(category.value for category in rng.sample(categories, rng.randint(1, 3))),
+            "created_at": now - timedelta(days=rng.uniform(30, 1500))
+        }
+
+
+def generate_users(count: int, start: int, rng: random.Random, now: datetime, hashed_password: str) -> Iterator[Dict[str, Any]]:
+    for index in range(start, start + count):
+        yield {
+            "username": f"user_{index}",
+            "email": f"user_{index}@example.com",
+            "hashed_password": hashed_password,
+            "full_name": f"User {index}",
+            "is_active": rng.random() > 0.02,
+            "created_at": now - timedelta(days=rng.uniform(0, 730))
+        }
+
+
+def generate_videos(
+    count: int,
+    creator_ids: List[int],
+    rng: random.Random,
+    now: datetime,
+    days: int = 365
+) -> Iterator[Dict[str, Any]]:
+    """
+    Video rows with realistic skew
+
+    Categories, difficulties and topics follow fixed popularity weights and
+    creators are picked Zipf-style, so a few channels own much of the
+    catalogue. Views are log-normal with a heavy tail, grow with age, and
+    likes are 1-10% of views.
+    """
+    categories = list(CATEGORY_WEIGHTS)
+    category_weights = list(CATEGORY_WEIGHTS.values())
+    difficulties = list(DIFFICULTY_WEIGHTS)
+    difficulty_weights = list(DIFFICULTY_WEIGHTS.values())
+    topic_weights = {category: _zipf_cum_weights(len(topics)) for category, topics in CATEGORY_TOPICS.items()}
+    creator_weights = _zipf_cum_weights(len(creator_ids))
+
+    for _ in range(count):
+        category = rng.choices(categories, category_weights)[0]
+        difficulty = rng.choices(difficulties, difficulty_weights)[0]
+        topics = CATEGORY_TOPICS[category]
+        topic, other = rng.choices(topics, cum_weights=topic_weights[category], k=2)
+        title = rng.choice(TITLE_TEMPLATES[difficulty]).format(topic=topic.title(), other=other.title())
+        tags = {category.value, difficulty.value, topic.replace(" ", "-")}
+        tags.update(tag.replace(" ", "-") for tag in rng.choices(topics, cum_weights=topic_weights[category], k=rng.randint(1, 3)))
+
+        age_days = rng.uniform(0, days)
+        views = int(rng.lognormvariate(6, 2) * min(1.0, (age_days + 1) / 30))
+        ai_generated = rng.random() < 0.2
+        yield {
+            "title": title,
+            "description": f"{'A' if difficulty == VideoDifficulty.BEGINNER else 'An'} {difficulty.value} video about {topic}.",
+            "video_url": f"/data/{rng.choice(VIDEO_FILES)}",
+            "duration": int(min(rng.lognormvariate(4.8, 0.5), 600)),
+            "views": views,
+            "likes": int(views * rng.uniform(0.01, 0.1)),
+            "category": category,
+            "difficulty": difficulty,
+            "tags": ",".join(sorted(tags)),
+            "source": SYNTHETIC_SOURCE,
+            "is_educational": True,
+            "is_verified": rng.random() < 0.3,
+            "creator_id": rng.choices(creator_ids, cum_weights=creator_weights)[0],
+            "content_source": ContentSource.AI_GENERATED if ai_generated else ContentSource.MANUAL,
+            "generation_status": GenerationStatus.COMPLETED,
+            "created_at": now - timedelta(days=age_days)
+        }
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return "\\N"
+    if isinstance(value, Enum):
+        # SQLAlchemy stores Python enums by member name
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _copy_batch(db: Session, model, columns: List[str], batch: List[Dict[str, Any]]):
+    """Load a batch with PostgreSQL COPY, much faster than INSERT for large loads"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_load(db: Session, model, columns: List[str], rows: Iterable[Dict[str, Any]], batch_size: int) -> int:
+    """
+    Insert rows in batches, committing after each one
+
+    Uses COPY on PostgreSQL with psycopg2 and an executemany INSERT elsewhere.
+
+    Returns:
+        Number of rows inserted
+    """
+    bind = db.get_bind()
+    use_copy = bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+    total = 0
+    started = time.perf_counter()
+
+    for batch in _batches(rows, batch_size):
+        if use_copy:
+            _copy_batch(db, model, columns, batch)
+        else:
+            db.execute(insert(model), batch)
+        db.commit()
+        total += len(batch)
+        if total % (batch_size * 20) < len(batch):
+            rate = total / max(time.perf_counter() - started, 1e-9)
+            logger.info(f"📦 {model.__tablename__}: {total} rows ({rate:,.0f}/s)")
+
+    return total
+
+
+def load_synthetic_catalogue(
+    db: Session,
+    videos: int = 1_000_000,
+    users: int = 100_000,
+    creators: int = 5_000,
+    seed: int = 1,
+    batch_size: int = 5_000,
+    days: int = 365
+) -> Dict[str, Any]:
+    """
+    Bulk-load a synthetic catalogue for performance testing
+
+    Rows are appended to what is already there; names continue from the
+    highest existing id, so loading twice doubles the catalogue. Every
+    synthetic user has the password "password123" (hashed once, since
+    hashing per user would dominate the load).
+
+    Args:
+        db: Database session
+        videos: Videos to create
+        users: Users to create
+        creators: Creators to create (videos are spread over new creators only)
+        seed: Random seed; the same seed on an empty database gives the same data
+        batch_size: Rows per INSERT/COPY round trip and commit
+        days: Spread of video upload dates into the past
+
+    Returns:
+        Row counts and load time per table
+    """
+    if videos and not creators:
+        raise ValueError("Synthetic videos need at least one synthetic creator")
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    report: Dict[str, Any] = {"seed": seed}
+    started = time.perf_counter()
+
+    first_creator = _next_id(db, Creator)
+    table_started = time.perf_counter()
+    report["creators"] = bulk_load(
+        db, Creator, CREATOR_COLUMNS, generate_creators(creators, first_creator, rng, now), batch_size
+    )
+    report["creators_seconds"] = round(time.perf_counter() - table_started, 2)
+
+    if users:
+        table_started = time.perf_counter()
+        hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+        report["users"] = bulk_load(
+            db, User, USER_COLUMNS, generate_users(users, _next_id(db, User), rng, now, hashed_password), batch_size
+        )
+        report["users_seconds"] = round(time.perf_counter() - table_started, 2)
+
+    if videos:
+        creator_ids = [
+            creator_id for (creator_id,) in
+            db.query(Creator.id).filter(Creator.id >= first_creator).order_by(Creator.id).limit(creators)
+        ]
+        table_started = time.perf_counter()
+        report["videos"] = bulk_load(
+            db, Video, VIDEO_COLUMNS, generate_videos(videos, creator_ids, rng, now, days), batch_size
+        )
+        report["videos_seconds"] = round(time.perf_counter() - table_started, 2)
+
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"✅ Synthetic catalogue loaded in {report['seconds']}s")
+    return report
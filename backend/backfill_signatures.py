@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index backfill script for EduTok backend
+
+Computes MinHash signatures and LSH buckets for every video whose script is
+not indexed yet, in batches. Run it once after migrate.py creates the tables,
+and with --rebuild after changing the DEDUP_* signature settings.
+"""
+
+import sys
+import os
+import json
+import logging
+import argparse
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.database import get_db
+from app.services.near_duplicates import near_duplicate_index
+
+
+def main():
+    """Main function to backfill script signatures"""
+    parser = argparse.ArgumentParser(description="Index existing video scripts for near-duplicate detection")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="Videos read and indexed per round trip (default: 500)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Drop all signatures and index every video again")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = next(get_db())
+
+    try:
+        report = near_duplicate_index.backfill(db, batch_size=args.batch_size, rebuild=args.rebuild)
+        print(json.dumps(report, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
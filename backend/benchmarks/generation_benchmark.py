@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+End-to-end generation benchmark for EduTok backend
+
+Drives the script, create-video and batch generation endpoints at a fixed
+concurrency and reports throughput and p50/p95/p99 latency per stage. Run it
+against a backend that points at the mock providers, or let it start both:
+
+    python benchmarks/generation_benchmark.py --spawn --requests 50 --concurrency 10
+    python benchmarks/generation_benchmark.py --base-url http://127.0.0.1:8000 --scenarios script
+
+With --spawn, the mock providers and a fresh API (own SQLite database and
+working directory) are started in subprocesses; extra --mock-arg values are
+passed to mock_providers.py, e.g. --mock-arg=--rate-limit-rate=0.1.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Any
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+SCENARIOS = ("script", "create-video", "batch")
+FINISHED_JOB_STATUSES = {"completed", "failed", "dead-letter"}
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, int(round(p / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(name: str, latencies: List[float], errors: int, fallbacks: int, elapsed: float, units: int) -> Dict[str, Any]:
+    """Throughput and latency percentiles for one stage"""
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "stage": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "fallbacks": fallbacks,
+        "throughput_per_second": round(units / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None)
+    }
+
+
+class GenerationBenchmark:
+    """Runs benchmark scenarios against one backend"""
+
+    def __init__(self, base_url: str, concurrency: int, batch_size: int, poll_interval: float):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.run_id = uuid.uuid4().hex[:8]
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def login(self):
+        email = f"bench-{self.run_id}@example.com"
+        password = "benchmark-password"
+        await self.client.post("/auth/register", json={"username": f"bench_{self.run_id}", "email": email, "password": password})
+        response = await self.client.post("/auth/login", json={"email": email, "password": password})
+        response.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    def _script(self, index: int) -> str:
+        # Unique paragraphs so the TTS segment cache doesn't hide provider latency
+        tag = f"{self.run_id}-{index}"
+        return "\n\n".join([
+            f"Welcome to benchmark video {tag}. Today we're learning about load testing.",
+            f"Run {tag} measures how long the narration pipeline takes end to end.",
+            f"That's it for benchmark {tag}! Thanks for watching."
+        ])
+
+    async def _request_script(self, index: int) -> Dict[str, Any]:
+        response = await self.client.post("/videos/ai/generate-script", params={
+            "topic": f"Benchmark topic {self.run_id}-{index}",
+            "category": "programming",
+            "difficulty": "beginner",
+            "duration_minutes": 1,
+            "cache": "bypass"
+        })
+        response.raise_for_status()
+        return response.json()
+
+    async def _request_video(self, index: int) -> Dict[str, Any]:
+        response = await self.client.post("/videos/ai/create-video", params={
+            "script": self._script(index),
+            "title": f"Benchmark video {self.run_id}-{index}",
+            "category": "programming",
+            "difficulty": "beginner"
+        })
+        response.raise_for_status()
+        return response.json()
+
+    async def _run_batch(self, index: int) -> Dict[str, Any]:
+        topics = [f"Benchmark batch {self.run_id}-{index}-{n}" for n in range(self.batch_size)]
+        response = await self.client.post(
+            "/videos/ai/generate-batch",
+            params={"category": "programming", "difficulty": "beginner"},
+            json=topics
+        )
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+
+        while True:
+            job = (await self.client.get(f"/videos/ai/jobs/{job_id}")).json()
+            if job["status"] in FINISHED_JOB_STATUSES:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+    @staticmethod
+    def _is_fallback(scenario: str, result: Dict[str, Any]) -> bool:
+        if scenario == "script":
+            return "placeholder" in (result.get("result") or result).get("ai_tools_used", [])
+        if scenario == "batch":
+            return result.get("status") != "completed"
+        return False
+
+    async def run_scenario(self, scenario: str, requests: int) -> Dict[str, Any]:
+        """Issue `requests` calls of one scenario, at most `concurrency` at a time"""
+        runners = {"script": self._request_script, "create-video": self._request_video, "batch": self._run_batch}
+        runner = runners[scenario]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: List[float] = []
+        errors = 0
+        fallbacks = 0
+
+        async def one(index: int):
+            nonlocal errors, fallbacks
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await runner(index)
+                except Exception as e:
+                    errors += 1
+                    print(f"  {scenario} #{index} failed: {e}", file=sys.stderr)
+                    return
+                latencies.append(time.perf_counter() - started)
+                if self._is_fallback(scenario, result):
+                    fallbacks += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(requests)))
+        elapsed = time.perf_counter() - started
+
+        # A batch job produces batch_size videos, so report videos per second
+        units = len(latencies) * (self.batch_size if scenario == "batch" else 1)
+        return summarize(scenario, latencies, errors, fallbacks, elapsed, units)
+
+    async def run(self, scenarios: List[str], requests: int) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=self.concurrency * 2)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=600, limits=limits) as client:
+            self.client = client
+            await self.login()
+
+            stages = []
+            for scenario in scenarios:
+                print(f"▶ {scenario}: {requests} requests at concurrency {self.concurrency}", file=sys.stderr)
+                stages.append(await self.run_scenario(scenario, requests))
+
+            status = (await client.get("/videos/ai/service-status")).json()
+
+        return {
+            "base_url": self.base_url,
+            "concurrency": self.concurrency,
+            "requests_per_stage": requests,
+            "batch_size": self.batch_size,
+            "stages": stages,
+            "service_status": status.get("services")
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, process: subprocess.Popen, timeout: float = 60):
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} server exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+
+class SpawnedStack:
+    """Mock providers plus a fresh API process, torn down on exit"""
+
+    def __init__(self, mock_args: List[str]):
+        self.mock_args = mock_args
+        self.workdir = tempfile.mkdtemp(prefix="edutok-bench-")
+        self.processes: List[subprocess.Popen] = []
+
+    def __enter__(self) -> str:
+        mock_port = _free_port()
+        api_port = _free_port()
+        mock_url = f"http://127.0.0.1:{mock_port}/v1"
+
+        env = {
+            **os.environ,
+            "PYTHONPATH": BACKEND_DIR,
+            "DATABASE_URL": f"sqlite:///{self.workdir}/bench.db",
+            "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{self.workdir}/bench.db",
+            "OPENAI_API_KEY": "mock",
+            "ELEVENLABS_API_KEY": "mock",
+            "OPENAI_BASE_URL": mock_url,
+            "ELEVENLABS_BASE_URL": mock_url,
+            "TTS_CACHE_DIR": os.path.join(self.workdir, "temp", "tts_cache")
+        }
+
+        mock = subprocess.Popen(
+            [sys.executable, os.path.join(BENCHMARK_DIR, "mock_providers.py"), "--port", str(mock_port), *self.mock_args],
+            cwd=self.workdir
+        )
+        self.processes.append(mock)
+
+        subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "migrate.py")], cwd=self.workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", BACKEND_DIR,
+             "--host", "127.0.0.1", "--port", str(api_port), "--log-level", "warning"],
+            cwd=self.workdir,
+            env=env
+        )
+        self.processes.append(api)
+
+        _wait_for(f"http://127.0.0.1:{mock_port}/mock/stats", mock)
+        _wait_for(f"http://127.0.0.1:{api_port}/health", api)
+        return f"http://127.0.0.1:{api_port}"
+
+    def __exit__(self, *exc):
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'stage':<14}{'reqs':>6}{'errors':>8}{'fallbk':>8}{'per sec':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage in report["stages"]:
+        print(
+            f"{stage['stage']:<14}{stage['requests']:>6}{stage['errors']:>8}{stage['fallbacks']:>8}"
+            f"{stage['throughput_per_second'] or 0:>10}{stage['p50_ms'] or 0:>10}{stage['p95_ms'] or 0:>10}"
+            f"{stage['p99_ms'] or 0:>10}{stage['max_ms'] or 0:>10}"
+        )
+
+
+def main():
+    """Main function to run the generation benchmark"""
+    parser = argparse.ArgumentParser(description="Load-test the AI generation endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000",
+                        help="Backend to benchmark (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start the mock providers and a fresh API instead of using --base-url")
+    parser.add_argument("--mock-arg", action="append", default=[],
+                        help="Extra argument for mock_providers.py (repeatable, with --spawn)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated stages to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per stage (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Requests in flight at once (default: 5)")
+    parser.add_argument("--batch-size", type=int, default=3, help="Topics per batch job (default: 3)")
+    parser.add_argument("--poll-interval", type=float, default=0.25,
+                        help="Seconds between batch job status polls (default: 0.25)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    async def run(base_url: str) -> Dict[str, Any]:
+        benchmark = GenerationBenchmark(base_url, args.concurrency, args.batch_size, args.poll_interval)
+        return await benchmark.run(scenarios, args.requests)
+
+    if args.spawn:
+        with SpawnedStack(args.mock_arg) as base_url:
+            report = asyncio.run(run(base_url))
+    else:
+        report = asyncio.run(run(args.base_url))
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark for EduTok backend
+
+Replays read-heavy client traffic against a backend and reports throughput
+and p50/p95/p99 latency per scenario:
+
+    feed       GET /videos/ paging through the feed
+    category   GET /videos/category/{category} across categories
+    search     GET /videos/search/ with common query terms
+    stream     ranged GET /data/{filename} from many concurrent viewers
+    polling    authenticated GET /users/me and /videos/ai/generation-status/{id}
+
+With --spawn or --in-process a synthetic catalogue (and video files to
+stream) is built in a scratch directory first, so runs are reproducible for
+a given --seed. Compare a run to a stored baseline to catch regressions
+before deploying; the exit status is 1 when a scenario got slower than the
+tolerance allows:
+
+    python benchmarks/http_benchmark.py --spawn --json > report.json
+    python benchmarks/http_benchmark.py --spawn --baseline benchmarks/baselines/http_benchmark.json
+    python benchmarks/http_benchmark.py --spawn --save-baseline benchmarks/baselines/http_benchmark.json
+    python benchmarks/http_benchmark.py --base-url http://127.0.0.1:8000 --scenarios feed,search
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Any
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+SCENARIOS = ("feed", "category", "search", "stream", "polling")
+# The feed endpoints only list videos backed by one of these files
+STREAM_FILES = ("python-explained.mp4", "sql-nosql.mp4", "data-engineer.mp4")
+CATEGORIES = (
+    "data-engineering", "ai", "data-science", "technology",
+    "programming", "machine-learning", "web-development", "mobile-development"
+)
+SEARCH_TERMS = ("python", "sql", "learning", "data", "intro", "pipelines", "neural", "api", "zzzz-no-match")
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, int(round(p / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float, transferred: int) -> Dict[str, Any]:
+    """Throughput and latency percentiles for one scenario"""
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "bytes_per_second": round(transferred / elapsed) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None)
+    }
+
+
+def build_catalogue(workdir: str, videos: int, users: int, creators: int, file_mb: int, seed: int) -> Dict[str, Any]:
+    """
+    Create a seeded SQLite database and the files /data/{filename} serves
+
+    The API runs in `workdir`/api, since stream_video reads ../data.
+    """
+    os.makedirs(os.path.join(workdir, "api"), exist_ok=True)
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    block = random.Random(seed).randbytes(1024 * 1024)
+    for filename in STREAM_FILES:
+        with open(os.path.join(data_dir, filename), "wb") as file:
+            for _ in range(file_mb):
+                file.write(block)
+
+    os.environ.update(_api_env(workdir))
+    sys.path.insert(0, BACKEND_DIR)
+    from app.database import SessionLocal, init_db
+    from app.utils.synthetic_data import load_synthetic_catalogue
+
+    init_db()
+    db = SessionLocal()
+    try:
+        report = load_synthetic_catalogue(db, videos=videos, users=users, creators=creators, seed=seed)
+    finally:
+        db.close()
+    report["stream_file_mb"] = file_mb
+    return report
+
+
+class HttpBenchmark:
+    """Runs load scenarios against one backend"""
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.total_videos = 0
+        self.video_ids: List[int] = []
+        self.file_sizes: Dict[str, int] = {}
+        self.tokens: List[str] = []
+
+    async def prepare(self, scenarios: List[str]):
+        """Discover catalogue size, stream files and sign in the polling clients"""
+        feed = (await self.client.get("/videos/", params={"limit": 100})).json()
+        self.total_videos = feed["total"]
+        self.video_ids = [video["id"] for video in feed["videos"]]
+
+        if "stream" in scenarios:
+            for filename in STREAM_FILES:
+                response = await self.client.get(f"/data/{filename}", headers={"Range": "bytes=0-0"})
+                if response.status_code == 206:
+                    self.file_sizes[filename] = int(response.headers["content-range"].rsplit("/", 1)[1])
+            if not self.file_sizes:
+                raise RuntimeError("No /data/{filename} file to stream; seed the backend first")
+
+        if "polling" in scenarios:
+            async def sign_in(index: int) -> str:
+                email = f"bench-{self.run_id}-{index}@example.com"
+                password = "benchmark-password"
+                await self.client.post("/auth/register", json={"username": f"bench_{self.run_id}_{index}", "email": email, "password": password})
+                response = await self.client.post("/auth/login", json={"email": email, "password": password})
+                response.raise_for_status()
+                return response.json()["access_token"]
+
+            self.tokens = await asyncio.gather(*(sign_in(index) for index in range(self.args.pollers)))
+
+    async def _get(self, url: str, **kwargs) -> int:
+        response = await self.client.get(url, **kwargs)
+        response.raise_for_status()
+        return len(response.content)
+
+    async def _feed(self) -> int:
+        pages = max(self.total_videos // self.args.page_size, 1)
+        return await self._get("/videos/", params={"skip": self.rng.randrange(pages) * self.args.page_size, "limit": self.args.page_size})
+
+    async def _category(self) -> int:
+        # Browsing mostly stays on the first pages
+        skip = min(int(self.rng.expovariate(1 / 2)), 20) * self.args.page_size
+        return await self._get(f"/videos/category/{self.rng.choice(CATEGORIES)}", params={"skip": skip, "limit": self.args.page_size})
+
+    async def _search(self) -> int:
+        return await self._get("/videos/search/", params={"q": self.rng.choice(SEARCH_TERMS), "limit": self.args.page_size})
+
+    async def _run_requests(self, name: str, request) -> Dict[str, Any]:
+        """Issue --requests calls of `request`, at most --concurrency at a time, after a warmup"""
+        for _ in range(self.args.warmup):
+            try:
+                await request()
+            except Exception:
+                pass
+
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies: List[float] = []
+        errors = 0
+        transferred = 0
+
+        async def one(index: int):
+            nonlocal errors, transferred
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    transferred += await request()
+                except Exception as e:
+                    errors += 1
+                    print(f"  {name} #{index} failed: {e!r}", file=sys.stderr)
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(self.args.requests)))
+        return summarize(name, latencies, errors, time.perf_counter() - started, transferred)
+
+    async def _stream(self) -> Dict[str, Any]:
+        """Each viewer plays a file like a video player: sequential byte ranges, with the odd seek"""
+        range_bytes = self.args.range_kb * 1024
+        latencies: List[float] = []
+        errors = 0
+        transferred = 0
+
+        async def viewer(index: int):
+            nonlocal errors, transferred
+            rng = random.Random(self.args.seed + index)
+            filename = rng.choice(sorted(self.file_sizes))
+            size = self.file_sizes[filename]
+            offset = 0
+            for _ in range(self.args.ranges_per_viewer):
+                if rng.random() < 0.1:
+                    offset = rng.randrange(size)
+                end = min(offset + range_bytes, size) - 1
+                started = time.perf_counter()
+                try:
+                    response = await self.client.get(f"/data/{filename}", headers={"Range": f"bytes={offset}-{end}"})
+                    if response.status_code != 206 or len(response.content) != end - offset + 1:
+                        raise RuntimeError(f"status {response.status_code}, {len(response.content)} bytes")
+                except Exception as e:
+                    errors += 1
+                    print(f"  stream viewer {index} failed: {e!r}", file=sys.stderr)
+                    continue
+                latencies.append(time.perf_counter() - started)
+                transferred += end - offset + 1
+                offset = end + 1 if end + 1 < size else 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(viewer(index) for index in range(self.args.viewers)))
+        return summarize("stream", latencies, errors, time.perf_counter() - started, transferred)
+
+    async def _polling(self) -> Dict[str, Any]:
+        """Signed-in clients polling their profile and a video's generation status"""
+        latencies: List[float] = []
+        errors = 0
+        transferred = 0
+
+        async def poller(index: int):
+            nonlocal errors, transferred
+            rng = random.Random(self.args.seed + index)
+            headers = {"Authorization": f"Bearer {self.tokens[index]}"}
+            for poll in range(self.args.polls_per_client):
+                url = "/users/me" if poll % 2 == 0 else f"/videos/ai/generation-status/{rng.choice(self.video_ids)}"
+                started = time.perf_counter()
+                try:
+                    transferred += await self._get(url, headers=headers)
+                except Exception as e:
+                    errors += 1
+                    print(f"  poller {index} failed: {e!r}", file=sys.stderr)
+                else:
+                    latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(self.args.poll_interval)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(poller(index) for index in range(len(self.tokens))))
+        return summarize("polling", latencies, errors, time.perf_counter() - started, transferred)
+
+    async def run(self, scenarios: List[str]) -> List[Dict[str, Any]]:
+        await self.prepare(scenarios)
+        runners = {
+            "feed": lambda: self._run_requests("feed", self._feed),
+            "category": lambda: self._run_requests("category", self._category),
+            "search": lambda: self._run_requests("search", self._search),
+            "stream": self._stream,
+            "polling": self._polling
+        }
+        results = []
+        for scenario in scenarios:
+            print(f"▶ {scenario}", file=sys.stderr)
+            results.append(await runners[scenario]())
+        return results
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenarios slower (p50/p95), slower to serve (throughput) or failing more than the baseline allows"""
+    regressions = []
+    previous = {scenario["scenario"]: scenario for scenario in baseline.get("scenarios", [])}
+    for scenario in report["scenarios"]:
+        before = previous.get(scenario["scenario"])
+        if before is None:
+            continue
+        name = scenario["scenario"]
+        for key in ("p50_ms", "p95_ms"):
+            if before.get(key) and scenario[key] is not None and scenario[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {scenario[key]} > baseline {before[key]} (+{tolerance:.0%})")
+        if before.get("throughput_per_second") and (scenario["throughput_per_second"] or 0) < before["throughput_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {scenario['throughput_per_second']}/s < baseline {before['throughput_per_second']}/s (-{tolerance:.0%})"
+            )
+        if scenario["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: {scenario['errors']} errors, baseline had {before.get('errors', 0)}")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, process: subprocess.Popen, timeout: float = 60):
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} server exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+
+def _api_env(workdir: str) -> Dict[str, str]:
+    """Production-like settings without background work that would skew latencies"""
+    return {
+        "DEBUG": "false",
+        "JOB_INLINE_WORKER": "false",
+        "AI_HEALTH_PROBE_INTERVAL_SECONDS": "0",
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{workdir}/bench.db"
+    }
+
+
+async def run_benchmark(args: argparse.Namespace, scenarios: List[str], workdir: Optional[str]) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.viewers, args.pollers) * 2)
+
+    if args.in_process:
+        os.environ.update(_api_env(workdir))
+        os.chdir(os.path.join(workdir, "api"))
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+            return await HttpBenchmark(client, args).run(scenarios)
+
+    async with httpx.AsyncClient(base_url=args.base_url.rstrip("/"), timeout=args.timeout, limits=limits) as client:
+        return await HttpBenchmark(client, args).run(scenarios)
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'scenario':<10}{'reqs':>7}{'errors':>8}{'per sec':>10}{'MB/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for scenario in report["scenarios"]:
+        print(
+            f"{scenario['scenario']:<10}{scenario['requests']:>7}{scenario['errors']:>8}"
+            f"{scenario['throughput_per_second'] or 0:>10}{(scenario['bytes_per_second'] or 0) / 1e6:>9.1f}"
+            f"{scenario['p50_ms'] or 0:>10}{scenario['p95_ms'] or 0:>10}{scenario['p99_ms'] or 0:>10}{scenario['max_ms'] or 0:>10}"
+        )
+
+
+def main():
+    """Main function to run the HTTP benchmark"""
+    parser = argparse.ArgumentParser(description="Load-test the read endpoints against a synthetic catalogue")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000",
+                        help="Already-seeded backend to benchmark (ignored with --spawn/--in-process)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--spawn", action="store_true", help="Seed a scratch database and start uvicorn on it")
+    mode.add_argument("--in-process", action="store_true",
+                      help="Seed a scratch database and call the app through httpx's ASGI transport (no network)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--videos", type=int, default=20000, help="Synthetic videos to seed (default: 20000)")
+    parser.add_argument("--users", type=int, default=10000, help="Synthetic users to seed (default: 10000)")
+    parser.add_argument("--creators", type=int, default=500, help="Synthetic creators to seed (default: 500)")
+    parser.add_argument("--stream-file-mb", type=int, default=16, help="Size of each file to stream (default: 16)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for data and traffic (default: 1)")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per feed/category/search scenario (default: 300)")
+    # Above the database pool's 15 connections, requests queue for a connection inside the event loop
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once (default: 10)")
+    parser.add_argument("--warmup", type=int, default=10, help="Unrecorded requests before each scenario (default: 10)")
+    parser.add_argument("--page-size", type=int, default=20, help="Feed page size (default: 20)")
+    parser.add_argument("--viewers", type=int, default=50, help="Concurrent stream viewers (default: 50)")
+    parser.add_argument("--ranges-per-viewer", type=int, default=8, help="Range requests per viewer (default: 8)")
+    parser.add_argument("--range-kb", type=int, default=512, help="Bytes per range request, in KiB (default: 512)")
+    parser.add_argument("--pollers", type=int, default=10, help="Signed-in polling clients (default: 10)")
+    parser.add_argument("--polls-per-client", type=int, default=20, help="Polls per client (default: 20)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between a client's polls (default: 0.05)")
+    parser.add_argument("--timeout", type=float, default=15, help="Per-request timeout in seconds, counted as an error (default: 15)")
+    parser.add_argument("--baseline", help="Baseline report to compare against; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed slowdown against the baseline, as a fraction (default: 0.3)")
+    parser.add_argument("--save-baseline", help="Write this run's report to the given path as the new baseline")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report: Dict[str, Any] = {
+        "mode": "spawn" if args.spawn else "in-process" if args.in_process else args.base_url,
+        "parameters": {
+            key: getattr(args, key) for key in (
+                "videos", "users", "creators", "stream_file_mb", "seed", "requests", "concurrency", "page_size",
+                "viewers", "ranges_per_viewer", "range_kb", "pollers", "polls_per_client", "poll_interval"
+            )
+        }
+    }
+
+    workdir = None
+    processes: List[subprocess.Popen] = []
+    try:
+        if args.spawn or args.in_process:
+            workdir = tempfile.mkdtemp(prefix="edutok-http-bench-")
+            print(f"▶ seeding {args.videos} videos in {workdir}", file=sys.stderr)
+            report["catalogue"] = build_catalogue(workdir, args.videos, args.users, args.creators, args.stream_file_mb, args.seed)
+
+        if args.spawn:
+            port = _free_port()
+            api = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", BACKEND_DIR,
+                 "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                cwd=os.path.join(workdir, "api"),
+                env={**os.environ, "PYTHONPATH": BACKEND_DIR, **_api_env(workdir)}
+            )
+            processes.append(api)
+            args.base_url = f"http://127.0.0.1:{port}"
+            _wait_for(f"{args.base_url}/health", api)
+
+        report["scenarios"] = asyncio.run(run_benchmark(args, scenarios, workdir))
+    finally:
+        for process in processes:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("parameters") != report["parameters"]:
+            print("⚠️ Baseline was recorded with different parameters; comparison may be meaningless", file=sys.stderr)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+
+    for regression in regressions:
+        print(f"❌ {regression}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
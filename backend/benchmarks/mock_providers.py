@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI and ElevenLabs APIs
+
+Speaks enough of both wire formats for the backend to run end to end without
+API keys: chat completions (plain and streamed), voices, text-to-speech and
+the /models health probe. Latency, error rate and 429 rate are configurable
+so the generation pipeline can be load-tested against a degraded provider.
+
+    python benchmarks/mock_providers.py --port 9100 --chat-latency lognormal:1.5:0.4 --rate-limit-rate 0.05
+
+Then point the backend at it:
+
+    OPENAI_API_KEY=mock ELEVENLABS_API_KEY=mock \\
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 ELEVENLABS_BASE_URL=http://127.0.0.1:9100/v1 \\
+    python run.py
+
+Latency specs are `fixed:SECONDS`, `uniform:LOW:HIGH`, `normal:MEAN:STDDEV`
+or `lognormal:MEDIAN:SIGMA`. GET /mock/stats reports request counts and
+POST /mock/config changes any setting while the server is running.
+"""
+
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, Any
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# An MPEG-1 Layer III frame header (128 kbps, 44.1 kHz, no padding); each frame is 417 bytes, ~26 ms
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+MP3_FRAME_SECONDS = 1152 / 44100
+ID3_HEADER = b"ID3\x04\x00\x00\x00\x00\x00\x00"
+CHARACTERS_PER_SECOND = 15  # Rough speaking rate used to size the audio
+
+VOICES = [
+    {"voice_id": "TxGEqnHWrfWFTfGW9XjX", "name": "Josh"},
+    {"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel"},
+    {"voice_id": "ErXwobaYiN019PkySvjV", "name": "Antoni"}
+]
+
+config: Dict[str, Any] = {
+    "chat_latency": "lognormal:1.5:0.4",
+    "tts_latency": "lognormal:0.6:0.3",
+    "token_delay": 0.01,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after": 1.0
+}
+stats: Dict[str, int] = {}
+
+app = FastAPI(title="Mock AI providers")
+
+
+def sample_latency(spec: str) -> float:
+    """Draw one latency in seconds from a spec like `lognormal:1.5:0.4`"""
+    kind, *params = spec.split(":")
+    values = [float(param) for param in params]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return random.uniform(values[0], values[1])
+    if kind == "normal":
+        return max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _count(key: str):
+    stats[key] = stats.get(key, 0) + 1
+
+
+def injected_failure(endpoint: str):
+    """Return an error response for this request according to the configured rates, or None"""
+    roll = random.random()
+    if roll < config["rate_limit_rate"]:
+        _count(f"{endpoint}:429")
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}},
+            status_code=429,
+            headers={"Retry-After": str(config["retry_after"])}
+        )
+    if roll < config["rate_limit_rate"] + config["error_rate"]:
+        _count(f"{endpoint}:500")
+        return JSONResponse({"error": {"message": "Internal server error (mock)", "type": "server_error"}}, status_code=500)
+    _count(f"{endpoint}:200")
+    return None
+
+
+def _mock_script(messages) -> str:
+    prompt = messages[-1]["content"] if messages else ""
+    first_line = prompt.strip().splitlines()[0] if prompt.strip() else "this topic"
+    paragraphs = [
+        f"Welcome! {first_line}",
+        "Let's start with the core idea and why it matters. " * 3,
+        "Here is a worked example you can follow along with. " * 4,
+        "A common mistake is to skip the fundamentals, so let's recap them. " * 2,
+        "That's it for today! Practice what you've learned and see you next time."
+    ]
+    return "\n\n".join(paragraph.strip() for paragraph in paragraphs)
+
+
+@app.get("/v1/models")
+async def list_models():
+    _count("models:200")
+    return {"object": "list", "data": [{"id": "gpt-4", "object": "model"}, {"model_id": "eleven_monolingual_v1"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(sample_latency(config["chat_latency"]))
+
+    failure = injected_failure("chat")
+    if failure:
+        return failure
+
+    script = _mock_script(body.get("messages", []))
+    model = body.get("model", "gpt-4")
+
+    if not body.get("stream"):
+        return {
+            "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": script}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(script) // 4, "total_tokens": len(script) // 4}
+        }
+
+    async def events():
+        for word in script.split(" "):
+            chunk = {"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config["token_delay"])
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/v1/voices")
+async def list_voices():
+    _count("voices:200")
+    return {"voices": VOICES}
+
+
+@app.post("/v1/text-to-speech/{voice_id}")
+async def text_to_speech(voice_id: str, request: Request):
+    body = await request.json()
+    await asyncio.sleep(sample_latency(config["tts_latency"]))
+
+    failure = injected_failure("tts")
+    if failure:
+        return failure
+
+    seconds = max(1.0, len(body.get("text", "")) / CHARACTERS_PER_SECOND)
+    frames = int(seconds / MP3_FRAME_SECONDS)
+    return Response(ID3_HEADER + MP3_FRAME * frames, media_type="audio/mpeg")
+
+
+@app.get("/mock/stats")
+async def get_stats():
+    return {"config": config, "requests": stats}
+
+
+@app.post("/mock/config")
+async def update_config(request: Request):
+    changes = await request.json()
+    unknown = set(changes) - set(config)
+    if unknown:
+        return JSONResponse({"detail": f"Unknown settings: {sorted(unknown)}"}, status_code=400)
+    for key in ("chat_latency", "tts_latency"):
+        if key in changes:
+            sample_latency(changes[key])  # Validate before applying
+    config.update(changes)
+    stats.clear()
+    return {"config": config}
+
+
+def main():
+    """Main function to run the mock provider server"""
+    parser = argparse.ArgumentParser(description="Serve mock OpenAI and ElevenLabs APIs for local load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--chat-latency", default=config["chat_latency"],
+                        help="Chat completion latency spec (default: %(default)s)")
+    parser.add_argument("--tts-latency", default=config["tts_latency"],
+                        help="Text-to-speech latency spec (default: %(default)s)")
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"],
+                        help="Seconds between streamed tokens (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 500 (default: 0)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 429 (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with 429s (default: 1)")
+    args = parser.parse_args()
+
+    for spec in (args.chat_latency, args.tts_latency):
+        sample_latency(spec)
+
+    config.update({
+        "chat_latency": args.chat_latency,
+        "tts_latency": args.tts_latency,
+        "token_delay": args.token_delay,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "retry_after": args.retry_after
+    })
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
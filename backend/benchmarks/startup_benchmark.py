@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for EduTok backend
+
+Measures how long `import app.main` takes (via `python -X importtime`) and
+how long a fresh uvicorn process takes to answer GET /health with a 200.
+Exits non-zero when either exceeds its budget, so it can gate CI:
+
+    python benchmarks/startup_benchmark.py --import-budget-ms 3000 --ready-budget-ms 6000
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+import urllib.error
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(python: str) -> dict:
+    """Import app.main in a fresh interpreter and read its cumulative import time"""
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not parts[0].isdigit():
+            continue
+        modules[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    return {
+        "import_ms": modules["app.main"][1] / 1000,
+        "slowest_self_ms": {name: round(self_us / 1000, 1) for name, (self_us, _) in slowest}
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(python: str, timeout: float) -> float:
+    """Start uvicorn and time how long until /health returns 200"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [python, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"/health did not return 200 within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    """Main function to run the startup benchmark"""
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-200 on /health")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="Measurements per metric; the median is compared to the budget (default: 3)")
+    parser.add_argument("--import-budget-ms", type=float, default=3000,
+                        help="Maximum median import time of app.main (default: 3000)")
+    parser.add_argument("--ready-budget-ms", type=float, default=6000,
+                        help="Maximum median time from process start to a 200 on /health (default: 6000)")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="Give up waiting for /health after this many seconds (default: 60)")
+    parser.add_argument("--python", default=sys.executable,
+                        help="Interpreter to benchmark (default: the current one)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    imports = [measure_import(args.python) for _ in range(args.runs)]
+    ready = [measure_ready(args.python, args.timeout) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "import_ms": round(statistics.median(run["import_ms"] for run in imports), 1),
+        "import_budget_ms": args.import_budget_ms,
+        "ready_ms": round(statistics.median(ready), 1),
+        "ready_budget_ms": args.ready_budget_ms,
+        "slowest_imports_self_ms": imports[-1]["slowest_self_ms"]
+    }
+    report["passed"] = report["import_ms"] <= args.import_budget_ms and report["ready_ms"] <= args.ready_budget_ms
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import app.main: {report['import_ms']:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+        print(f"first 200 on /health: {report['ready_ms']:.1f} ms (budget {args.ready_budget_ms:.0f} ms)")
+        print("slowest modules (self time):")
+        for name, ms in report["slowest_imports_self_ms"].items():
+            print(f"  {ms:8.1f} ms  {name}")
+        print("✅ Within budget" if report["passed"] else "❌ Cold start regressed past the budget")
+
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
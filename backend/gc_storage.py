@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Storage garbage collection script for EduTok backend
+
+Deletes orphaned uploads, placeholder thumbnails and temp audio files that no
+video row references. Run it from the backend directory, e.g. from cron.
+Run it once with --rebuild-ledger after migrating a deployment that has
+uploads from before the storage ledger existed.
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.database import get_db
+from app.services.storage_gc import storage_garbage_collector
+from app.services.video_upload import video_upload_service
+
+
+def main():
+    """Main function to collect orphaned storage"""
+    parser = argparse.ArgumentParser(description="Remove media files that no video references")
+    parser.add_argument("--grace-hours", type=float, default=None,
+                        help="Only delete files older than this (default: STORAGE_GC_GRACE_HOURS)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would be deleted without deleting")
+    parser.add_argument("--rebuild-ledger", action="store_true",
+                        help="Recount per-creator upload usage from disk instead of collecting")
+    args = parser.parse_args()
+
+    db = next(get_db())
+
+    try:
+        if args.rebuild_ledger:
+            report = video_upload_service.rebuild_ledger(db)
+        else:
+            report = storage_garbage_collector.collect(db, grace_hours=args.grace_hours, dry_run=args.dry_run)
+        print(json.dumps(report, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
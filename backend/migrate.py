@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Database migration script for EduTok backend
+
+Creates any missing tables. Run it once per deploy, before starting the API
+or workers; the app no longer creates tables when it is imported.
+"""
+
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.database import init_db, engine
+
+
+def main():
+    """Main function to create the database schema"""
+    print(f"Creating database tables on {engine.url.render_as_string(hide_password=True)}...")
+    init_db()
+    print("Database schema is up to date!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import uvicorn
 from app.main import app
+from app.database import init_db
 
 if __name__ == "__main__":
+    init_db()
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
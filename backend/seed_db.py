@@ -1,28 +1,62 @@
 #!/usr/bin/env python3
 """
 Database seeding script for EduTok backend
+
+Without flags, loads the sample creators, videos and users. With --synthetic,
+bulk-loads a generated catalogue at production scale instead:
+
+    python seed_db.py --synthetic --videos 2000000 --users 200000
 """
 
 import sys
 import os
+import json
+import logging
+import argparse
 
 # Add the app directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.database import get_db
 from app.utils.seed_data import seed_database
+from app.utils.synthetic_data import load_synthetic_catalogue
 
 
 def main():
     """Main function to seed the database"""
+    parser = argparse.ArgumentParser(description="Seed the database with sample or synthetic data")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Bulk-load a generated catalogue instead of the sample data")
+    parser.add_argument("--videos", type=int, default=1_000_000, help="Synthetic videos (default: 1000000)")
+    parser.add_argument("--users", type=int, default=100_000, help="Synthetic users (default: 100000)")
+    parser.add_argument("--creators", type=int, default=5_000, help="Synthetic creators (default: 5000)")
+    parser.add_argument("--days", type=int, default=365, help="Spread of upload dates, in days (default: 365)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=5_000,
+                        help="Rows per bulk INSERT/COPY and commit (default: 5000)")
+    args = parser.parse_args()
+
     print("Starting database seeding...")
-    
+
     # Get database session
     db = next(get_db())
-    
+
     try:
-        # Seed the database
-        seed_database(db)
+        if args.synthetic:
+            logging.basicConfig(level=logging.INFO)
+            report = load_synthetic_catalogue(
+                db,
+                videos=args.videos,
+                users=args.users,
+                creators=args.creators,
+                seed=args.seed,
+                batch_size=args.batch_size,
+                days=args.days
+            )
+            print(json.dumps(report, indent=2))
+        else:
+            # Seed the database
+            seed_database(db)
         print("Database seeding completed successfully!")
     except Exception as e:
         print(f"Error seeding database: {e}")
@@ -32,4 +66,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
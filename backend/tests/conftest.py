@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+# Point the app at a scratch database, with no background work, before it is imported
+_DB_DIR = tempfile.mkdtemp(prefix="edutok-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["DATABASE_URL_ASYNC"] = f"sqlite+aiosqlite:///{_DB_DIR}/test.db"
+os.environ["JOB_INLINE_WORKER"] = "false"
+os.environ["AI_HEALTH_PROBE_INTERVAL_SECONDS"] = "0"
+os.environ["OPENAI_API_KEY"] = ""
+os.environ["ELEVENLABS_API_KEY"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from app.database import Base, SessionLocal, engine, init_db
+from app.main import app
+
+init_db()
+
+
+@pytest.fixture
+def db():
+    """A session on an empty database"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register and sign in a user"""
+    client.post("/auth/register", json={"username": "tester", "email": "tester@example.com", "password": "password123"})
+    response = client.post("/auth/login", json={"email": "tester@example.com", "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
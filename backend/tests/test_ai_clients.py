@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.services.ai_clients import OpenAIClient
+
+
+class _ModelsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive so the pool holds them
+
+    def do_GET(self):
+        body = b'{"data": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ModelsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _pooled_sockets(client):
+    return [
+        connection._connection._network_stream.get_extra_info("socket")
+        for connection in client._transport._pool.connections
+    ]
+
+
+def test_client_from_closed_loop_has_its_sockets_closed(provider_url):
+    provider = OpenAIClient("test-key", base_url=provider_url)
+
+    async def call():
+        await provider.health_check(timeout=5)
+        return provider.client
+
+    first = asyncio.run(call())
+    sockets = _pooled_sockets(first)
+    assert sockets and all(sock.fileno() != -1 for sock in sockets)
+
+    second = asyncio.run(call())
+
+    assert second is not first
+    assert all(sock.fileno() == -1 for sock in sockets)
+    assert list(provider._clients.values()) == [second]
+    assert provider.get_pool_stats()["open_connections"] == 0  # Its loop has closed too
+
+
+def test_client_is_shared_within_a_loop(provider_url):
+    provider = OpenAIClient("test-key", base_url=provider_url)
+
+    async def call():
+        await provider.health_check(timeout=5)
+        client = provider.client
+        await provider.health_check(timeout=5)
+        assert provider.client is client
+        assert provider.get_pool_stats()["open_connections"] == 1
+        await provider.aclose()
+        assert client.is_closed
+
+    asyncio.run(call())
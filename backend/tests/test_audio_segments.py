@@ -0,0 +1,27 @@
+import os
+from app.config import settings
+from app.services.audio_segments import AudioSegmentCache
+
+SEGMENT = 100 * 1024
+
+
+def _size(cache):
+    return sum(os.path.getsize(os.path.join(cache.directory, name)) for name in os.listdir(cache.directory))
+
+
+def test_cache_is_scanned_only_when_over_its_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tts_cache_max_mb", 1)
+    cache = AudioSegmentCache(str(tmp_path))
+
+    for i in range(10):
+        cache.set(f"segment-{i}", b"x" * SEGMENT)
+    cache.set("segment-0", b"x" * SEGMENT)  # Overwriting doesn't grow the cache
+    assert (cache.scans, cache.evictions) == (1, 0)  # Only the seeding scan
+    assert cache.get_stats()["size_bytes"] == _size(cache) == 10 * SEGMENT
+
+    cache.set("segment-10", b"x" * SEGMENT)
+    assert (cache.scans, cache.evictions) == (2, 2)  # Pruned to 90% of the limit
+    assert cache.get_stats()["size_bytes"] == _size(cache) == 9 * SEGMENT
+
+    cache.set("segment-11", b"x" * SEGMENT)
+    assert cache.scans == 2
@@ -0,0 +1,106 @@
+import asyncio
+from app.config import settings
+from app.models import (
+    Creator, User, GenerationJob, GenerationJobItem, JobStatus, LearningPath, LearningPathItem,
+    VideoCategory, VideoDifficulty
+)
+from app.services.ai_content_generator import ai_content_generator
+from app.services.curriculum import curriculum_generator
+from app.services.generation_jobs import generation_job_queue
+
+# Diamond: Basics -> (Lists, Dicts) -> Comprehensions
+COURSE = [("Basics", []), ("Lists", [0]), ("Dicts", [0]), ("Comprehensions", [1, 2])]
+
+
+def _course(db):
+    user = User(username="learner", email="learner@example.com", hashed_password="x")
+    creator = Creator(name="Teacher", username="teacher")
+    db.add_all([user, creator])
+    db.flush()
+    path = LearningPath(
+        user_id=user.id,
+        creator_id=creator.id,
+        subject="Python",
+        category=VideoCategory.PROGRAMMING,
+        min_difficulty=VideoDifficulty.BEGINNER,
+        max_difficulty=VideoDifficulty.INTERMEDIATE,
+        status=JobStatus.PENDING
+    )
+    path.items = [
+        LearningPathItem(
+            position=position,
+            topic=topic,
+            difficulty=VideoDifficulty.INTERMEDIATE if prerequisites else VideoDifficulty.BEGINNER,
+            prerequisites=prerequisites
+        )
+        for position, (topic, prerequisites) in enumerate(COURSE)
+    ]
+    db.add(path)
+    db.commit()
+    return path
+
+
+def test_course_items_wait_for_their_prerequisites(db):
+    job = curriculum_generator.start(db, _course(db))
+    items = {item.topic: item for item in job.items}
+
+    assert job.path_id is not None
+    assert items["Lists"].difficulty == VideoDifficulty.INTERMEDIATE
+    assert generation_job_queue.claim(db, "worker") == items["Basics"].id
+    assert generation_job_queue.claim(db, "worker") is None  # Everything else builds on Basics
+    assert generation_job_queue.claim(db, "worker", item_id=items["Comprehensions"].id) is None
+
+
+def test_worker_generates_a_course_in_prerequisite_order(db, monkeypatch):
+    monkeypatch.setattr(settings, "job_max_attempts", 1)
+    generate = ai_content_generator.generate_video_script
+    audiences = {}
+
+    async def generate_script(topic, **kwargs):
+        if topic == "Dicts":
+            raise RuntimeError("provider down")
+        audiences[topic] = kwargs.get("target_audience")
+        return await generate(topic=topic, **kwargs)
+
+    monkeypatch.setattr(ai_content_generator, "generate_video_script", generate_script)
+    path = _course(db)
+    job = curriculum_generator.start(db, path)
+
+    asyncio.run(generation_job_queue.run_worker(worker_id="test", poll_interval=0.01, drain=True))
+
+    assert list(audiences) == ["Basics", "Lists", "Comprehensions"]
+    assert audiences["Basics"] == "beginner learners"
+    # The failed prerequisite is left out of the prompt instead of blocking the subtopic
+    assert audiences["Comprehensions"] == "intermediate learners who have already learned Lists"
+
+    db.expire_all()
+    path = db.get(LearningPath, path.id)
+    assert db.get(GenerationJob, job.id).status == JobStatus.FAILED
+    assert path.status == JobStatus.FAILED
+    assert path.completed_at is not None
+    assert path.generation_metadata["job_id"] == job.id
+    statuses = {item.topic: item.status for item in path.items}
+    assert statuses == {
+        "Basics": JobStatus.COMPLETED,
+        "Lists": JobStatus.COMPLETED,
+        "Dicts": JobStatus.FAILED,
+        "Comprehensions": JobStatus.COMPLETED
+    }
+    assert all(item.video_id for item in path.items if item.status == JobStatus.COMPLETED)
+    assert path.items[2].last_error == "provider down"
+    video_ids = {item.topic: item.video_id for item in db.query(GenerationJobItem).all()}
+    assert video_ids["Dicts"] is None
+
+
+def test_curriculum_endpoint_queues_a_job(client, auth_headers):
+    response = client.post("/videos/ai/curriculum", headers=auth_headers, params={
+        "subject": "SQL",
+        "category": "data-engineering",
+        "max_topics": 3
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    job = client.get(f"/videos/ai/jobs/{body['job_id']}", headers=auth_headers).json()
+    assert [item["topic"] for item in job["items"]] == [item["topic"] for item in body["path"]["items"]]
+    assert job["status"] == "pending"
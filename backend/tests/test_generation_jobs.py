@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import event
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import (
+    Creator, User, Video, GenerationJob, GenerationJobItem, JobStatus, VideoCategory, VideoDifficulty
+)
+from app.services.ai_content_generator import ai_content_generator
+from app.services.generation_jobs import generation_job_queue
+
+
+def _enqueue(db, topics):
+    user = User(username="batcher", email="batcher@example.com", hashed_password="x")
+    creator = Creator(name="Batcher", username="batcher")
+    db.add_all([user, creator])
+    db.commit()
+    return generation_job_queue.enqueue_batch(
+        db,
+        topics=topics,
+        category=VideoCategory.PROGRAMMING,
+        difficulty=VideoDifficulty.BEGINNER,
+        creator_id=creator.id,
+        user_id=user.id
+    )
+
+
+def test_claims_respect_the_per_job_concurrency_limit(db, monkeypatch):
+    monkeypatch.setattr(settings, "ai_batch_concurrency", 2)
+    job = _enqueue(db, ["a", "b", "c", "d"])
+
+    claimed = [generation_job_queue.claim(db, "worker") for _ in range(4)]
+
+    assert claimed[2:] == [None, None]
+    assert db.query(GenerationJobItem).filter(
+        GenerationJobItem.job_id == job.id, GenerationJobItem.status == JobStatus.RUNNING
+    ).count() == 2
+    # A specific item can't jump the limit either
+    pending = db.query(GenerationJobItem.id).filter(GenerationJobItem.status == JobStatus.PENDING).first()[0]
+    assert generation_job_queue.claim(db, "worker", item_id=pending) is None
+
+
+def test_worker_records_batch_throughput(client, db):
+    job = _enqueue(db, ["Python lists", "SQL joins", "Git branches"])
+
+    asyncio.run(generation_job_queue.run_worker(worker_id="test", poll_interval=0.01, drain=True))
+
+    db.refresh(job)
+    assert job.status == JobStatus.COMPLETED
+    stats = generation_job_queue.last_batch_stats(db)
+    assert stats["job_id"] == job.id
+    assert stats["topics"] == 3
+    assert stats["generated"] == 3
+    assert stats["failed"] == 0
+    assert stats["elapsed_seconds"] >= 0
+    assert client.get("/videos/ai/service-status").json()["last_batch"]["job_id"] == job.id
+
+
+def test_worker_writes_finished_items_in_one_transaction(db):
+    job = _enqueue(db, ["Python lists", "SQL joins", "Git branches", "HTTP caching"])
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0:3])
+
+    def record_commit(conn):
+        statements.append(["COMMIT"])
+
+    event.listen(engine, "before_cursor_execute", record)
+    event.listen(engine, "commit", record_commit)
+    try:
+        asyncio.run(generation_job_queue.run_worker(worker_id="test", concurrency=4, poll_interval=0.01, drain=True))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        event.remove(engine, "commit", record_commit)
+
+    db.refresh(job)
+    assert job.status == JobStatus.COMPLETED
+    assert db.query(Video).count() == 4
+
+    # The four videos and their items' completion share one transaction
+    inserts = [i for i, words in enumerate(statements) if words[:3] == ["INSERT", "INTO", "videos"]]
+    assert len(inserts) == 4
+    commit = statements.index(["COMMIT"], inserts[0])
+    assert inserts[-1] < commit
+    completed = [words for words in statements[inserts[0]:commit] if words[:2] == ["UPDATE", "generation_job_items"]]
+    assert len(completed) == 1
+
+
+def test_two_workers_never_claim_the_same_item(db):
+    job = _enqueue(db, ["Python lists"])
+    barrier = threading.Barrier(8)
+
+    def claim(worker):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            return generation_job_queue.claim(session, f"worker-{worker}")
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claimed = list(pool.map(claim, range(8)))
+
+    assert [item_id for item_id in claimed if item_id is not None] == [job.items[0].id]
+    db.expire_all()
+    item = db.query(GenerationJobItem).one()
+    assert item.status == JobStatus.RUNNING
+    assert item.attempts == 1
+
+
+def test_failed_items_back_off_then_move_to_dead_letter(db, monkeypatch):
+    monkeypatch.setattr(settings, "job_max_attempts", 2)
+    monkeypatch.setattr(settings, "job_retry_base_seconds", 60)
+    monkeypatch.setattr(generation_job_queue, "dispatch", lambda item_ids, countdown=0: None)
+
+    async def fail(**kwargs):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(ai_content_generator, "generate_video_script", fail)
+    job = _enqueue(db, ["Python lists"])
+    item_id = job.items[0].id
+
+    assert generation_job_queue.claim(db, "worker") == item_id
+    asyncio.run(generation_job_queue.process_item(item_id))
+
+    db.expire_all()
+    item = db.get(GenerationJobItem, item_id)
+    assert item.status == JobStatus.PENDING
+    assert item.last_error == "provider down"
+    delay = (item.next_attempt_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+    assert 40 < delay <= 72  # 60s base, +-20% jitter
+    assert generation_job_queue.claim(db, "worker") is None  # Not due yet
+
+    # Second and last attempt
+    item.next_attempt_at = datetime.now(timezone.utc)
+    db.commit()
+    assert generation_job_queue.claim(db, "worker") == item_id
+    asyncio.run(generation_job_queue.process_item(item_id))
+
+    db.expire_all()
+    item = db.get(GenerationJobItem, item_id)
+    assert item.status == JobStatus.DEAD_LETTER
+    assert item.attempts == 2
+    assert generation_job_queue.claim(db, "worker") is None
+    job = db.get(GenerationJob, job.id)
+    assert job.status == JobStatus.FAILED
+    assert job.failed_items == 1
+
+    assert generation_job_queue.retry_dead_letter(db, job.id) == 1
+    db.expire_all()
+    assert db.get(GenerationJobItem, item_id).status == JobStatus.PENDING
+    assert db.get(GenerationJob, job.id).status == JobStatus.PENDING
+
+
+def test_expired_lease_is_requeued_and_redelivered(db, monkeypatch):
+    dispatched = []
+    monkeypatch.setattr(settings, "job_broker", "celery")
+    monkeypatch.setattr(generation_job_queue, "dispatch", lambda item_ids, countdown=0: dispatched.extend(item_ids))
+    job = _enqueue(db, ["Python lists", "SQL joins"])
+    crashed, alive = [item.id for item in job.items]
+    dispatched.clear()
+
+    # A Celery worker died mid-item: the redelivered task can't claim it
+    assert generation_job_queue.claim(db, "celery@dead", item_id=crashed) == crashed
+    assert generation_job_queue.claim(db, "celery@live", item_id=alive) == alive
+    assert generation_job_queue.claim(db, "celery@redelivered", item_id=crashed) is None
+    db.query(GenerationJobItem).filter(GenerationJobItem.id == crashed).update({
+        "locked_at": datetime.now(timezone.utc) - timedelta(seconds=settings.job_lease_seconds + 1)
+    })
+    db.commit()
+
+    assert generation_job_queue.requeue_stale(db) == 1
+    assert dispatched == [crashed]
+    assert generation_job_queue.requeue_stale(db) == 0  # Nothing left to recover
+    assert generation_job_queue.claim(db, "celery@redelivered", item_id=crashed) == crashed
+    db.expire_all()
+    assert db.get(GenerationJobItem, alive).locked_by == "celery@live"
+
+
+def test_celery_requeues_stale_items_on_a_schedule(monkeypatch):
+    pytest.importorskip("celery")
+    from app import celery_app
+
+    schedule = celery_app.celery_app.conf.beat_schedule["requeue-stale-generation-items"]
+    assert schedule["task"] == celery_app.requeue_stale_generation_items.name
+    assert schedule["schedule"] == settings.job_requeue_interval_seconds
+
+    monkeypatch.setattr(generation_job_queue, "requeue_stale", lambda db: 3)
+    assert celery_app.requeue_stale_generation_items() == 3
@@ -0,0 +1,56 @@
+import asyncio
+from app.models import Creator, User, VideoCategory, VideoDifficulty
+from app.services.ai_content_generator import ai_content_generator
+from app.services.near_duplicates import near_duplicate_index
+
+SCRIPT = (
+    "Containers bundle an application together with its libraries and configuration, so it runs the same way "
+    "on a laptop, a test server and in production. Docker builds an image from a Dockerfile, layer by layer, "
+    "and every container started from that image gets its own isolated filesystem, network and process tree. "
+    "Because layers are cached, rebuilding after a small code change only redoes the last few steps."
+)
+
+
+def _create(creator_id: int, title: str):
+    return asyncio.run(ai_content_generator.create_video_from_script(
+        script=SCRIPT,
+        title=title,
+        category=VideoCategory.TECHNOLOGY,
+        difficulty=VideoDifficulty.BEGINNER,
+        creator_id=creator_id
+    ))
+
+
+def test_near_duplicate_is_reused_only_for_the_same_creator(db):
+    alice, bob = Creator(name="Alice", username="alice"), Creator(name="Bob", username="bob")
+    db.add_all([alice, bob])
+    db.commit()
+
+    original = _create(alice.id, "Docker Basics")
+    assert _create(alice.id, "Docker Basics Again").id == original.id
+
+    bobs = _create(bob.id, "Docker Basics")
+    assert bobs.id != original.id
+    assert bobs.creator_id == bob.id
+
+
+def test_pending_near_duplicate_is_a_conflict(client, auth_headers, db):
+    user = db.query(User).filter(User.email == "tester@example.com").one()
+    creator = Creator(name="Tester", username="tester", user_id=user.id)
+    db.add(creator)
+    db.commit()
+
+    # Another request for the same creator is generating this script right now
+    screening = near_duplicate_index.screen(SCRIPT, creator.id)
+    try:
+        response = client.post("/videos/ai/create-video", headers=auth_headers, params={
+            "script": SCRIPT,
+            "title": "Docker Basics",
+            "category": "technology",
+            "difficulty": "beginner"
+        })
+    finally:
+        near_duplicate_index.release(screening)
+
+    assert response.status_code == 409
+    assert response.headers["retry-after"] == "30"
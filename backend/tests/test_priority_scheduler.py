@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from app.config import settings
+from app.services.priority_scheduler import Lane, PriorityScheduler, priority_scope
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "ai_scheduler_enabled", True)
+    monkeypatch.setattr(settings, "ai_scheduler_batch_max_wait_seconds", 30)
+
+
+async def _run(scheduler, callers, before_release=None):
+    """Queue `callers` (label, lane, user, weight) behind a held turn, then record who goes in which order"""
+    order = []
+    held, release = asyncio.Event(), asyncio.Event()
+
+    async def holder():
+        async with scheduler.turn():
+            held.set()
+            await release.wait()
+
+    async def caller(label, lane, user_id, weight):
+        with priority_scope(lane, user_id=user_id, weight=weight):
+            async with scheduler.turn():
+                order.append(label)
+
+    first = asyncio.create_task(holder())
+    await held.wait()
+    tasks = []
+    for caller_args in callers:
+        tasks.append(asyncio.create_task(caller(*caller_args)))
+        await asyncio.sleep(0)  # Queue them in this order
+    if before_release:
+        before_release()
+    release.set()
+    await asyncio.gather(first, *tasks)
+    return order
+
+
+def test_interactive_goes_first_and_users_take_turns():
+    scheduler = PriorityScheduler("test")
+    callers = [
+        ("b1", Lane.BATCH, 9, 1.0),
+        ("b2", Lane.BATCH, 9, 1.0),
+        ("a1", Lane.INTERACTIVE, 1, 1.0),
+        ("a2", Lane.INTERACTIVE, 1, 1.0),
+        ("a3", Lane.INTERACTIVE, 1, 1.0),
+        ("c1", Lane.INTERACTIVE, 2, 1.0),
+    ]
+
+    order = asyncio.run(_run(scheduler, callers))
+
+    # User 2's single call isn't stuck behind all of user 1's
+    assert order == ["a1", "c1", "a2", "a3", "b1", "b2"]
+    stats = scheduler.get_stats()
+    assert stats["interactive"]["dispatched"] == 5  # Including the holder
+    assert stats["batch"]["dispatched"] == 2
+    assert stats["batch"]["queued"] == 0
+
+
+def test_users_share_a_lane_by_weight():
+    scheduler = PriorityScheduler("test")
+    callers = [(f"heavy{i}", Lane.BATCH, 1, 2.0) for i in range(4)]
+    callers += [(f"light{i}", Lane.BATCH, 2, 1.0) for i in range(4)]
+
+    order = asyncio.run(_run(scheduler, callers))
+
+    # Weight 2 gets two calls for every one of weight 1 while both are queued
+    assert [label[:5] for label in order[:6]] == ["heavy", "light", "heavy", "heavy", "light", "heavy"]
+
+
+def test_starving_batch_call_is_served_before_interactive_work():
+    scheduler = PriorityScheduler("test")
+    callers = [
+        ("a1", Lane.INTERACTIVE, 1, 1.0),
+        ("b1", Lane.BATCH, 9, 1.0),
+        ("a2", Lane.INTERACTIVE, 1, 1.0),
+    ]
+
+    def age_batch_waiter():
+        for waiters in scheduler._queues[Lane.BATCH].users.values():
+            for waiter in waiters:
+                waiter.enqueued_at -= settings.ai_scheduler_batch_max_wait_seconds
+
+    order = asyncio.run(_run(scheduler, callers, before_release=age_batch_waiter))
+
+    assert order == ["b1", "a1", "a2"]
+    assert scheduler.get_stats()["batch"]["starvation_promotions"] == 1
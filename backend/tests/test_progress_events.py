@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+import time
+from app.config import settings
+from app.services import progress_bus as progress_bus_module
+from app.services.progress_bus import ProgressBus, progress_bus
+
+SCRIPT = "Git tracks snapshots of a project so every change can be reviewed, shared and undone when needed."
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _create_video(client, auth_headers, generation_id):
+    return client.post(
+        "/videos/ai/create-video",
+        headers={**auth_headers, "X-Generation-Id": generation_id},
+        params={"script": SCRIPT, "title": "Git Basics", "category": "programming", "difficulty": "beginner"}
+    )
+
+
+def test_create_video_streams_its_stages(client, auth_headers):
+    user_id = client.get("/auth/me", headers=auth_headers).json()["id"]
+    channel = f"generation:{user_id}:gen-1"
+    streamed = {}
+
+    def listen():
+        streamed["response"] = client.get("/videos/ai/generations/gen-1/events", headers=auth_headers)
+
+    listener = threading.Thread(target=listen)
+    listener.start()
+    deadline = time.monotonic() + 5
+    while channel not in progress_bus._subscribers and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    created = _create_video(client, auth_headers, "gen-1")
+    listener.join(timeout=10)
+
+    assert created.status_code == 200
+    events = _events(streamed["response"].text)
+    stages = [data["stage"] for event, data in events if event == "progress"]
+    assert stages[-1] == "persisted"
+    assert {"voice", "video"} <= set(stages[:-1])
+    assert events[-1] == ("done", {"generation_id": "gen-1", "stage": "persisted", "video_id": created.json()["id"]})
+
+
+def test_late_subscriber_gets_the_last_event(client, auth_headers):
+    created = _create_video(client, auth_headers, "gen-2")
+
+    response = client.get("/videos/ai/generations/gen-2/events", headers=auth_headers)
+
+    events = _events(response.text)
+    assert [event for event, _ in events] == ["progress", "done"]
+    assert events[0][1]["percent"] == 100
+    assert events[1][1]["video_id"] == created.json()["id"]
+
+
+class _FakeRedis:
+    """Records what is published, and fails like redis.asyncio when its loop has gone"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        client = self
+
+        class Pipeline:
+            async def __aenter__(self):
+                if asyncio.get_running_loop() is not client.loop:
+                    raise RuntimeError("Event loop is closed")
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def set(self, key, value, ex=None):
+                pass
+
+            def publish(self, channel, payload):
+                client.published.append(channel)
+
+            async def execute(self):
+                pass
+
+        return Pipeline()
+
+
+def test_redis_client_is_kept_per_event_loop(monkeypatch):
+    bus = ProgressBus()
+    monkeypatch.setattr(settings, "progress_bus_backend", "redis")
+    monkeypatch.setattr(progress_bus_module, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(bus, "_build_redis", _FakeRedis)
+
+    # Like two Celery tasks, each in its own asyncio.run()
+    asyncio.run(bus.publish("job:1", {"stage": "script"}))
+    first = next(iter(bus._redis.values()))
+    asyncio.run(bus.publish("job:1", {"stage": "voice"}))
+    second = next(iter(bus._redis.values()))
+
+    assert second is not first
+    assert len(bus._redis) == 1  # The client of the closed loop was dropped
+    assert first.published == second.published == ["edutok:progress:job:1"]
+
+
+def test_missing_redis_package_is_reported(monkeypatch, caplog):
+    bus = ProgressBus()
+    monkeypatch.setattr(settings, "progress_bus_backend", "redis")
+    monkeypatch.setattr(progress_bus_module, "REDIS_AVAILABLE", False)
+
+    asyncio.run(bus.publish("job:1", {"stage": "script"}))
+    asyncio.run(bus.publish("job:1", {"stage": "voice"}))
+
+    assert caplog.text.count("redis package is not installed") == 1
+    assert asyncio.run(bus.last_event("job:1"))["stage"] == "voice"
@@ -0,0 +1,61 @@
+import pytest
+from app.config import settings
+from app.models import Creator, Video, VideoCategory, VideoDifficulty, ContentSource
+from app.services.query_profiler import query_profiler, assert_max_queries
+
+REAL_FILES = ["python-explained.mp4", "sql-nosql.mp4", "data-engineer.mp4"]
+
+
+@pytest.fixture
+def catalogue(db):
+    """Twelve videos spread over six creators"""
+    creators = [Creator(name=f"Creator {i}", username=f"creator{i}") for i in range(6)]
+    db.add_all(creators)
+    db.flush()
+    db.add_all(
+        Video(
+            title=f"Python lesson {i}",
+            video_url=f"/data/{REAL_FILES[i % 3]}",
+            category=VideoCategory.PROGRAMMING,
+            difficulty=VideoDifficulty.BEGINNER,
+            source="ai-generated",
+            content_source=ContentSource.AI_GENERATED,
+            creator_id=creators[i % 6].id
+        )
+        for i in range(12)
+    )
+    db.commit()
+
+
+@pytest.mark.parametrize("url,max_queries", [
+    ("/videos/?limit=12", 2),
+    ("/videos/category/programming?limit=12", 2),
+    ("/videos/search/?q=python&limit=12", 2),
+    ("/videos/ai/generated?limit=12", 1),
+])
+def test_list_endpoints_load_creators_without_n_plus_one(client, catalogue, url, max_queries):
+    response = assert_max_queries(client, "GET", url, max_queries)
+
+    assert response.status_code == 200
+    body = response.json()
+    videos = body["videos"] if isinstance(body, dict) else body
+    assert len(videos) == 12
+    assert {video["creator"]["name"] for video in videos} == {f"Creator {i}" for i in range(6)}
+
+
+def test_repeated_select_is_flagged_as_n_plus_one(db, catalogue, caplog):
+    flagged = query_profiler.flagged
+    db.expunge_all()
+
+    with query_profiler.capture() as profiles:
+        with query_profiler.profile("GET /lazy"):
+            # Reading the lazy relationship per row issues one SELECT per creator
+            for video in db.query(Video).all():
+                video.creator.name
+
+    assert query_profiler.flagged == flagged + 1
+    repeated = profiles[0].repeated(settings.sql_n_plus_one_threshold)
+    assert len(repeated) == 1
+    assert repeated[0]["shape"].startswith("SELECT creators.")
+    assert repeated[0]["count"] >= settings.sql_n_plus_one_threshold
+    assert "Possible N+1 in GET /lazy" in caplog.text
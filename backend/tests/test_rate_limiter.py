@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.services import rate_limiter
+from app.services.rate_limiter import ProviderRateLimiter, is_rate_limit_error, retry_after_from_error
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; sleeping just advances it"""
+    state = SimpleNamespace(now=1000.0, slept=[])
+
+    async def sleep(seconds):
+        state.slept.append(round(seconds, 3))
+        state.now += seconds
+
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=lambda: state.now))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(sleep=sleep))
+    return state
+
+
+def test_rate_limit_halves_the_rate_and_successes_restore_it(clock):
+    limiter = ProviderRateLimiter("test", {"requests": 60})
+
+    limiter.on_rate_limited(retry_after=3)
+    assert limiter.scale == 0.5
+    limiter.on_rate_limited(retry_after=1)
+    assert limiter.scale == 0.25
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.scale == limiter.min_scale
+    assert limiter.rate_limited_count == 12
+
+    for _ in range(30):
+        limiter.on_success()
+    assert limiter.scale == 1.0  # Capped at the configured rate
+
+
+def test_callers_wait_out_retry_after_then_pace_at_the_reduced_rate(clock):
+    limiter = ProviderRateLimiter("test", {"requests": 60})
+
+    async def calls():
+        for _ in range(60):
+            await limiter.acquire(requests=1)  # The full bucket: no waiting
+        assert clock.slept == []
+
+        limiter.on_rate_limited(retry_after=3)
+        await limiter.acquire(requests=1)
+        # The 3s pause refills 1.5 requests at half rate, so this call fits
+        assert clock.slept == [3]
+
+        await limiter.acquire(requests=1)
+        await limiter.acquire(requests=1)
+        # Half of 60/min is one request per 2s
+        assert clock.slept == [3, 1.0, 2.0]
+
+    asyncio.run(calls())
+    assert limiter.get_stats()["rate_scale"] == 0.5
+
+
+def test_provider_errors_are_recognised_as_rate_limits():
+    error = Exception("slow down")
+    error.response = SimpleNamespace(status_code=429, headers={"retry-after": "7"})
+
+    assert is_rate_limit_error(error)
+    assert retry_after_from_error(error) == 7.0
+    assert not is_rate_limit_error(ValueError("bad request"))
+    assert retry_after_from_error(ValueError("bad request")) is None
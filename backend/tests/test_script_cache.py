@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from app.config import settings
+from app.database import engine
+from app.models.cache import ScriptCacheEntry
+from app.services import script_cache as script_cache_module
+from app.services.script_cache import ScriptCache
+
+
+def _payload(model=None):
+    metadata = {"route": {"model": model}} if model else {}
+    return {"script": "Hello", "metadata": metadata}
+
+
+def test_hits_are_read_only_until_flushed(db, monkeypatch):
+    cache = ScriptCache()
+    cache.set("key", "Loops", _payload())
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            assert cache.get("key")["script"] == "Hello"
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    assert db.query(ScriptCacheEntry.hit_count).scalar() == 0
+
+    monkeypatch.setattr(script_cache_module, "HIT_FLUSH_SECONDS", 0)
+    cache.get("key")
+    assert db.query(ScriptCacheEntry.hit_count).scalar() == 4
+
+
+def test_fallback_tier_scripts_expire_sooner(db, monkeypatch):
+    monkeypatch.setattr(settings, "script_model_tiers", "gpt-big,gpt-small")
+    monkeypatch.setattr(settings, "script_cache_fallback_ttl_hours", 1.0)
+    cache = ScriptCache()
+    cache.set("primary", "Loops", _payload("gpt-big"))
+    cache.set("fallback", "Loops", _payload("gpt-small"))
+
+    ttl = {
+        key: expires_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+        for key, expires_at in db.query(ScriptCacheEntry.cache_key, ScriptCacheEntry.expires_at)
+    }
+    assert ttl["primary"] > timedelta(hours=100)
+    assert ttl["fallback"] < timedelta(hours=1)
+
+    monkeypatch.setattr(settings, "script_cache_fallback_ttl_hours", 0)
+    cache.set("skipped", "Loops", _payload("gpt-small"))
+    assert cache.get("skipped") is None
+
+
+def test_eviction_drops_least_recently_used_in_batches(db, monkeypatch):
+    monkeypatch.setattr(settings, "script_cache_max_entries", 5)
+    monkeypatch.setattr(script_cache_module, "EVICT_EVERY_SETS", 4)
+    monkeypatch.setattr(script_cache_module, "EVICT_BATCH", 2)
+    cache = ScriptCache()
+    cache._sets_since_evict = 0
+
+    now = datetime.now(timezone.utc)
+    for i in range(8):
+        cache.set(f"key-{i}", "Loops", _payload())
+        db.query(ScriptCacheEntry).filter(ScriptCacheEntry.cache_key == f"key-{i}").update(
+            {ScriptCacheEntry.last_accessed_at: now - timedelta(minutes=10 - i)}
+        )
+        db.commit()
+
+    # Only the 8th store finds the table over its limit; one pass deletes the two oldest entries
+    keys = sorted(key for (key,) in db.query(ScriptCacheEntry.cache_key))
+    assert keys == ["key-2", "key-3", "key-4", "key-5", "key-6", "key-7"]
+    assert cache.evictions == 2
@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from app.services.priority_scheduler import Lane, current_priority, priority_scope
+from app.services.resilience import DeadlineExceeded, deadline_scope, remaining_time
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"script": "shared"}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls == 1
+    assert results == [{"script": "shared"}] * 5
+    assert len({id(result) for result in results}) == 5  # Each caller gets its own copy
+    assert flight.get_stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) and str(result) == "provider down" for result in results)
+    assert flight.get_stats()["started"] == 1
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_call_is_cancelled_when_every_caller_leaves():
+    flight = SingleFlight("test")
+
+    async def run():
+        started = asyncio.Event()
+        finished = []
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                finished.append("cancelled")
+                raise
+
+        caller = asyncio.ensure_future(flight.do("key", work))
+        await started.wait()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        return finished
+
+    assert asyncio.run(run()) == ["cancelled"]
+
+
+def test_caller_arriving_during_cancellation_starts_a_new_call():
+    flight = SingleFlight("test")
+
+    async def run():
+        started = asyncio.Event()
+        attempts = []
+
+        async def work():
+            attempts.append(len(attempts) + 1)
+            started.set()
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                # Slow cleanup, during which the cancelled task is still in flight
+                await asyncio.sleep(0.05)
+                raise
+            return "fresh"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+        result = await flight.do("key", work)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return result, attempts
+
+    result, attempts = asyncio.run(run())
+
+    assert result == "fresh"
+    assert attempts == [1, 2]
+
+
+def test_interactive_caller_does_not_wait_in_a_batch_call():
+    flight = SingleFlight("test")
+    lanes = []
+
+    async def work():
+        lanes.append(current_priority()[0])
+        await asyncio.sleep(0.05)
+        return "script"
+
+    async def call(lane):
+        with priority_scope(lane, user_id=1):
+            return await flight.do("key", work)
+
+    async def run():
+        batch = asyncio.ensure_future(call(Lane.BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(call(Lane.INTERACTIVE))
+        await asyncio.sleep(0)
+        # A batch caller is happy to ride along with the interactive call
+        late_batch = asyncio.ensure_future(call(Lane.BATCH))
+        return await asyncio.gather(batch, interactive, late_batch)
+
+    assert asyncio.run(run()) == ["script"] * 3
+    assert lanes == [Lane.BATCH, Lane.INTERACTIVE]
+    assert flight.get_stats() == {"in_flight": 0, "started": 2, "coalesced": 1}
+
+
+def test_shared_call_outlives_the_first_callers_deadline():
+    flight = SingleFlight("test")
+    deadlines = []
+
+    async def work():
+        deadlines.append(remaining_time())
+        await asyncio.sleep(0.1)
+        return "script"
+
+    async def hurried():
+        with deadline_scope(0.02):
+            return await flight.do("key", work)
+
+    async def patient():
+        await asyncio.sleep(0)
+        return await flight.do("key", work)
+
+    async def run():
+        return await asyncio.gather(hurried(), patient(), return_exceptions=True)
+
+    hurried_result, patient_result = asyncio.run(run())
+
+    assert isinstance(hurried_result, DeadlineExceeded)
+    assert patient_result == "script"
+    assert deadlines == [None]  # The shared call isn't bound by the first caller's deadline
+    assert flight.get_stats()["started"] == 1
@@ -0,0 +1,118 @@
+import io
+import time
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Creator, Video, VideoCategory, VideoDifficulty, ContentSource
+from app.services.video_upload import video_upload_service
+
+
+def test_concurrent_first_uploads_share_one_ledger_row(db):
+    creator = Creator(name="Uploader", username="uploader")
+    db.add(creator)
+    db.commit()
+
+    first, second = SessionLocal(), SessionLocal()
+    errors = []
+
+    def record_second_upload():
+        try:
+            video_upload_service._record_usage(second, creator.id, ".mp4", 50, 1)
+            second.commit()
+        except Exception as e:
+            errors.append(e)
+            second.rollback()
+
+    try:
+        # The first upload has created the ledger row but not committed yet
+        video_upload_service._record_usage(first, creator.id, ".mp4", 100, 1)
+        thread = threading.Thread(target=record_second_upload)
+        thread.start()
+        time.sleep(0.2)
+        first.commit()
+        thread.join()
+    finally:
+        first.close()
+        second.close()
+
+    assert errors == []
+    usage = video_upload_service.get_creator_usage(db, creator.id)
+    assert usage["video_count"] == 2
+    assert usage["total_bytes"] == 150
+
+
+def test_deleting_updates_the_existing_row(db):
+    creator = Creator(name="Uploader", username="uploader")
+    db.add(creator)
+    db.commit()
+
+    video_upload_service._record_usage(db, creator.id, ".mp4", 100, 1)
+    video_upload_service._record_usage(db, creator.id, ".mp4", 30, 1)
+    db.commit()
+    assert video_upload_service.get_creator_usage(db, creator.id)["total_bytes"] == 130
+
+    video_upload_service._record_usage(db, creator.id, ".mp4", -100, -1)
+    db.commit()
+    usage = video_upload_service.get_creator_usage(db, creator.id)
+    assert usage["by_extension"] == {".mp4": {"count": 1, "bytes": 30}}
+
+
+def test_rebuild_ledger_counts_uploads_on_disk(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(video_upload_service, "upload_dir", str(tmp_path))
+    creator = Creator(name="Uploader", username="uploader")
+    db.add(creator)
+    db.flush()
+    for filename, size in (("intro.mp4", 100), ("outro.webm", 40), ("missing.mp4", None)):
+        if size:
+            (tmp_path / filename).write_bytes(b"x" * size)
+        db.add(Video(
+            title=filename,
+            video_url=f"/uploads/videos/{filename}",
+            category=VideoCategory.PROGRAMMING,
+            difficulty=VideoDifficulty.BEGINNER,
+            source="uploaded",
+            content_source=ContentSource.UPLOADED,
+            creator_id=creator.id
+        ))
+    video_upload_service._record_usage(db, creator.id, ".mp4", 999, 9)  # Drifted entry
+    db.commit()
+
+    stats = video_upload_service.rebuild_ledger(db)
+
+    assert stats["video_count"] == 2
+    usage = video_upload_service.get_creator_usage(db, creator.id)
+    assert usage["by_extension"] == {".mp4": {"count": 1, "bytes": 100}, ".webm": {"count": 1, "bytes": 40}}
+
+
+def test_upload_over_quota_leaves_no_files(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(video_upload_service, "upload_dir", str(tmp_path / "videos"))
+    monkeypatch.setattr(video_upload_service, "thumbnail_dir", str(tmp_path / "thumbnails"))
+    monkeypatch.setattr(settings, "creator_storage_quota_mb", 1)
+    creator = Creator(name="Uploader", username="uploader")
+    db.add(creator)
+    db.commit()
+
+    def upload(title, size):
+        # No declared size, so the quota is checked against the bytes actually written
+        return asyncio.run(video_upload_service.upload_video(
+            file=UploadFile(io.BytesIO(b"x" * size), filename="lesson.mp4"),
+            title=title,
+            description="",
+            category=VideoCategory.PROGRAMMING,
+            difficulty=VideoDifficulty.BEGINNER,
+            creator_id=creator.id,
+            db=db
+        ))
+
+    video = upload("first", 1000 * 1024)
+    with pytest.raises(HTTPException) as error:
+        upload("second", 100 * 1024)
+
+    assert error.value.status_code == 400
+    assert [path.name for path in (tmp_path / "videos").iterdir()] == [video.video_url.rsplit("/", 1)[1]]
+    assert len(list((tmp_path / "thumbnails").iterdir())) == 1
+    usage = video_upload_service.get_creator_usage(db, creator.id)
+    assert (usage["video_count"], usage["total_bytes"]) == (1, 1000 * 1024)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Generation worker for EduTok backend
+
+Processes queued batch generation jobs from the database. Run as many of
+these as needed, on any machine that can reach the database.
+"""
+
+import sys
+import os
+import asyncio
+import logging
+import argparse
+import signal
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.generation_jobs import generation_job_queue
+
+
+def main():
+    """Main function to run a generation worker"""
+    parser = argparse.ArgumentParser(description="Process queued video generation jobs")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Items processed at once (default: JOB_WORKER_CONCURRENCY)")
+    parser.add_argument("--drain", action="store_true",
+                        help="Exit once no due items are left instead of polling forever")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        await generation_job_queue.run_worker(
+            concurrency=args.concurrency,
+            stop_event=stop_event,
+            drain=args.drain
+        )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -76,7 +76,12 @@ start_backend() {
     fi
     
     cd backend
-    python -m uvicorn app.main:app --host 0.0.0.0 --port $BACKEND_PORT > "../$LOG_FILE" 2>&1 &
+    if ! python migrate.py >> "../$LOG_FILE" 2>&1; then
+        print_error "Database migration failed (see $LOG_FILE)"
+        cd ..
+        return 1
+    fi
+    python -m uvicorn app.main:app --host 0.0.0.0 --port $BACKEND_PORT >> "../$LOG_FILE" 2>&1 &
     BACKEND_PID=$!
     echo $BACKEND_PID > "../$BACKEND_PID_FILE"
     cd ..
@@ -103,7 +108,7 @@ start_mobile() {
     fi
     
     cd mobile
-    npx expo start --port $MOBILE_PORT > "../$LOG_FILE" 2>&1 &
+    npx expo start --port $MOBILE_PORT >> "../$LOG_FILE" 2>&1 &
     MOBILE_PID=$!
     echo $MOBILE_PID > "../$MOBILE_PID_FILE"
     cd ..